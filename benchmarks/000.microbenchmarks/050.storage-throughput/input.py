@@ -0,0 +1,60 @@
+
+import json
+import os
+
+KB = 1024
+MB = 1024 * 1024
+
+# Objects stored at the same time in /tmp or memory must fit in the smallest
+# /tmp among providers (512 MB on AWS Lambda) and leave memory for the runtime
+# of the function with 1024 MB.
+MAX_IN_FLIGHT = 512 * MB
+# Conservative aggregate throughput, used to fit transfers in half of the timeout.
+EXPECTED_THROUGHPUT = 25 * MB
+
+# Repetitions are the upper bound of transfers by each worker for each size.
+size_generators = {
+    'test' : {
+        'sizes': [KB, 64 * KB, MB],
+        'concurrency': 1,
+        'repetitions': 3
+    },
+    'small' : {
+        'sizes': [KB, 64 * KB, MB, 16 * MB, 64 * MB],
+        'concurrency': 4,
+        'repetitions': 5
+    },
+    'large': {
+        'sizes': [KB, MB, 16 * MB, 64 * MB, 128 * MB],
+        'concurrency': 8,
+        'repetitions': 5
+    }
+}
+
+# Timeout of the function in seconds.
+def timeout():
+    with open(os.path.join(os.path.dirname(__file__), 'config.json'), 'r') as f:
+        return json.load(f)['timeout']
+
+# Objects in flight are the source object and one object per worker, stored
+# in /tmp in the file mode and in memory in the stream mode.
+def workers_count(size, concurrency):
+    return max(1, min(concurrency, MAX_IN_FLIGHT // size - 1))
+
+def repetitions(config, workers):
+    # each object is uploaded and downloaded once
+    transferred = sum(2 * size * count for size, count in zip(config['sizes'], workers))
+    fitting = int(timeout() / 2 * EXPECTED_THROUGHPUT / transferred)
+    return max(1, min(config['repetitions'], fitting))
+
+def buckets_count():
+    return (0, 1)
+
+def generate_input(data_dir, size, input_buckets, output_buckets, upload_func):
+    input_config = dict(size_generators[size])
+    workers = [workers_count(s, input_config['concurrency']) for s in input_config['sizes']]
+    input_config['repetitions'] = repetitions(input_config, workers)
+    input_config['workers'] = workers
+    input_config['bucket'] = {'output': output_buckets[0]}
+    input_config['mode'] = 'file'
+    return input_config
@@ -0,0 +1,141 @@
+import concurrent.futures
+import datetime
+import io
+import os
+import shutil
+import uuid
+
+from . import storage
+client = storage.storage.get_instance()
+
+MB = 1024 * 1024
+# Objects are created by repeating a random block of this size.
+SOURCE_BLOCK_SIZE = MB
+
+def generate_file(path, size):
+    block = os.urandom(min(size, SOURCE_BLOCK_SIZE))
+    with open(path, 'wb') as f:
+        remaining = size
+        while remaining > 0:
+            count = min(remaining, len(block))
+            f.write(block[:count])
+            remaining -= count
+
+def timed(func, *args):
+    begin = datetime.datetime.now()
+    ret = func(*args)
+    end = datetime.datetime.now()
+    return ret, (end - begin) / datetime.timedelta(microseconds=1)
+
+# Each worker performs its operations sequentially, workers run concurrently.
+def upload_worker(bucket, name, source, mode, repetitions):
+    keys = []
+    latencies = []
+    for i in range(repetitions):
+        if mode == 'stream':
+            key, latency = timed(client.upload_stream, bucket, name, io.BytesIO(source))
+        else:
+            key, latency = timed(client.upload, bucket, name, source)
+        keys.append(key)
+        latencies.append(latency)
+    return keys, latencies
+
+def download_worker(bucket, keys, mode, path):
+    latencies = []
+    for key in keys:
+        if mode == 'stream':
+            _, latency = timed(client.download_stream, bucket, key)
+        else:
+            _, latency = timed(client.download, bucket, key, path)
+            os.remove(path)
+        latencies.append(latency)
+    return None, latencies
+
+def run_phase(operation, size, worker, workers_args):
+    begin = datetime.datetime.now()
+    with concurrent.futures.ThreadPoolExecutor(max_workers=len(workers_args)) as pool:
+        results = list(pool.map(lambda args: worker(*args), workers_args))
+    end = datetime.datetime.now()
+
+    latencies = [latency for _, worker_latencies in results for latency in worker_latencies]
+    elapsed = (end - begin) / datetime.timedelta(microseconds=1)
+    transferred = size * len(latencies)
+    return [ret for ret, _ in results], {
+        'operation': operation,
+        'size': size,
+        'concurrency': len(workers_args),
+        'bytes': transferred,
+        'time': elapsed,
+        # aggregate throughput of all workers
+        'throughput': transferred / MB / (elapsed / 1e6) if elapsed > 0 else 0,
+        'latencies': latencies
+    }
+
+def remove_keys(bucket, keys):
+    for worker_keys in keys:
+        for key in worker_keys:
+            client.remove(bucket, key)
+
+def measure_size(bucket, size, concurrency, repetitions, mode, work_dir):
+
+    name = 'throughput-{}.bin'.format(size)
+    source_path = os.path.join(work_dir, name)
+    generate_file(source_path, size)
+    if mode == 'stream':
+        with open(source_path, 'rb') as f:
+            source = f.read()
+    else:
+        source = source_path
+
+    keys, upload_stats = run_phase(
+        'upload', size, upload_worker,
+        [(bucket, name, source, mode, repetitions) for i in range(concurrency)]
+    )
+    os.remove(source_path)
+    # each worker downloads the objects uploaded by itself,
+    # and objects are removed afterward to not fill the bucket
+    try:
+        _, download_stats = run_phase(
+            'download', size, download_worker,
+            [
+                (bucket, worker_keys, mode, os.path.join(work_dir, 'download-{}'.format(i)))
+                for i, worker_keys in enumerate(keys)
+            ]
+        )
+    finally:
+        remove_keys(bucket, keys)
+    return [upload_stats, download_stats]
+
+def handler(event):
+
+    output_bucket = event.get('bucket').get('output')
+    sizes = event.get('sizes')
+    # number of workers for each size, defaults to the same concurrency for all sizes
+    workers = event.get('workers', [event.get('concurrency', 1)] * len(sizes))
+    if len(workers) != len(sizes):
+        raise ValueError('Expected the number of workers for each of {} sizes'.format(len(sizes)))
+    repetitions = event.get('repetitions', 1)
+    # file: transfers between storage and /tmp, stream: transfers of in-memory objects
+    mode = event.get('mode', 'file')
+
+    work_dir = '/tmp/storage-throughput-{}'.format(uuid.uuid4())
+    os.makedirs(work_dir)
+    results = []
+    benchmark_begin = datetime.datetime.now()
+    try:
+        for size, count in zip(sizes, workers):
+            results.extend(measure_size(output_bucket, size, count, repetitions, mode, work_dir))
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    benchmark_end = datetime.datetime.now()
+
+    return {
+            'result': {
+                'bucket': output_bucket
+            },
+            'measurement': {
+                'total_time': (benchmark_end - benchmark_begin) / datetime.timedelta(microseconds=1),
+                'mode': mode,
+                'results': results
+            }
+        }
@@ -34,4 +34,6 @@ def generate_input(data_dir, size, input_buckets, output_buckets, upload_func):
     input_config['object']['key'] = datasets[0]
     input_config['bucket']['input'] = input_buckets[0]
     input_config['bucket']['output'] = output_buckets[0]
+    # zip archive created in /tmp, overridden with benchmark-input of the experiment config
+    input_config['compression'] = {'streaming': False, 'codec': 'zip', 'level': None}
     return input_config
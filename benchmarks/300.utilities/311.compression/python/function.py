@@ -1,13 +1,31 @@
+import bz2
 import datetime
+import gzip
 import io
+import lzma
 import os
-import shutil
+import queue
+import tarfile
+import threading
 import uuid
+import zipfile
 import zlib
 
 from . import storage
 client = storage.storage.get_instance()
 
+# Streaming mode: size of chunks passed to the uploader and the maximal
+# number of chunks buffered between the compressor and the uploader.
+PIPE_CHUNK_SIZE = 1024 * 1024
+PIPE_MAX_CHUNKS = 8
+
+ARCHIVE_EXTENSIONS = {
+    'zip': 'zip',
+    'gzip': 'tar.gz',
+    'bz2': 'tar.bz2',
+    'xz': 'tar.xz'
+}
+
 def parse_directory(directory):
 
     size = 0
@@ -16,11 +34,216 @@ def parse_directory(directory):
             size += os.path.getsize(os.path.join(root, file))
     return size
 
+class PipeWriter:
+    '''
+        Write side of a bounded in-memory pipe.
+        Data is passed to the reader in chunks; writes block when the reader
+        falls behind and the queue is full.
+    '''
+
+    def __init__(self, pipe_queue, chunk_size):
+        self._queue = pipe_queue
+        self._chunk_size = chunk_size
+        self._buffer = bytearray()
+        self.aborted = threading.Event()
+        self.bytes_written = 0
+
+    def _put(self, item):
+        while True:
+            try:
+                self._queue.put(item, timeout=1)
+                return
+            except queue.Full:
+                if self.aborted.is_set():
+                    raise RuntimeError('Upload of compressed stream failed!')
+
+    def write(self, data):
+        self._buffer += data
+        self.bytes_written += len(data)
+        if len(self._buffer) >= self._chunk_size:
+            self._put(bytes(self._buffer))
+            self._buffer = bytearray()
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def close(self):
+        if self._buffer:
+            self._put(bytes(self._buffer))
+            self._buffer = bytearray()
+        self._put(None)
+
+    # Propagate failure of the compressor to the reader to abort the upload.
+    def fail(self, error):
+        self._put(error)
+
+class PipeReader(io.RawIOBase):
+    '''
+        Read side of the pipe, a non-seekable file object consumed by the
+        multipart upload of storage client.
+        Reads return the requested number of bytes unless the stream ended,
+        since multipart uploads expect parts of full size.
+    '''
+
+    def __init__(self, pipe_queue):
+        self._queue = pipe_queue
+        self._chunk = memoryview(b'')
+        self._eof = False
+        self._position = 0
+
+    def readable(self):
+        return True
+
+    def tell(self):
+        return self._position
+
+    def _next_chunk(self):
+        chunk = self._queue.get()
+        if chunk is None:
+            self._eof = True
+        elif isinstance(chunk, Exception):
+            raise chunk
+        else:
+            self._chunk = memoryview(chunk)
+
+    def read(self, size=-1):
+        data = bytearray()
+        while (size < 0 or len(data) < size) and not self._eof:
+            if not self._chunk:
+                self._next_chunk()
+                continue
+            count = len(self._chunk) if size < 0 else min(size - len(data), len(self._chunk))
+            data += self._chunk[:count]
+            self._chunk = self._chunk[count:]
+        self._position += len(data)
+        return bytes(data)
+
+    def readinto(self, buf):
+        data = self.read(len(buf))
+        buf[:len(data)] = data
+        return len(data)
+
+def open_archive(codec, level, output):
+    if codec == 'zip':
+        kwargs = {'compresslevel': level} if level is not None else {}
+        return zipfile.ZipFile(output, mode='w', compression=zipfile.ZIP_DEFLATED, **kwargs)
+    if codec == 'gzip':
+        compressed = gzip.GzipFile(fileobj=output, mode='wb', compresslevel=9 if level is None else level)
+    elif codec == 'bz2':
+        compressed = bz2.BZ2File(output, mode='wb', compresslevel=9 if level is None else level)
+    elif codec == 'xz':
+        # default preset 6 - the compressor of preset 9 needs about 700 MB of memory
+        compressed = lzma.LZMAFile(output, mode='wb', preset=level)
+    else:
+        raise ValueError('Unknown compression codec {}'.format(codec))
+    # stream mode - tarfile does not seek in the output
+    archive = tarfile.open(fileobj=compressed, mode='w|')
+    archive.compressed = compressed
+    return archive
+
+def add_to_archive(archive, name, data):
+    if isinstance(archive, zipfile.ZipFile):
+        archive.writestr(name, data)
+    else:
+        info = tarfile.TarInfo(name)
+        info.size = len(data)
+        info.mtime = int(datetime.datetime.now().timestamp())
+        archive.addfile(info, io.BytesIO(data))
+
+def add_file_to_archive(archive, name, path):
+    if isinstance(archive, zipfile.ZipFile):
+        archive.write(path, name)
+    else:
+        archive.add(path, arcname=name)
+
+def close_archive(archive):
+    archive.close()
+    if isinstance(archive, tarfile.TarFile):
+        archive.compressed.close()
+
+'''
+    Objects flow from storage into the compressor, and compressed data is
+    uploaded while the archive is being created.
+    Neither input files nor the archive are written to local disk.
+'''
+def streaming_compression(input_bucket, output_bucket, key, codec, level):
+
+    archive_name = '{}.{}'.format(key, ARCHIVE_EXTENSIONS[codec])
+    pipe_queue = queue.Queue(maxsize=PIPE_MAX_CHUNKS)
+    writer = PipeWriter(pipe_queue, PIPE_CHUNK_SIZE)
+    reader = PipeReader(pipe_queue)
+
+    upload_result = {}
+    def upload():
+        try:
+            upload_result['key'] = client.upload_stream(output_bucket, archive_name, reader)
+        except Exception as e:
+            upload_result['error'] = e
+            writer.aborted.set()
+        upload_result['end'] = datetime.datetime.now()
+    uploader = threading.Thread(target=upload)
+    uploader.start()
+
+    download_begin = datetime.datetime.now()
+    download_end = download_begin
+    size = 0
+    process_time = 0
+    archive = open_archive(codec, level, writer)
+    try:
+        for name, data in client.download_directory_stream(input_bucket, key):
+            download_end = datetime.datetime.now()
+            size += len(data)
+            compress_begin = datetime.datetime.now()
+            add_to_archive(archive, name, data)
+            process_time += (datetime.datetime.now() - compress_begin) / datetime.timedelta(microseconds=1)
+        compress_begin = datetime.datetime.now()
+        close_archive(archive)
+        compress_end = datetime.datetime.now()
+        process_time += (compress_end - compress_begin) / datetime.timedelta(microseconds=1)
+        writer.close()
+    except Exception as e:
+        if not writer.aborted.is_set():
+            writer.fail(e)
+        raise
+    finally:
+        uploader.join()
+    if 'error' in upload_result:
+        raise upload_result['error']
+
+    return {
+        'key': upload_result['key'],
+        'download_time': (download_end - download_begin) / datetime.timedelta(microseconds=1),
+        'download_size': size,
+        # upload overlaps with compression - report the time spent after compression finished
+        'upload_time': (upload_result['end'] - compress_end) / datetime.timedelta(microseconds=1),
+        'upload_size': writer.bytes_written,
+        'compute_time': process_time
+    }
+
 def handler(event):
-  
+
     input_bucket = event.get('bucket').get('input')
     output_bucket = event.get('bucket').get('output')
     key = event.get('object').get('key')
+    compression = event.get('compression', {})
+    codec = compression.get('codec', 'zip')
+    level = compression.get('level')
+    if codec not in ARCHIVE_EXTENSIONS:
+        raise ValueError('Unknown compression codec {}, expected one of {}'.format(
+            codec, list(ARCHIVE_EXTENSIONS.keys())
+        ))
+
+    if compression.get('streaming', False):
+        ret = streaming_compression(input_bucket, output_bucket, key, codec, level)
+        return {
+                'result': {
+                    'bucket': output_bucket,
+                    'key': ret.pop('key')
+                },
+                'measurement': ret
+            }
+
     download_path = '/tmp/{}-{}'.format(key, uuid.uuid4())
     os.makedirs(download_path)
 
@@ -29,14 +252,26 @@ def handler(event):
     s3_download_stop = datetime.datetime.now()
     size = parse_directory(download_path)
 
+    # files are listed before the archive is created in the same directory
+    files = []
+    for root, dirs, names in os.walk(download_path):
+        for name in names:
+            path = os.path.join(root, name)
+            files.append((os.path.relpath(path, download_path), path))
+    archive_name = '{}.{}'.format(key, ARCHIVE_EXTENSIONS[codec])
+    archive_path = os.path.join(download_path, archive_name)
+
     compress_begin = datetime.datetime.now()
-    shutil.make_archive(os.path.join(download_path, key), 'zip', root_dir=download_path)
+    with open(archive_path, 'wb') as output:
+        archive = open_archive(codec, level, output)
+        for name, path in sorted(files):
+            add_file_to_archive(archive, name, path)
+        close_archive(archive)
     compress_end = datetime.datetime.now()
 
     s3_upload_begin = datetime.datetime.now()
-    archive_name = '{}.zip'.format(key)
-    archive_size = os.path.getsize(os.path.join(download_path, archive_name))
-    key_name = client.upload(output_bucket, archive_name, os.path.join(download_path, archive_name))
+    archive_size = os.path.getsize(archive_path)
+    key_name = client.upload(output_bucket, archive_name, archive_path)
     s3_upload_stop = datetime.datetime.now()
 
     download_time = (s3_download_stop - s3_download_begin) / datetime.timedelta(microseconds=1)
@@ -55,4 +290,3 @@ def handler(event):
                 'compute_time': process_time
             }
         }
-
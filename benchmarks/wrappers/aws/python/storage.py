@@ -1,3 +1,4 @@
+import concurrent.futures
 import io
 import os
 import uuid
@@ -8,6 +9,8 @@ import boto3
 class storage:
     instance = None
     client = None
+    # Number of parallel transfers used to download directories.
+    download_workers = int(os.environ.get('STORAGE_DOWNLOAD_WORKERS', 8))
 
     def __init__(self):
         self.client = boto3.client('s3')
@@ -29,14 +32,6 @@ class storage:
     def download(self, bucket, file, filepath):
         self.client.download_file(bucket, file, filepath)
 
-    def download_directory(self, bucket, prefix, path):
-        objects = self.client.list_objects_v2(Bucket=bucket, Prefix=prefix)
-        for obj in objects['Contents']:
-            file_name = obj['Key']
-            path_to_file = os.path.dirname(file_name)
-            os.makedirs(os.path.join(path, path_to_file), exist_ok=True)
-            self.download(bucket, file_name, os.path.join(path, file_name))
-
     def upload_stream(self, bucket, file, data):
         key_name = storage.unique_name(file)
         self.client.upload_fileobj(data, bucket, key_name)
@@ -46,7 +41,52 @@ class storage:
         data = io.BytesIO()
         self.client.download_fileobj(bucket, file, data)
         return data.getbuffer()
+
+    def remove(self, bucket, file):
+        self.client.delete_object(Bucket=bucket, Key=file)
     
+    def list_directory(self, bucket, prefix):
+        paginator = self.client.get_paginator('list_objects_v2')
+        for page in paginator.paginate(Bucket=bucket, Prefix=prefix):
+            for obj in page.get('Contents', []):
+                yield obj['Key']
+
+    # Apply transfer to each key in a bounded thread pool.
+    # Results are yielded in the order of completion, and the number of
+    # transfers in flight never exceeds twice the number of workers.
+    def _transfer_parallel(self, transfer, keys):
+        workers = storage.download_workers
+        with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as pool:
+            pending = set()
+            for key in keys:
+                pending.add(pool.submit(transfer, key))
+                if len(pending) >= 2 * workers:
+                    done, pending = concurrent.futures.wait(
+                        pending, return_when=concurrent.futures.FIRST_COMPLETED
+                    )
+                    for future in done:
+                        yield future.result()
+            for future in concurrent.futures.as_completed(pending):
+                yield future.result()
+
+    # Yields local paths as soon as each file is downloaded.
+    def download_directory_iter(self, bucket, prefix, path):
+        def transfer(file_name):
+            path_to_file = os.path.join(path, file_name)
+            os.makedirs(os.path.dirname(path_to_file), exist_ok=True)
+            self.download(bucket, file_name, path_to_file)
+            return path_to_file
+        return self._transfer_parallel(transfer, self.list_directory(bucket, prefix))
+
+    def download_directory(self, bucket, prefix, path):
+        return list(self.download_directory_iter(bucket, prefix, path))
+
+    # Yields pairs of object name and content as soon as each object arrives.
+    def download_directory_stream(self, bucket, prefix):
+        def transfer(file_name):
+            return file_name, self.download_stream(bucket, file_name)
+        return self._transfer_parallel(transfer, self.list_directory(bucket, prefix))
+
     def get_instance():
         if storage.instance is None:
             storage.instance = storage()
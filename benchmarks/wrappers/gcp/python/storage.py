@@ -1,3 +1,4 @@
+import concurrent.futures
 import io
 import os
 import uuid
@@ -8,6 +9,8 @@ from google.cloud import storage as gcp_storage
 class storage:
     instance = None
     client = None
+    # Number of parallel transfers used to download directories.
+    download_workers = int(os.environ.get('STORAGE_DOWNLOAD_WORKERS', 8))
 
     def __init__(self):
         self.client = gcp_storage.Client()
@@ -33,14 +36,6 @@ class storage:
         blob = bucket_instance.blob(file)
         blob.download_to_filename(filepath)
 
-    def download_directory(self, bucket, prefix, path):
-        objects = self.client.bucket(bucket).list_blobs(prefix=prefix)
-        for obj in objects:
-            file_name = obj.name
-            path_to_file = os.path.dirname(file_name)
-            os.makedirs(os.path.join(path, path_to_file), exist_ok=True)
-            self.download(bucket, file_name, os.path.join(path, file_name))
-
     def upload_stream(self, bucket, file, data):
         key_name = storage.unique_name(file)
         bucket_instance = self.client.bucket(bucket)
@@ -55,6 +50,50 @@ class storage:
         blob.download_to_file(data)
         return data.getbuffer()
 
+    def remove(self, bucket, file):
+        self.client.bucket(bucket).blob(file).delete()
+
+    def list_directory(self, bucket, prefix):
+        # iterator over blobs handles pagination
+        for obj in self.client.bucket(bucket).list_blobs(prefix=prefix):
+            yield obj.name
+
+    # Apply transfer to each key in a bounded thread pool.
+    # Results are yielded in the order of completion, and the number of
+    # transfers in flight never exceeds twice the number of workers.
+    def _transfer_parallel(self, transfer, keys):
+        workers = storage.download_workers
+        with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as pool:
+            pending = set()
+            for key in keys:
+                pending.add(pool.submit(transfer, key))
+                if len(pending) >= 2 * workers:
+                    done, pending = concurrent.futures.wait(
+                        pending, return_when=concurrent.futures.FIRST_COMPLETED
+                    )
+                    for future in done:
+                        yield future.result()
+            for future in concurrent.futures.as_completed(pending):
+                yield future.result()
+
+    # Yields local paths as soon as each file is downloaded.
+    def download_directory_iter(self, bucket, prefix, path):
+        def transfer(file_name):
+            path_to_file = os.path.join(path, file_name)
+            os.makedirs(os.path.dirname(path_to_file), exist_ok=True)
+            self.download(bucket, file_name, path_to_file)
+            return path_to_file
+        return self._transfer_parallel(transfer, self.list_directory(bucket, prefix))
+
+    def download_directory(self, bucket, prefix, path):
+        return list(self.download_directory_iter(bucket, prefix, path))
+
+    # Yields pairs of object name and content as soon as each object arrives.
+    def download_directory_stream(self, bucket, prefix):
+        def transfer(file_name):
+            return file_name, self.download_stream(bucket, file_name)
+        return self._transfer_parallel(transfer, self.list_directory(bucket, prefix))
+
     def get_instance():
         if storage.instance is None:
             storage.instance = storage()
@@ -1,5 +1,8 @@
+import concurrent.futures
 import io
+import mmap
 import os
+import shutil
 import uuid
 
 import minio
@@ -7,6 +10,9 @@ import minio
 class storage:
     instance = None
     client = None
+    # Number of parallel transfers used to download directories.
+    download_workers = int(os.environ.get('STORAGE_DOWNLOAD_WORKERS', 8))
+    multipart_part_size = 5 * 1024 * 1024
 
     def __init__(self):
         if 'MINIO_ADDRESS' in os.environ:
@@ -19,14 +25,18 @@ class storage:
                     secret_key=secret_key,
                     secure=False)
 
+    # The random part is inserted before all extensions of the file,
+    # e.g., archive.tar.gz becomes archive.<random>.tar.gz.
     @staticmethod
     def unique_name(name):
-        name, extension = name.split('.')
-        return '{name}.{random}.{extension}'.format(
+        directory, file_name = os.path.split(name)
+        name, dot, extension = file_name.partition('.')
+        return os.path.join(directory, '{name}.{random}{dot}{extension}'.format(
                     name=name,
+                    dot=dot,
                     extension=extension,
                     random=str(uuid.uuid4()).split('-')[0]
-                )
+                ))
 
     def upload(self, bucket, file, filepath):
         key_name = storage.unique_name(file)
@@ -36,23 +46,119 @@ class storage:
     def download(self, bucket, file, filepath):
         self.client.fget_object(bucket, file, filepath)
 
-    def download_directory(self, bucket, prefix, path):
-        objects = self.client.list_objects_v2(bucket, prefix, recursive=True)
-        for obj in objects:
-            file_name = obj.object_name
-            self.download(bucket, file_name, os.path.join(path, file_name))
-
     def upload_stream(self, bucket, file, bytes_data):
         key_name = storage.unique_name(file)
-        self.client.put_object(bucket, key_name, bytes_data, bytes_data.getbuffer().nbytes)
+        if hasattr(bytes_data, 'getbuffer'):
+            self.client.put_object(bucket, key_name, bytes_data, bytes_data.getbuffer().nbytes)
+        else:
+            # stream of unknown length - multipart upload
+            self.client.put_object(bucket, key_name, bytes_data, -1, part_size=storage.multipart_part_size)
         return key_name
 
     def download_stream(self, bucket, file):
         data = self.client.get_object(bucket, file)
         return data.read()
 
+    def remove(self, bucket, file):
+        self.client.remove_object(bucket, file)
+
+    def list_directory(self, bucket, prefix):
+        # iterator over objects handles pagination
+        for obj in self.client.list_objects_v2(bucket, prefix, recursive=True):
+            yield obj.object_name
+
+    # Apply transfer to each key in a bounded thread pool.
+    # Results are yielded in the order of completion, and the number of
+    # transfers in flight never exceeds twice the number of workers.
+    def _transfer_parallel(self, transfer, keys):
+        workers = storage.download_workers
+        with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as pool:
+            pending = set()
+            for key in keys:
+                pending.add(pool.submit(transfer, key))
+                if len(pending) >= 2 * workers:
+                    done, pending = concurrent.futures.wait(
+                        pending, return_when=concurrent.futures.FIRST_COMPLETED
+                    )
+                    for future in done:
+                        yield future.result()
+            for future in concurrent.futures.as_completed(pending):
+                yield future.result()
+
+    # Yields local paths as soon as each file is downloaded.
+    def download_directory_iter(self, bucket, prefix, path):
+        def transfer(file_name):
+            path_to_file = os.path.join(path, file_name)
+            os.makedirs(os.path.dirname(path_to_file), exist_ok=True)
+            self.download(bucket, file_name, path_to_file)
+            return path_to_file
+        return self._transfer_parallel(transfer, self.list_directory(bucket, prefix))
+
+    def download_directory(self, bucket, prefix, path):
+        return list(self.download_directory_iter(bucket, prefix, path))
+
+    # Yields pairs of object name and content as soon as each object arrives.
+    def download_directory_stream(self, bucket, prefix):
+        def transfer(file_name):
+            return file_name, self.download_stream(bucket, file_name)
+        return self._transfer_parallel(transfer, self.list_directory(bucket, prefix))
+
     def get_instance():
         if storage.instance is None:
-            storage.instance = storage()
+            if 'STORAGE_FILESYSTEM_PATH' in os.environ:
+                storage.instance = filesystem_storage()
+            else:
+                storage.instance = storage()
         return storage.instance
 
+# Storage in a host directory mounted into the container.
+# Buckets are subdirectories and objects are regular files, so transfers are
+# file copies done in the kernel and downloaded streams are memory mappings.
+class filesystem_storage(storage):
+
+    def __init__(self):
+        self.root = os.environ['STORAGE_FILESYSTEM_PATH']
+
+    def _path(self, bucket, file):
+        return os.path.join(self.root, bucket, file)
+
+    def _output_path(self, bucket, file):
+        path = self._path(bucket, file)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        return path
+
+    def upload(self, bucket, file, filepath):
+        key_name = storage.unique_name(file)
+        shutil.copyfile(filepath, self._output_path(bucket, key_name))
+        return key_name
+
+    def download(self, bucket, file, filepath):
+        shutil.copyfile(self._path(bucket, file), filepath)
+
+    def upload_stream(self, bucket, file, bytes_data):
+        key_name = storage.unique_name(file)
+        with open(self._output_path(bucket, key_name), 'wb') as f:
+            if hasattr(bytes_data, 'getbuffer'):
+                f.write(bytes_data.getbuffer())
+            else:
+                shutil.copyfileobj(bytes_data, f, storage.multipart_part_size)
+        return key_name
+
+    # Returns a read-only memory mapping of the object; pages are loaded lazily.
+    def download_stream(self, bucket, file):
+        with open(self._path(bucket, file), 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return b''
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def remove(self, bucket, file):
+        os.remove(self._path(bucket, file))
+
+    def list_directory(self, bucket, prefix):
+        bucket_path = os.path.join(self.root, bucket)
+        for root, dirs, files in os.walk(bucket_path):
+            for f in files:
+                name = os.path.relpath(os.path.join(root, f), bucket_path)
+                if name.startswith(prefix):
+                    yield name
+
@@ -4,29 +4,181 @@ import sys
 import uuid
 
 import bottle
-from bottle import route, run, template, request
+from bottle import route, run, request
 
 CODE_LOCATION='code'
+# 'threads' serves requests with a pool of threads (waitress),
+# 'processes' with pre-forked worker processes (gunicorn).
+SERVER_TYPE = os.environ.get('SERVER_TYPE', 'threads')
+SERVER_WORKERS = int(os.environ.get('SERVER_WORKERS', 1))
+# The first invocation of a container is cold, as in cloud wrappers.
+# The marker is shared by threads and worker processes, and removed
+# when the server starts, e.g., after the container is restarted.
+COLD_RUN_MARKER = os.path.join('/tmp', 'cold_run')
+# Memory size of the function in MB, set by the deployment.
+FUNCTION_MEMORY = os.environ.get('FUNCTION_MEMORY')
+CGROUP = '/sys/fs/cgroup'
+
+# The marker is written to a temporary file and linked atomically,
+# so concurrent requests never read an incomplete container id.
+def cold_start():
+    if not os.path.exists(COLD_RUN_MARKER):
+        container_id = str(uuid.uuid4())[0:8]
+        tmp_file = '{}.{}'.format(COLD_RUN_MARKER, container_id)
+        with open(tmp_file, 'w') as f:
+            f.write(container_id)
+        try:
+            os.link(tmp_file, COLD_RUN_MARKER)
+            return True, container_id
+        except FileExistsError:
+            pass
+        finally:
+            os.remove(tmp_file)
+    with open(COLD_RUN_MARKER, 'r') as f:
+        return False, f.read()
+
+# Counters of the container cgroup (v2, or v1 as fallback) and of its
+# network namespace. Values are None when not available.
+def read_file(*paths):
+    for path in paths:
+        try:
+            with open(os.path.join(CGROUP, path), 'r') as f:
+                return f.read()
+        except OSError:
+            pass
+    return None
+
+def cpu_time():
+    data = read_file('cpu.stat')
+    if data is not None:
+        for line in data.splitlines():
+            key, value = line.split()
+            if key == 'usage_usec':
+                return int(value)
+    data = read_file('cpuacct/cpuacct.usage')
+    return int(data) // 1000 if data else None
+
+def block_io():
+    data = read_file('io.stat')
+    if data is not None:
+        read, write = 0, 0
+        for line in data.splitlines():
+            for field in line.split()[1:]:
+                key, value = field.split('=')
+                if key == 'rbytes':
+                    read += int(value)
+                elif key == 'wbytes':
+                    write += int(value)
+        return read, write
+    data = read_file('blkio/blkio.throttle.io_service_bytes')
+    if data is not None:
+        totals = {'Read': 0, 'Write': 0}
+        for line in data.splitlines():
+            fields = line.split()
+            if len(fields) == 3 and fields[1] in totals:
+                totals[fields[1]] += int(fields[2])
+        return totals['Read'], totals['Write']
+    return None, None
+
+def network_io():
+    try:
+        with open('/proc/net/dev', 'r') as f:
+            lines = f.readlines()[2:]
+    except OSError:
+        return None, None
+    rx, tx = 0, 0
+    for line in lines:
+        name, values = line.split(':', 1)
+        if name.strip() != 'lo':
+            values = values.split()
+            rx += int(values[0])
+            tx += int(values[8])
+    return rx, tx
+
+def resource_usage():
+    memory = read_file('memory.current', 'memory/memory.usage_in_bytes')
+    peak = read_file('memory.peak', 'memory/memory.max_usage_in_bytes')
+    blkio_read, blkio_write = block_io()
+    net_rx, net_tx = network_io()
+    return {
+        'cpu_time': cpu_time(),
+        'memory': int(memory) if memory else None,
+        'memory_peak': int(peak) if peak else None,
+        'blkio_read': blkio_read,
+        'blkio_write': blkio_write,
+        'net_rx': net_rx,
+        'net_tx': net_tx
+    }
+
+# Counters are sampled around the handler, and include other invocations
+# served concurrently by the container. Memory values are not differences:
+# the peak is the maximum since the container start, as in reports of AWS Lambda.
+def resource_difference(before, after):
+    ret = {}
+    for key, value in after.items():
+        if key in ('memory', 'memory_peak') or value is None or before[key] is None:
+            ret[key] = value
+        else:
+            ret[key] = value - before[key]
+    return ret
 
 @route('/', method='POST')
-def flush_log():
+def process_request():
+    received = datetime.datetime.now()
+    event = request.json
+    is_cold, container_id = cold_start()
+    usage_before = resource_usage()
     begin = datetime.datetime.now()
     from function import function
+    imported = datetime.datetime.now()
+    ret = function.handler(event)
     end = datetime.datetime.now()
-    # FIXME: measurements?
-    ret = function.handler(request.json)
+    resources = resource_difference(usage_before, resource_usage())
 
+    # Time spent by the server outside of the handler: parsing the request
+    # and preparing the response. Queueing before a worker accepts
+    # the request is not included.
+    overhead = (begin - received) + (datetime.datetime.now() - end)
     return {
         'begin': begin.strftime('%s.%f'),
         'end': end.strftime('%s.%f'),
         "request_id": str(uuid.uuid4()),
-        "is_cold": False,
+        "is_cold": is_cold,
+        "container_id": container_id,
         "result": {
             "output": ret
+        },
+        "resources": {
+            "memory_size": int(FUNCTION_MEMORY) if FUNCTION_MEMORY else None,
+            # import of the function code, negligible after the first invocation of a worker
+            "initialization": (imported - begin) / datetime.timedelta(microseconds=1),
+            "execution": (end - begin) / datetime.timedelta(microseconds=1),
+            **resources
+        },
+        "server": {
+            "type": SERVER_TYPE,
+            "workers": SERVER_WORKERS,
+            "overhead": overhead / datetime.timedelta(microseconds=1)
         }
     }
 
+# Import the function code without invoking it, e.g., before the container
+# is frozen. The next invocation is still the cold start of the container.
+# With worker processes, only the worker serving this request imports the code.
+@route('/load', method='POST')
+def load():
+    begin = datetime.datetime.now()
+    from function import function
+    end = datetime.datetime.now()
+    return {
+        'initialization': (end - begin) / datetime.timedelta(microseconds=1)
+    }
+
 sys.path.append(os.path.join(CODE_LOCATION))
 sys.path.append(os.path.join(CODE_LOCATION, '.python_packages/lib/site-packages/'))
-run(host='0.0.0.0', port=int(sys.argv[1]), debug=True)
-
+if os.path.exists(COLD_RUN_MARKER):
+    os.remove(COLD_RUN_MARKER)
+if SERVER_TYPE == 'processes':
+    run(server='gunicorn', host='0.0.0.0', port=int(sys.argv[1]), workers=SERVER_WORKERS)
+else:
+    run(server='waitress', host='0.0.0.0', port=int(sys.argv[1]), threads=SERVER_WORKERS)
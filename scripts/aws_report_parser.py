@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+
+import argparse
+import os
+import random
+import sys
+import time
+import uuid
+
+PROJECT_DIR = os.path.join(os.path.dirname(os.path.realpath(__file__)), os.pardir)
+sys.path.append(PROJECT_DIR)
+
+from sebs.aws.aws import AWS  # noqa
+from sebs.faas.function import ExecutionResult  # noqa
+
+'''
+    Compares the throughput of the batch parser of AWS REPORT lines
+    with the previous parser that splits each line on tabs and colons.
+'''
+
+parser = argparse.ArgumentParser(description='Benchmark parsers of AWS REPORT lines.')
+parser.add_argument('--lines', action='store', default=1000000, type=int,
+                    help='Number of synthetic REPORT lines.')
+parser.add_argument('--cold-ratio', action='store', default=0.1, type=float,
+                    help='Fraction of lines with Init Duration.')
+parser.add_argument('--xray-ratio', action='store', default=0.1, type=float,
+                    help='Fraction of lines followed by XRay fields.')
+parser.add_argument('--seed', action='store', default=0, type=int)
+args = parser.parse_args()
+
+
+def legacy_parse_aws_report(log, requests):
+    aws_vals = {}
+    for line in log.split("\t"):
+        if not line.isspace():
+            split = line.split(":")
+            aws_vals[split[0]] = split[1].split()[0]
+    if "START RequestId" in aws_vals:
+        request_id = aws_vals["START RequestId"]
+    else:
+        request_id = aws_vals["REPORT RequestId"]
+    if request_id not in requests:
+        return request_id
+    output = requests[request_id]
+    output.request_id = request_id
+    output.provider_times.execution = int(float(aws_vals["Duration"]) * 1000)
+    output.stats.memory_used = float(aws_vals["Max Memory Used"])
+    if "Init Duration" in aws_vals:
+        output.provider_times.initialization = int(float(aws_vals["Init Duration"]) * 1000)
+    output.billing.billed_time = int(aws_vals["Billed Duration"])
+    output.billing.memory = int(aws_vals["Memory Size"])
+    output.billing.gb_seconds = output.billing.billed_time * output.billing.memory
+    return request_id
+
+
+def generate(count, cold_ratio, xray_ratio):
+    lines = []
+    for i in range(count):
+        duration = random.uniform(1, 5000)
+        line = (
+            f"REPORT RequestId: {uuid.UUID(int=random.getrandbits(128))}\t"
+            f"Duration: {duration:.2f} ms\tBilled Duration: {int(duration) + 1} ms\t"
+            f"Memory Size: 1024 MB\tMax Memory Used: {random.randint(40, 1024)} MB\t"
+        )
+        if random.random() < cold_ratio:
+            line += f"Init Duration: {random.uniform(100, 2000):.2f} ms\t"
+        if random.random() < xray_ratio:
+            line += "\nXRAY TraceId: 1-5e4b3c2a-0123456789abcdef01234567\t" \
+                    "SegmentId: 0123456789abcdef\tSampled: true\t"
+        lines.append(line + "\n")
+    return lines
+
+
+def results(lines):
+    requests = {}
+    for line in lines:
+        request_id = line[len("REPORT RequestId: "):].split("\t", 1)[0]
+        requests[request_id] = ExecutionResult()
+    return requests
+
+
+def summary(res):
+    return (res.request_id, res.provider_times.execution, res.provider_times.initialization,
+            res.stats.memory_used, res.billing.billed_time, res.billing.memory,
+            res.billing.gb_seconds)
+
+
+random.seed(args.seed)
+print(f"Generating {args.lines} REPORT lines")
+lines = generate(args.lines, args.cold_ratio, args.xray_ratio)
+
+legacy_requests = results(lines)
+begin = time.perf_counter()
+for line in lines:
+    legacy_parse_aws_report(line, legacy_requests)
+legacy_time = time.perf_counter() - begin
+
+batch_requests = results(lines)
+begin = time.perf_counter()
+parsed = AWS.parse_aws_reports(lines, batch_requests)
+batch_time = time.perf_counter() - begin
+
+assert len(parsed) == len(lines)
+for request_id, res in legacy_requests.items():
+    assert summary(res) == summary(batch_requests[request_id]), request_id
+
+print(f"Legacy parser: {legacy_time:.3f} s, {len(lines) / legacy_time:,.0f} lines/s")
+print(f"Batch parser: {batch_time:.3f} s, {len(lines) / batch_time:,.0f} lines/s")
+print(f"Speedup: {legacy_time / batch_time:.2f}x")
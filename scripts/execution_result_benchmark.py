@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+
+import argparse
+import functools
+import gc
+import json
+import os
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+PROJECT_DIR = os.path.join(os.path.dirname(os.path.realpath(__file__)), os.pardir)
+sys.path.append(PROJECT_DIR)
+
+from sebs.faas.function import ExecutionResult  # noqa
+from sebs.utils import JSONSerializer  # noqa
+
+'''
+    Compares memory use and throughput of building, serializing and
+    deserializing slotted invocation results with the previous classes
+    storing attributes in instance dictionaries.
+'''
+
+parser = argparse.ArgumentParser(description='Benchmark representation of invocation results.')
+parser.add_argument('--results', action='store', default=1000000, type=int,
+                    help='Number of invocation results.')
+args = parser.parse_args()
+
+
+class LegacyTimes:
+    def __init__(self):
+        self.client = 0
+        self.initialization = 0
+        self.benchmark = 0
+
+
+class LegacyProviderTimes:
+    def __init__(self):
+        self.execution = 0
+        self.initialization = 0
+
+
+class LegacyStats:
+    def __init__(self):
+        self.memory_used = None
+        self.cold_start = False
+        self.failure = False
+
+
+class LegacyBilling:
+    def __init__(self):
+        self._memory = None
+        self._billed_time = None
+        self._gb_seconds = 0
+
+
+class LegacyResult:
+    def __init__(self):
+        self.output = {}
+        self.request_id = ""
+        self.times = LegacyTimes()
+        self.provider_times = LegacyProviderTimes()
+        self.stats = LegacyStats()
+        self.billing = LegacyBilling()
+
+    @staticmethod
+    def deserialize(cached_config):
+        ret = LegacyResult()
+        ret.times = LegacyTimes()
+        ret.times.__dict__.update(cached_config["times"])
+        ret.billing = LegacyBilling()
+        ret.billing.__dict__.update(cached_config["billing"])
+        ret.provider_times = LegacyProviderTimes()
+        ret.provider_times.__dict__.update(cached_config["provider_times"])
+        ret.stats = LegacyStats()
+        ret.stats.__dict__.update(cached_config["stats"])
+        ret.request_id = cached_config["request_id"]
+        ret.output = cached_config["output"]
+        return ret
+
+
+def build(cls, count):
+    begin = datetime.now()
+    end = begin + timedelta(milliseconds=25)
+    results = []
+    for i in range(count):
+        res = cls()
+        res.request_id = f"{i:036d}"
+        res.times.client_begin = begin
+        res.times.client_end = end
+        res.times.client = 25000
+        res.times.benchmark = 20000
+        res.times.http_startup = 0.002
+        res.times.http_first_byte_return = 0.024
+        res.provider_times.execution = 21000
+        res.stats.cold_start = i % 10 == 0
+        res.stats.memory_used = 64.0
+        results.append(res)
+    return results
+
+
+def measure(name, func):
+    gc.collect()
+    begin = time.perf_counter()
+    ret = func()
+    duration = time.perf_counter() - begin
+    print(f"{name}: {duration:.3f} s, {args.results / duration:,.0f} results/s")
+    return ret
+
+
+# Memory allocated by results, measured separately since tracing slows down allocations.
+def memory(name, func):
+    gc.collect()
+    tracemalloc.start()
+    ret = func()
+    print(f"{name}: {tracemalloc.get_traced_memory()[0] / 2**20:.1f} MiB")
+    tracemalloc.stop()
+    return ret
+
+
+def serialize(results):
+    return [json.loads(json.dumps(res, cls=JSONSerializer)) for res in results]
+
+
+def run(label, cls):
+    results = measure(f"{label} build", lambda: build(cls, args.results))
+    serialized = measure(f"{label} serialize", functools.partial(serialize, results))
+    del results
+    results = measure(f"{label} deserialize", lambda: [cls.deserialize(r) for r in serialized])
+    if cls is ExecutionResult:
+        assert serialize(results[0:1000]) == serialized[0:1000]
+    del results
+    memory(f"{label} memory of deserialized results",
+           lambda: [cls.deserialize(r) for r in serialized])
+
+
+run("Legacy", LegacyResult)
+run("Slotted", ExecutionResult)
@@ -1,115 +1,213 @@
 #!/usr/bin/env python3
 
-import time, argparse, datetime, csv, json, subprocess, tempfile, os, operator, multiprocessing, threading
+import time, argparse, array, csv, json, math, re, subprocess, os, multiprocessing, threading
 
 # Bottle server
 import waitress, bottle
 from bottle import route, run, request
 
+# Growing table of samples stored in a preallocated array of doubles.
+# Missing values are stored as NaN and written as empty CSV fields.
+class Samples:
+
+    def __init__(self, columns, capacity=65536):
+        self._columns = columns
+        self._capacity = capacity
+        self._data = array.array('d', bytes(8 * capacity * columns))
+        self._size = 0
+
+    def append(self, values):
+        if self._size == self._capacity:
+            self._data.extend(array.array('d', bytes(8 * self._capacity * self._columns)))
+            self._capacity *= 2
+        begin = self._size * self._columns
+        self._data[begin:begin + self._columns] = array.array('d', values)
+        self._size += 1
+
+    def __len__(self):
+        return self._size
+
+    def rows(self):
+        for i in range(self._size):
+            row = self._data[i * self._columns:(i + 1) * self._columns]
+            yield ['{:.6f}'.format(row[0])] + [
+                '' if math.isnan(val) else int(val) for val in row[1:]
+            ]
+
+# Procfs or sysfs file opened once and read again from the beginning
+# on each sample, without spawning processes or reopening the file.
+class StatFile:
+
+    BUFFER_SIZE = 65536
+
+    def __init__(self, path):
+        self.path = path
+        self._fd = os.open(path, os.O_RDONLY)
+
+    @staticmethod
+    def open(path):
+        try:
+            return StatFile(path)
+        except OSError:
+            return None
+
+    def read(self):
+        os.lseek(self._fd, 0, os.SEEK_SET)
+        chunks = []
+        while True:
+            chunk = os.read(self._fd, self.BUFFER_SIZE)
+            if not chunk:
+                break
+            chunks.append(chunk)
+        return b''.join(chunks)
+
+    def close(self):
+        os.close(self._fd)
+
+# Directories of cgroup v2 and v1 controllers of the process.
+# Return None when the cgroup is not visible, e.g., in another namespace.
+def cgroup_dirs(pid, controller):
+    unified, legacy = None, None
+    with open('/proc/{}/cgroup'.format(pid), 'r') as f:
+        for line in f:
+            _, controllers, path = line.rstrip('\n').split(':', 2)
+            if controllers == '':
+                unified = os.path.join('/sys/fs/cgroup', path.lstrip('/'))
+            elif controller in controllers.split(','):
+                legacy = os.path.join('/sys/fs/cgroup', controllers, path.lstrip('/'))
+    return unified, legacy
+
+def open_cgroup_file(pid, controller, unified_file, legacy_file):
+    unified, legacy = cgroup_dirs(pid, controller)
+    if legacy is not None:
+        f = StatFile.open(os.path.join(legacy, legacy_file))
+        if f is not None:
+            return f, False
+    if unified is not None:
+        f = StatFile.open(os.path.join(unified, unified_file))
+        if f is not None:
+            return f, True
+    return None, None
+
 class Measurements:
 
-    def __init__(self, pids, output_dir):
+    def __init__(self, pids):
         self._pids = pids
         self._pids_num = len(pids)
-        self._output_dir = output_dir
-        self._counter = 0
-        self._data = []
+        self._files = []
+        self._data = Samples(len(self.header()))
+
+    def _open(self, path):
+        f = StatFile(path)
+        self._files.append(f)
+        return f
 
     @property
     def data(self):
-        return self._data
+        return self._data.rows()
 
+    def close(self):
+        for f in self._files:
+            f.close()
+        self._files = []
 
 class MemoryMeasurements(Measurements):
 
-    def __init__(self, pids, output_dir):
-        super().__init__(pids, output_dir)
-        smaps_files = ' '.join([
-                ' /proc/{pid}/smaps '.format(pid=pid)
-                for pid in self._pids
-        ])
-        self._copy_cmd = 'cat {smaps} > {output_dir}/smaps_{{id}}'.format(
-                smaps=smaps_files,
-                output_dir=output_dir
-        )
-        self._cached_cmd = 'cat /proc/meminfo | grep ^Cached: | awk \'{{print $2}}\''
+    SMAPS_FIELDS = re.compile(rb'^(Rss|Pss|Private\w*):\s+(\d+) kB', re.MULTILINE)
+    CACHED = re.compile(rb'^Cached:\s+(\d+) kB', re.MULTILINE)
+
+    def __init__(self, pids):
+        super().__init__(pids)
+        # Kernels older than 4.14 do not provide the summary of all mappings.
+        self._smaps = []
+        for pid in self._pids:
+            if os.path.exists('/proc/{}/smaps_rollup'.format(pid)):
+                self._smaps.append(self._open('/proc/{}/smaps_rollup'.format(pid)))
+            else:
+                self._smaps.append(self._open('/proc/{}/smaps'.format(pid)))
+        self._meminfo = self._open('/proc/meminfo')
+        # Processes of different containers belong to different cgroups.
+        self._cgroups = {}
+        for pid in self._pids:
+            f, _ = open_cgroup_file(pid, 'memory', 'memory.current', 'memory.usage_in_bytes')
+            if f is not None:
+                self._files.append(f)
+                self._cgroups[f.path] = f
+        self._cgroups = list(self._cgroups.values())
 
     def measure(self):
-        timestamp = datetime.datetime.now()
-        ret = subprocess.run(
-            '{copy} && {cached}'.format(
-                    copy=self._copy_cmd.format(id=self._counter),
-                    cached=self._cached_cmd
-            ),
-            stdout = subprocess.PIPE, stderr=subprocess.PIPE, shell=True
-        )
-        self._counter += 1
-        if ret.returncode != 0:
-            print('Memory query failed!')
-            print(ret.stderr.decode('utf-8'))
-            raise RuntimeError()
+        timestamp = time.time()
+        uss, pss, rss = 0, 0, 0
+        for f in self._smaps:
+            content = f.read()
+            if not content:
+                raise RuntimeError('Memory query failed, process does not exist!')
+            # USS is the sum of private mappings, as in all Private_* fields
+            for name, val in self.SMAPS_FIELDS.findall(content):
+                if name == b'Rss':
+                    rss += int(val)
+                elif name == b'Pss':
+                    pss += int(val)
+                else:
+                    uss += int(val)
+        cached = int(self.CACHED.search(self._meminfo.read()).group(1))
+        if self._cgroups:
+            cgroup_memory = sum(int(f.read()) for f in self._cgroups) / 1024
         else:
-            self._data.append([
-                    timestamp.strftime('%s.%f'), 
-                    self._pids_num,
-                    int(ret.stdout.decode('utf-8').split('\n')[0])
-                ])
-
-    def postprocess(self):
-        self._samples_counter = len(self._data)
-        # Run awk over a file and sum RSS, PSS and Private mappings
-        cmd = "awk \'/Rss:/{{ sum3 += $2 }} /Pss:/{{ sum += $2 }} "\
-              "/Private/{{ sum2 += $2 }} END {{ print sum2, sum, sum3 }}\' "\
-              "{dir}/smaps_{counter}"
-        for i in range(0, self._samples_counter):
-            ret = subprocess.run(
-                    [cmd.format(dir=self._output_dir, counter=i)],
-                    stdout = subprocess.PIPE, shell = True
-                )
-            # remove newline, seperate fields and convert into integers
-            self._data[i].extend(
-                    map(
-                        int,
-                        ret.stdout.decode('utf-8').strip().split()
-                    )
-            )
+            cgroup_memory = math.nan
+        self._data.append((timestamp, self._pids_num, cached, uss, pss, rss, cgroup_memory))
 
+    # Values in kB.
     @staticmethod
     def header():
-        return ['Timestamp', 'N', 'Cached', 'USS', 'PSS', 'RSS']
+        return ['Timestamp', 'N', 'Cached', 'USS', 'PSS', 'RSS', 'CgroupMemory']
 
 class DiskIOMeasurements(Measurements):
 
-    def __init__(self, pids, output_dir):
+    IO_FIELDS = [
+        b'rchar', b'wchar', b'syscr', b'syscw',
+        b'read_bytes', b'write_bytes', b'cancelled_write_bytes'
+    ]
+    UNIFIED_IO = re.compile(rb'\b(rbytes|wbytes)=(\d+)')
+    LEGACY_IO = re.compile(rb'^\S+ (Read|Write) (\d+)$', re.MULTILINE)
+
+    def __init__(self, pids):
         if len(pids) > 1:
             raise NotImplementedError('DiskIOMeasurements does not support more than 1 PID!')
-        super().__init__(pids, output_dir)
-        self._cat_cmd = 'cat /proc/{pid}/io | awk \'{{print $2}}\''.format(pid=pids[0])
+        super().__init__(pids)
+        self._io = self._open('/proc/{}/io'.format(pids[0]))
+        self._cgroup, self._unified = open_cgroup_file(
+            pids[0], 'blkio', 'io.stat', 'blkio.throttle.io_service_bytes'
+        )
+        if self._cgroup is not None:
+            self._files.append(self._cgroup)
 
     def measure(self):
-        timestamp = datetime.datetime.now()
-        ret = subprocess.run(
-                self._cat_cmd,
-                stdout = subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                shell = True
-            )
-        if ret.returncode != 0:
-            print('IO query failed!')
-            print(ret.stderr.decode('utf-8'))
-            raise RuntimeError()
+        timestamp = time.time()
+        content = self._io.read()
+        if not content:
+            raise RuntimeError('IO query failed, process does not exist!')
+        values = dict(line.split(b': ') for line in content.splitlines())
+        row = [timestamp, 1] + [int(values[field]) for field in self.IO_FIELDS]
+        if self._cgroup is not None:
+            read_bytes, write_bytes = 0, 0
+            pattern = self.UNIFIED_IO if self._unified else self.LEGACY_IO
+            for name, val in pattern.findall(self._cgroup.read()):
+                if name in (b'rbytes', b'Read'):
+                    read_bytes += int(val)
+                else:
+                    write_bytes += int(val)
+            row.extend([read_bytes, write_bytes])
         else:
-            self._data.append(
-                    [timestamp.strftime('%s.%f'), 1] +
-                    list(map(int, ret.stdout.decode('utf-8').split('\n')[:-1]))
-            )
-
-    def postprocess(self):
-        pass
+            row.extend([math.nan, math.nan])
+        self._data.append(row)
 
     @staticmethod
     def header():
-        return ['Timestamp', 'WriteChars', 'ReadChars', 'ReadSysCalls', 'WriteSysCalls', 'ReadBytes', 'WriteBytes']
+        return [
+            'Timestamp', 'N', 'ReadChars', 'WriteChars', 'ReadSysCalls', 'WriteSysCalls',
+            'ReadBytes', 'WriteBytes', 'CancelledWriteBytes', 'CgroupReadBytes', 'CgroupWriteBytes'
+        ]
 
 # We use multiprocessing since we need a background worker that is active 100% time
 # Multithreading does not work since server function never returns to handle new requests
@@ -122,43 +220,43 @@ class continuous_measurement:
     handler = None
     data = None
 
-    def __init__(self, measurer_type, number_of_apps=1):
+    def __init__(self, measurer_type, number_of_apps=1, interval=0):
         self._measurer_type = measurer_type
         self._apps_number = number_of_apps
+        self._interval = interval
         self._pids = []
         self._processed_apps = 0
         self._finished_apps = 0
         #self.measure_func = functions['measure']
         #self.postprocess_func = functions['postprocess']
 
+    # Samples are taken every `interval` seconds, or continuously when it is zero.
+    # Sleeping until the next deadline keeps the average rate for intervals
+    # shorter than the scheduler granularity.
     def measure(self, pids, measurer_type):
-        measurement_directory = tempfile.TemporaryDirectory()
-        measurer_obj = measurer_type(pids, measurement_directory.name)
+        measurer_obj = None
         try:
-            samples_counter = 0
+            measurer_obj = measurer_type(pids)
+            interval = self._interval
+            next_sample = time.perf_counter()
             while self.analyze.is_set():
-                i = 0
-                while i < 5:
-                    #ret = self.measure_func(PID, samples_counter, self.measurement_directory)
-                    measurer_obj.measure()
-
-                    #if ret is None:
-                    #    print('Measurements terminated!')
-                    #    return
-                    #self.data_queue.put(ret)
-                    i += 1
-                    #samples_counter += 1
-            # in case we didn't get a measurement yet because the app finished too quickly
-            #self.measure_func(PID, samples_counter, self.measurement_directory)
+                measurer_obj.measure()
+                if interval > 0:
+                    next_sample += interval
+                    delay = next_sample - time.perf_counter()
+                    if delay > 0:
+                        time.sleep(delay)
+                    else:
+                        next_sample = time.perf_counter()
         except Exception as err:
             print('Failed!')
             print(err)
         finally:
-            measurer_obj.postprocess()
-            for val in measurer_obj.data:
-                self.data_queue.put(val)
+            if measurer_obj is not None:
+                measurer_obj.close()
+                for val in measurer_obj.data:
+                    self.data_queue.put(val)
             self.data_queue.put('END')
-            measurement_directory.cleanup()
 
     def start(self, req):
         uuid = req['uuid']
@@ -283,6 +381,8 @@ parser.add_argument('port', type=int, help='Port run')
 parser.add_argument('output', type=str, help='Output file.')
 parser.add_argument('metric', type=str, choices=['memory', 'disk-io'], help='Metric.')
 parser.add_argument('apps', type=int, help='Number of apps that is expected')
+parser.add_argument('--interval', type=float, default=0,
+                    help='Sampling interval in milliseconds, 0 samples continuously.')
 args = parser.parse_args()
 port = int(args.port)
 out_file = args.output
@@ -293,7 +393,7 @@ number_of_apps = int(args.apps)
 #else:
 #    measurers_functions = measurers[args.metric]['summary']
 #    measurer = summary_measurement(measurers_functions, number_of_apps)
-measurer = continuous_measurement(metrics[args.metric], number_of_apps)
+measurer = continuous_measurement(metrics[args.metric], number_of_apps, args.interval / 1000.0)
 app = bottle.default_app()
 print('Start at 0.0.0.0:{}'.format(port))
 # listen on all ports
@@ -224,8 +224,14 @@ def invoke(benchmark, benchmark_input_size, repetitions, function_name, **kwargs
 
 
 @benchmark.command()
+@click.option(
+    "--metrics-timeout",
+    type=float,
+    default=FaaSSystem.METRICS_TIMEOUT,
+    help="Maximal time in seconds of waiting for provider metrics of invocations.",
+)
 @common_params
-def process(**kwargs):
+def process(metrics_timeout, **kwargs):
 
     (
         config,
@@ -234,6 +240,7 @@ def process(**kwargs):
         sebs_client,
         deployment_client,
     ) = parse_common_params(**kwargs)
+    deployment_client.metrics_timeout = metrics_timeout
     sebs_client.logging.info("Load results from {}".format(os.path.abspath("experiments.json")))
     with open("experiments.json", "r") as in_f:
         config = json.load(in_f)
@@ -315,6 +322,12 @@ def start(benchmark, benchmark_input_size, output, deployments, remove_container
         **kwargs
     )
     deployment_client = cast(sebs.local.Local, deployment_client)
+    # entry points of the emulator are served by this process and end with it
+    if deployment_client.config.emulator_config["enabled"]:
+        raise RuntimeError(
+            "Local deployments started with 'local start' do not support the emulator, "
+            "disable it with \"emulator\": {\"enabled\": false} in the deployment config."
+        )
     deployment_client.remove_containers = remove_containers
     result = sebs.local.Deployment()
 
@@ -384,8 +397,19 @@ def experiment_invoke(experiment, **kwargs):
 @experiment.command("process")
 @click.argument("experiment", type=str)  # , help="Benchmark to be launched.")
 @click.option("--extend-time-interval", type=int, default=-1)  # , help="Benchmark to be launched.")
+@click.option(
+    "--metrics-cache/--no-metrics-cache",
+    default=True,
+    help="Reuse provider metrics downloaded for overlapping time windows.",
+)
+@click.option(
+    "--metrics-timeout",
+    type=float,
+    default=FaaSSystem.METRICS_TIMEOUT,
+    help="Maximal time in seconds of waiting for provider metrics of invocations.",
+)
 @common_params
-def experment_process(experiment, extend_time_interval, **kwargs):
+def experment_process(experiment, extend_time_interval, metrics_cache, metrics_timeout, **kwargs):
     (
         config,
         output_dir,
@@ -393,10 +417,56 @@ def experment_process(experiment, extend_time_interval, **kwargs):
         sebs_client,
         deployment_client,
     ) = parse_common_params(**kwargs)
+    sebs_client.cache_client.ignore_metrics = not metrics_cache
+    deployment_client.metrics_timeout = metrics_timeout
     experiment = sebs_client.get_experiment(experiment, config["experiments"])
     experiment.process(sebs_client, deployment_client, output_dir, logging_filename, extend_time_interval)
 
 
+@experiment.command("compare")
+@click.argument("old", type=click.Path(exists=True, file_okay=False))
+@click.argument("new", type=click.Path(exists=True, file_okay=False))
+@click.option(
+    "--output-dir", default=os.path.curdir, help="Output directory for the comparison."
+)
+@click.option(
+    "--metric",
+    "metrics",
+    multiple=True,
+    default=sebs.experiments.ResultComparison.METRICS,
+    type=click.Choice(sebs.experiments.ResultComparison.METRICS),
+    help="Metric to compare, can be repeated.",
+)
+@click.option("--alpha", default=0.95, type=float, help="Confidence level of tests and intervals.")
+@click.option(
+    "--min-effect",
+    default=0.147,
+    type=float,
+    help="Minimal absolute value of Cliff's delta for a significant change.",
+)
+@click.option(
+    "--fail-on-regression/--no-fail-on-regression",
+    default=False,
+    help="Exit with non-zero status when a regression is detected.",
+)
+@click.option("--verbose/--no-verbose", default=False, help="Verbose output.")
+def experiment_compare(
+    old, new, output_dir, metrics, alpha, min_effect, fail_on_regression, verbose
+):
+    os.makedirs(output_dir, exist_ok=True)
+    comparison = sebs.experiments.ResultComparison(alpha, min_effect, metrics)
+    comparison.logging_handlers = sebs.utils.LoggingHandlers(
+        verbose, os.path.join(output_dir, "out.log")
+    )
+    result = comparison.compare(old, new)
+    comparison.write(output_dir, result)
+    logging.info(
+        f"Verdict {result['verdict']} saved to {os.path.abspath(output_dir)}/comparison.json"
+    )
+    if fail_on_regression and result["verdict"] == "regression":
+        sys.exit(1)
+
+
 if __name__ == "__main__":
     cli()
 
@@ -1,9 +1,9 @@
-import math
 import os
+import re
 import shutil
 import time
 import uuid
-from typing import cast, Dict, List, Optional, Tuple, Type, Union  # noqa
+from typing import cast, Dict, Iterable, List, Optional, Set, Tuple, Type, Union  # noqa
 
 import boto3
 import docker
@@ -11,6 +11,7 @@ import docker
 from sebs.aws.s3 import S3
 from sebs.aws.function import LambdaFunction
 from sebs.aws.config import AWSConfig
+from sebs.aws.logs import LogsInsightsQuery
 from sebs.utils import execute
 from sebs.benchmark import Benchmark
 from sebs.cache import Cache
@@ -328,48 +329,98 @@ class AWS(System):
         logs_bucket = self.get_storage().add_output_bucket(benchmark, suffix="logs")
         return logs_bucket
 
+    """
+        Pattern of the REPORT line of an invocation.
+        Init Duration is present only for cold starts, and it can be preceded
+        by other optional fields. XRay fields are placed on a separate line.
+    """
+    REPORT_PATTERN = re.compile(
+        r"REPORT RequestId: (\S+)\s+"
+        r"Duration: ([\d.]+) ms\s+"
+        r"Billed Duration: (\d+) ms\s+"
+        r"Memory Size: (\d+) MB\s+"
+        r"Max Memory Used: (\d+) MB"
+        r"(?:[^\n]*?Init Duration: ([\d.]+) ms)?"
+    )
+
+    @staticmethod
+    def _fill_report(
+        output: ExecutionResult,
+        request_id: str,
+        duration: str,
+        billed_duration: str,
+        memory_size: str,
+        memory_used: str,
+        init_duration: str,
+    ):
+        billed_time = int(billed_duration)
+        memory = int(memory_size)
+        output.request_id = request_id
+        output.provider_times.execution = int(float(duration) * 1000)
+        output.stats.memory_used = float(memory_used)
+        if init_duration:
+            output.provider_times.initialization = int(float(init_duration) * 1000)
+        billing = output.billing
+        billing.billed_time = billed_time
+        billing.memory = memory
+        billing.gb_seconds = billed_time * memory
+
     """
         Accepts AWS report after function invocation.
-        Returns a dictionary filled with values with various metrics such as
+        Fills the result with values of various metrics such as
         time, invocation time and memory consumed.
 
         :param log: decoded log from CloudWatch or from synchronuous invocation
-        :return: dictionary with parsed values
+        :param requests: result of invocation or results indexed by request ID
+        :return: request ID of the report
     """
 
     @staticmethod
     def parse_aws_report(
         log: str, requests: Union[ExecutionResult, Dict[str, ExecutionResult]]
     ) -> str:
-        aws_vals = {}
-        for line in log.split("\t"):
-            if not line.isspace():
-                split = line.split(":")
-                aws_vals[split[0]] = split[1].split()[0]
-        if "START RequestId" in aws_vals:
-            request_id = aws_vals["START RequestId"]
-        else:
-            request_id = aws_vals["REPORT RequestId"]
+        match = AWS.REPORT_PATTERN.search(log)
+        if match is None:
+            raise RuntimeError(f"Couldn't find the REPORT line in AWS log: {log}")
+        request_id = match.group(1)
         if isinstance(requests, ExecutionResult):
             output = cast(ExecutionResult, requests)
         else:
             if request_id not in requests:
                 return request_id
             output = requests[request_id]
-        output.request_id = request_id
-        output.provider_times.execution = int(float(aws_vals["Duration"]) * 1000)
-        output.stats.memory_used = float(aws_vals["Max Memory Used"])
-        if "Init Duration" in aws_vals:
-            output.provider_times.initialization = int(float(aws_vals["Init Duration"]) * 1000)
-        output.billing.billed_time = int(aws_vals["Billed Duration"])
-        output.billing.memory = int(aws_vals["Memory Size"])
-        output.billing.gb_seconds = output.billing.billed_time * output.billing.memory
+        AWS._fill_report(output, *match.groups(""))
         return request_id
 
+    """
+        Parse a batch of logs in a single pass over the joined text.
+        Reports of unknown invocations are skipped.
+
+        :param logs: decoded logs, each containing zero or more REPORT lines
+        :param requests: results indexed by request ID
+        :return: request IDs of results filled with reports
+    """
+
+    @staticmethod
+    def parse_aws_reports(logs: Iterable[str], requests: Dict[str, ExecutionResult]) -> List[str]:
+        request_ids = []
+        fill_report = AWS._fill_report
+        for report in AWS.REPORT_PATTERN.findall("\n".join(logs)):
+            output = requests.get(report[0])
+            if output is not None:
+                fill_report(output, *report)
+                request_ids.append(report[0])
+        return request_ids
+
     def shutdown(self) -> None:
         super().shutdown()
 
-    def get_invocation_error(self, function_name: str, start_time: int, end_time: int):
+    """
+        The client is created on first use, unless it has been replaced,
+        e.g., with a stub replaying recorded responses.
+    """
+
+    def get_logs_client(self):
         if not self.logs_client:
             self.logs_client = boto3.client(
                 service_name="logs",
@@ -377,10 +428,14 @@ class AWS(System):
                 aws_secret_access_key=self.config.credentials.secret_key,
                 region_name=self.config.region,
             )
+        return self.logs_client
+
+    def get_invocation_error(self, function_name: str, start_time: int, end_time: int):
 
+        logs_client = self.get_logs_client()
         response = None
         while True:
-            query = self.logs_client.start_query(
+            query = logs_client.start_query(
                 logGroupName="/aws/lambda/{}".format(function_name),
                 # queryString="filter @message like /REPORT/",
                 queryString="fields @message",
@@ -392,7 +447,7 @@ class AWS(System):
             while response is None or response["status"] == "Running":
                 self.logging.info("Waiting for AWS query to complete ...")
                 time.sleep(5)
-                response = self.logs_client.get_query_results(queryId=query_id)
+                response = logs_client.get_query_results(queryId=query_id)
             if len(response["results"]) == 0:
                 self.logging.info("AWS logs are not yet available, repeat after 15s...")
                 time.sleep(15)
@@ -405,6 +460,25 @@ class AWS(System):
                 if value["field"] == "@message":
                     self.logging.error(value["value"])
 
+    def fetch_metrics(
+        self,
+        function_name: str,
+        start_time: float,
+        end_time: float,
+        requests: Dict[str, ExecutionResult],
+    ) -> Dict[str, str]:
+
+        query = LogsInsightsQuery(
+            self.get_logs_client(), "/aws/lambda/{}".format(function_name)
+        )
+        query.logging_handlers = self.logging_handlers
+        return query.reports(start_time, end_time, requests)
+
+    def apply_metrics(
+        self, records: Dict[str, str], requests: Dict[str, ExecutionResult]
+    ) -> Set[str]:
+        return set(AWS.parse_aws_reports(records.values(), requests))
+
     def download_metrics(
         self,
         function_name: str,
@@ -413,47 +487,7 @@ class AWS(System):
         requests: Dict[str, ExecutionResult],
         metrics: dict,
     ):
-
-        if not self.logs_client:
-            self.logs_client = boto3.client(
-                service_name="logs",
-                aws_access_key_id=self.config.credentials.access_key,
-                aws_secret_access_key=self.config.credentials.secret_key,
-                region_name=self.config.region,
-            )
-
-        query = self.logs_client.start_query(
-            logGroupName="/aws/lambda/{}".format(function_name),
-            queryString="filter @message like /REPORT/",
-            startTime=math.floor(start_time),
-            endTime=math.ceil(end_time + 1),
-            limit=10000,
-        )
-        query_id = query["queryId"]
-        response = None
-
-        while response is None or response["status"] == "Running":
-            self.logging.info("Waiting for AWS query to complete ...")
-            time.sleep(1)
-            response = self.logs_client.get_query_results(queryId=query_id)
-        # results contain a list of matches
-        # each match has multiple parts, we look at `@message` since this one
-        # contains the report of invocation
-        results = response["results"]
-        results_count = len(requests.keys())
-        results_processed = 0
-        requests_ids = set(requests.keys())
-        for val in results:
-            for result_part in val:
-                if result_part["field"] == "@message":
-                    request_id = AWS.parse_aws_report(result_part["value"], requests)
-                    if request_id in requests:
-                        results_processed += 1
-                        requests_ids.remove(request_id)
-        self.logging.info(
-            f"Received {len(results)} entries, found results for {results_processed} "
-            f"out of {results_count} invocations"
-        )
+        self.poll_metrics(function_name, start_time, end_time, requests)
 
     def create_trigger(self, func: Function, trigger_type: Trigger.TriggerType) -> Trigger:
         from sebs.aws.triggers import HTTPTrigger
@@ -0,0 +1,181 @@
+import concurrent.futures
+import math
+import re
+import time
+from typing import Dict, List, Optional, Tuple
+
+from sebs.faas.function import ExecutionResult
+from sebs.utils import LoggingBase
+
+"""
+    Retrieval of Lambda REPORT logs with CloudWatch Logs Insights.
+
+    A single query returns at most 10,000 rows. The time range of an experiment
+    is split into windows holding a bounded number of invocations, and windows
+    are queried concurrently. Results are merged and deduplicated by request ID.
+    Windows truncated by the limit are split in halves. Logs are delivered
+    to CloudWatch with a delay, and invocations without a report are queried
+    again by the metrics polling loop of the deployment.
+
+    The logs client is passed explicitly, which allows to replace it with a
+    stub replaying recorded responses.
+"""
+
+
+class LogsInsightsQuery(LoggingBase):
+
+    # Maximal number of rows returned by a single Logs Insights query.
+    QUERY_LIMIT = 10000
+    # AWS allows up to 30 concurrent queries per account; leave space for other users.
+    MAX_CONCURRENT_QUERIES = 10
+    # Invocations per window, below the limit to accommodate unrelated reports.
+    WINDOW_INVOCATIONS = 5000
+    # Padding of windows, in seconds, to accommodate clock differences.
+    WINDOW_MARGIN = 5
+
+    QUERY_STRING = "filter @message like /REPORT/"
+    REQUEST_ID_PATTERN = re.compile(r"RequestId: (\S+)")
+
+    @staticmethod
+    def typename() -> str:
+        return "AWS.LogsInsightsQuery"
+
+    def __init__(
+        self,
+        logs_client,
+        log_group: str,
+        max_concurrent: int = MAX_CONCURRENT_QUERIES,
+        window_invocations: int = WINDOW_INVOCATIONS,
+        poll_interval: float = 1.0,
+    ):
+        super().__init__()
+        self._client = logs_client
+        self._log_group = log_group
+        self._max_concurrent = max_concurrent
+        self._window_invocations = window_invocations
+        self._poll_interval = poll_interval
+
+    """
+        Sort invocations by their start and split them into groups of bounded size.
+        Each window spans the invocations of its group, clamped to the time range.
+        Invocations without client times are covered by a window over the entire range.
+
+        :return: list of windows (begin, end) in seconds
+    """
+
+    def windows(
+        self, start_time: float, end_time: float, requests: Dict[str, ExecutionResult]
+    ) -> List[Tuple[int, int]]:
+
+        begin = math.floor(start_time)
+        end = math.ceil(end_time + 1)
+        timed = []
+        untimed = False
+        for req in requests.values():
+            req_times = req.times.client_timestamps()
+            if req_times is None:
+                untimed = True
+            else:
+                timed.append(req_times)
+        if untimed or not timed:
+            return [(begin, end)]
+
+        timed.sort()
+        windows = []
+        for idx in range(0, len(timed), self._window_invocations):
+            group_end = idx + self._window_invocations
+            group = timed[idx:group_end]
+            window_begin = math.floor(group[0][0]) - LogsInsightsQuery.WINDOW_MARGIN
+            window_end = math.ceil(max(t[1] for t in group)) + LogsInsightsQuery.WINDOW_MARGIN
+            windows.append((max(begin, window_begin), min(end, window_end)))
+        return windows
+
+    """
+        Run a single query and wait for its completion.
+
+        :return: list of messages, None if the query did not complete
+    """
+
+    def _query(self, begin: int, end: int) -> Optional[List[str]]:
+
+        query_id = self._client.start_query(
+            logGroupName=self._log_group,
+            queryString=LogsInsightsQuery.QUERY_STRING,
+            startTime=begin,
+            endTime=end,
+            limit=LogsInsightsQuery.QUERY_LIMIT,
+        )["queryId"]
+        while True:
+            response = self._client.get_query_results(queryId=query_id)
+            if response["status"] not in ("Scheduled", "Running"):
+                break
+            time.sleep(self._poll_interval)
+        if response["status"] != "Complete":
+            self.logging.warning(
+                f"Query {query_id} for window [{begin}, {end}] ended with {response['status']}"
+            )
+            return None
+
+        # each match has multiple parts, `@message` contains the report of invocation
+        messages = []
+        for val in response["results"]:
+            for result_part in val:
+                if result_part["field"] == "@message":
+                    messages.append(result_part["value"])
+        return messages
+
+    """
+        Query a window, splitting it in halves while results are truncated.
+        A window of a single second cannot be split further.
+    """
+
+    def _query_window(self, begin: int, end: int) -> Optional[List[str]]:
+
+        messages = self._query(begin, end)
+        if messages is None or len(messages) < LogsInsightsQuery.QUERY_LIMIT or end - begin <= 1:
+            if messages is not None and len(messages) >= LogsInsightsQuery.QUERY_LIMIT:
+                self.logging.warning(f"Truncated results for window [{begin}, {end}]")
+            return messages
+        middle = (begin + end) // 2
+        self.logging.info(f"Window [{begin}, {end}] truncated, splitting at {middle}")
+        first = self._query_window(begin, middle)
+        second = self._query_window(middle, end)
+        if first is None or second is None:
+            return None
+        return first + second
+
+    """
+        Query all windows concurrently and merge results.
+
+        :return: dictionary of report messages indexed by request ID
+    """
+
+    def _query_windows(self, windows: List[Tuple[int, int]]) -> Dict[str, str]:
+
+        reports: Dict[str, str] = {}
+        workers = min(self._max_concurrent, len(windows))
+        with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(self._query_window, *window) for window in windows]
+            for future in concurrent.futures.as_completed(futures):
+                messages = future.result()
+                if messages is None:
+                    continue
+                for message in messages:
+                    match = LogsInsightsQuery.REQUEST_ID_PATTERN.search(message)
+                    if match:
+                        reports[match.group(1)] = message
+        return reports
+
+    """
+        Retrieve REPORT logs of invocations in the time range.
+
+        :return: dictionary of report messages indexed by request ID
+    """
+
+    def reports(
+        self, start_time: float, end_time: float, requests: Dict[str, ExecutionResult]
+    ) -> Dict[str, str]:
+
+        windows = self.windows(start_time, end_time, requests)
+        self.logging.info(f"Querying {len(windows)} windows of log group {self._log_group}")
+        return self._query_windows(windows)
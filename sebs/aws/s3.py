@@ -1,13 +1,21 @@
+import os
 import uuid
-from typing import List
+from typing import Dict, List, Optional
 
 import boto3
+from boto3.s3.transfer import TransferConfig
 
 from sebs.cache import Cache
-from ..faas.storage import PersistentStorage
+from ..faas.storage import PersistentStorage, s3_etag
 
 
 class S3(PersistentStorage):
+
+    # Fixed multipart configuration - allows us to recompute ETag of uploaded files.
+    # Values are equal to boto3 defaults.
+    MULTIPART_THRESHOLD = 8 * 1024 * 1024
+    MULTIPART_CHUNKSIZE = 8 * 1024 * 1024
+
     @staticmethod
     def typename() -> str:
         return "AWS.S3"
@@ -41,6 +49,10 @@ class S3(PersistentStorage):
             aws_secret_access_key=secret_key,
         )
         self.cached = False
+        self._transfer_config = TransferConfig(
+            multipart_threshold=S3.MULTIPART_THRESHOLD,
+            multipart_chunksize=S3.MULTIPART_CHUNKSIZE,
+        )
 
     def correct_name(self, name: str) -> str:
         return name
@@ -58,26 +70,11 @@ class S3(PersistentStorage):
         self.logging.info("Created bucket {}".format(bucket_name))
         return bucket_name
 
-    def uploader_func(self, bucket_idx, key, filepath):
-        # Skip upload when using cached buckets and not updating storage.
-        if self.cached and not self.replace_existing:
-            return
-        bucket_name = self.input_buckets[bucket_idx]
-        if not self.replace_existing:
-            if "Contents" in self.input_buckets_files[bucket_idx]:
-                for f in self.input_buckets_files[bucket_idx]["Contents"]:
-                    f_name = f["Key"]
-                    if key == f_name:
-                        self.logging.info(
-                            "Skipping upload of {} to {}".format(filepath, bucket_name)
-                        )
-                        return
-        bucket_name = self.input_buckets[bucket_idx]
-        self.upload(bucket_name, filepath, key)
-
     def upload(self, bucket_name: str, filepath: str, key: str):
         self.logging.info("Upload {} to {}".format(filepath, bucket_name))
-        self.client.upload_file(Filename=filepath, Bucket=bucket_name, Key=key)
+        self.client.upload_file(
+            Filename=filepath, Bucket=bucket_name, Key=key, Config=self._transfer_config
+        )
 
     def download(self, bucket_name: str, key: str, filepath: str):
         self.logging.info("Download {}:{} to {}".format(bucket_name, key, filepath))
@@ -92,6 +89,18 @@ class S3(PersistentStorage):
             objects = []
         return objects
 
+    def list_bucket_checksums(self, bucket_name: str) -> Dict[str, Optional[str]]:
+        checksums: Dict[str, Optional[str]] = {}
+        paginator = self.client.get_paginator("list_objects_v2")
+        for page in paginator.paginate(Bucket=bucket_name):
+            for obj in page.get("Contents", []):
+                checksums[obj["Key"]] = obj["ETag"].strip('"')
+        return checksums
+
+    def file_checksum(self, filepath: str) -> str:
+        multipart = os.path.getsize(filepath) >= S3.MULTIPART_THRESHOLD
+        return s3_etag(filepath, S3.MULTIPART_CHUNKSIZE, multipart)
+
     def list_buckets(self, bucket_name: str) -> List[str]:
         s3_buckets = self.client.list_buckets()["Buckets"]
         return [bucket["Name"] for bucket in s3_buckets if bucket_name in bucket["Name"]]
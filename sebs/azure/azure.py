@@ -55,6 +55,7 @@ class Azure(System):
         self.logging_handlers = logger_handlers
         self._config = config
         self.cold_start_counter = 0
+        self._application_ids: Dict[str, str] = {}
 
     """
         Start the Docker container running Azure CLI tools.
@@ -348,26 +349,31 @@ class Azure(System):
         logs_container = self.storage.add_output_bucket(benchmark, suffix="logs")
         return logs_container
 
-    def download_metrics(
+    def _application_id(self, function_name: str) -> str:
+
+        if function_name not in self._application_ids:
+            resource_group = self.config.resources.resource_group(self.cli_instance)
+            # Avoid warnings in the next step
+            self.cli_instance.execute(
+                "az feature register --name AIWorkspacePreview " "--namespace microsoft.insights"
+            )
+            app_id_query = self.cli_instance.execute(
+                ("az monitor app-insights component show " "--app {} --resource-group {}").format(
+                    function_name, resource_group
+                )
+            ).decode("utf-8")
+            self._application_ids[function_name] = json.loads(app_id_query)["appId"]
+        return self._application_ids[function_name]
+
+    def fetch_metrics(
         self,
         function_name: str,
-        start_time: int,
-        end_time: int,
+        start_time: float,
+        end_time: float,
         requests: Dict[str, ExecutionResult],
-        metrics: Dict[str, dict],
-    ):
+    ) -> Dict[str, list]:
 
-        resource_group = self.config.resources.resource_group(self.cli_instance)
-        # Avoid warnings in the next step
-        ret = self.cli_instance.execute(
-            "az feature register --name AIWorkspacePreview " "--namespace microsoft.insights"
-        )
-        app_id_query = self.cli_instance.execute(
-            ("az monitor app-insights component show " "--app {} --resource-group {}").format(
-                function_name, resource_group
-            )
-        ).decode("utf-8")
-        application_id = json.loads(app_id_query)["appId"]
+        application_id = self._application_id(function_name)
 
         # Azure CLI requires date in the following format
         # Format: date (yyyy-mm-dd) time (hh:mm:ss.xxxxx) timezone (+/-hh:mm)
@@ -387,9 +393,6 @@ class Azure(System):
             "invocationId=customDimensions['InvocationId'], "
             "functionTime=customDimensions['FunctionExecutionTimeMs']"
         )
-        invocations_processed: Set[str] = set()
-        invocations_to_process = set(requests.keys())
-        # while len(invocations_processed) < len(requests.keys()):
         self.logging.info("Azure: Running App Insights query.")
         ret = self.cli_instance.execute(
             (
@@ -401,23 +404,34 @@ class Azure(System):
         ).decode("utf-8")
         ret = json.loads(ret)
         ret = ret["tables"][0]
-        # time is last, invocation is second to last
-        for request in ret["rows"]:
-            invocation_id = request[-2]
+        # invocation is second to last
+        return {request[-2]: request for request in ret["rows"] if request[-2]}
+
+    def apply_metrics(
+        self, records: Dict[str, list], requests: Dict[str, ExecutionResult]
+    ) -> Set[str]:
+        invocations_processed: Set[str] = set()
+        for invocation_id, request in records.items():
             # might happen that we get invocation from another experiment
             if invocation_id not in requests:
                 continue
             # duration = request[4]
+            # time is last
             func_exec_time = request[-1]
             invocations_processed.add(invocation_id)
             requests[invocation_id].provider_times.execution = int(float(func_exec_time) * 1000)
-        self.logging.info(
-            f"Azure: Found time metrics for {len(invocations_processed)} "
-            f"out of {len(requests.keys())} invocations."
-        )
-        if len(invocations_processed) < len(requests.keys()):
-            time.sleep(5)
-        self.logging.info(f"Missing the requests: {invocations_to_process - invocations_processed}")
+        return invocations_processed
+
+    def download_metrics(
+        self,
+        function_name: str,
+        start_time: int,
+        end_time: int,
+        requests: Dict[str, ExecutionResult],
+        metrics: Dict[str, dict],
+    ):
+
+        self.poll_metrics(function_name, start_time, end_time, requests)
 
         # TODO: query performance counters for mem
 
@@ -1,10 +1,11 @@
+import base64
 import uuid
-from typing import List
+from typing import Dict, List, Optional
 
 from azure.storage.blob import BlobServiceClient
 
 from sebs.cache import Cache
-from ..faas.storage import PersistentStorage
+from ..faas.storage import PersistentStorage, md5_base64
 
 
 class BlobStorage(PersistentStorage):
@@ -48,23 +49,6 @@ class BlobStorage(PersistentStorage):
             for container in self.client.list_containers(name_starts_with=bucket_name)
         ]
 
-    def uploader_func(self, container_idx, file, filepath):
-        # Skip upload when using cached containers
-        if self.cached and not self.replace_existing:
-            return
-        container_name = self.input_buckets[container_idx]
-        if not self.replace_existing:
-            for f in self.input_buckets_files[container_idx]:
-                if f == file:
-                    self.logging.info(
-                        "Skipping upload of {} to {}".format(filepath, container_name)
-                    )
-                    return
-        client = self.client.get_blob_client(container_name, file)
-        with open(filepath, "rb") as file_data:
-            client.upload_blob(data=file_data, overwrite=True)
-        self.logging.info("Upload {} to {}".format(filepath, container_name))
-
     """
         Download file from bucket.
 
@@ -83,7 +67,7 @@ class BlobStorage(PersistentStorage):
         self.logging.info("Upload {} to {}".format(filepath, container_name))
         client = self.client.get_blob_client(container_name, key)
         with open(filepath, "rb") as upload_file:
-            client.upload_blob(upload_file.read())
+            client.upload_blob(upload_file, overwrite=True)
 
     """
         Return list of files in a container.
@@ -98,6 +82,23 @@ class BlobStorage(PersistentStorage):
         )
         return objects
 
+    """
+        Azure stores Content-MD5 only for blobs uploaded in a single request.
+
+        :param container:
+        :return: base64-encoded MD5 of each blob, None if not available
+    """
+
+    def list_bucket_checksums(self, container: str) -> Dict[str, Optional[str]]:
+        checksums: Dict[str, Optional[str]] = {}
+        for blob in self.client.get_container_client(container).list_blobs():
+            md5 = blob.content_settings.content_md5
+            checksums[blob.name] = base64.b64encode(md5).decode("utf-8") if md5 else None
+        return checksums
+
+    def file_checksum(self, filepath: str) -> str:
+        return md5_base64(filepath)
+
     def clean_bucket(self, bucket: str):
         self.logging.info("Clean output container {}".format(bucket))
         container_client = self.client.get_container_client(bucket)
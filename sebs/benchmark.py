@@ -518,6 +518,10 @@ class Benchmark(LoggingBase):
         input_config = mod.generate_input(
             benchmark_data_path, size, storage.input, storage.output, storage.uploader_func,
         )
+        overrides = self._experiment_config.benchmark_input(self.benchmark)
+        if overrides:
+            self.logging.info(f"Override benchmark input with {overrides}")
+            merge_input(input_config, overrides)
         return input_config
 
     def code_package_modify(self, filename: str, data: io.BytesIO):
@@ -572,6 +576,19 @@ class Benchmark(LoggingBase):
             zf.writestr(filename, data)
 
 
+"""
+    Recursively update values of the benchmark input.
+"""
+
+
+def merge_input(input_config: dict, overrides: dict):
+    for key, val in overrides.items():
+        if isinstance(val, dict) and isinstance(input_config.get(key), dict):
+            merge_input(input_config[key], val)
+        else:
+            input_config[key] = val
+
+
 """
     The interface of `input` module of each benchmark.
     Useful for static type hinting with mypy.
@@ -5,7 +5,7 @@ import json
 import os
 import shutil
 import threading
-from typing import Any, Callable, Dict, List, Optional, TYPE_CHECKING  # noqa
+from typing import Any, Callable, Dict, List, Optional, Set, TYPE_CHECKING  # noqa
 
 from sebs.utils import LoggingBase
 
@@ -47,6 +47,7 @@ class Cache(LoggingBase):
         self.cache_dir = os.path.abspath(cache_dir)
         self.ignore_functions: bool = False
         self.ignore_storage: bool = False
+        self.ignore_metrics: bool = False
         self._lock = threading.RLock()
         if not os.path.exists(self.cache_dir):
             os.makedirs(self.cache_dir, exist_ok=True)
@@ -59,7 +60,7 @@ class Cache(LoggingBase):
 
     def load_config(self):
         with self._lock:
-            for cloud in ["azure", "aws", "gcp"]:
+            for cloud in ["azure", "aws", "gcp", "local"]:
                 cloud_config_file = os.path.join(self.cache_dir, "{}.json".format(cloud))
                 if os.path.exists(cloud_config_file):
                     self.cached_config[cloud] = json.load(open(cloud_config_file, "r"))
@@ -86,7 +87,7 @@ class Cache(LoggingBase):
 
     def shutdown(self):
         if self.config_updated:
-            for cloud in ["azure", "aws", "gcp"]:
+            for cloud in ["azure", "aws", "gcp", "local"]:
                 if cloud in self.cached_config:
                     cloud_config_file = os.path.join(self.cache_dir, "{}.json".format(cloud))
                     self.logging.info("Update cached config {}".format(cloud_config_file))
@@ -319,3 +320,146 @@ class Cache(LoggingBase):
                 raise RuntimeError(
                     "Can't cache function {} for a non-existing code package!".format(function.name)
                 )
+
+    """
+        Provider metrics are stored in files named after the time window
+        of the query that retrieved them, with bounds in microseconds:
+        metrics/{deployment}/{function}/{kind}_{begin}_{end}.json
+        Data of repeated queries for the same window is merged into the file.
+    """
+
+    @staticmethod
+    def _metrics_timestamp(timestamp: float) -> int:
+        return round(timestamp * 1000 * 1000)
+
+    def _metrics_dir(self, deployment: str, function: str) -> str:
+        return os.path.join(self.cache_dir, "metrics", deployment, function)
+
+    def _metrics_windows(self, deployment: str, function: str, kind: str):
+        metrics_dir = self._metrics_dir(deployment, function)
+        if not os.path.exists(metrics_dir):
+            return
+        for f in os.listdir(metrics_dir):
+            name, extension = os.path.splitext(f)
+            parts = name.split("_")
+            if extension != ".json" or len(parts) != 3 or parts[0] != kind:
+                continue
+            yield int(parts[1]), int(parts[2]), os.path.join(metrics_dir, f)
+
+    """
+        Records and settled invocations are indexed by request ID,
+        and points of time series are identified by their timestamp.
+    """
+
+    @staticmethod
+    def _merge_metrics(kind: str, data: dict, new_data: dict) -> dict:
+        if kind != "series":
+            return {**data, **new_data}
+        merged = {}
+        for metric in data.keys() | new_data.keys():
+            points = {p["timestamp"]: p for p in data.get(metric, [])}
+            points.update({p["timestamp"]: p for p in new_data.get(metric, [])})
+            merged[metric] = [points[timestamp] for timestamp in sorted(points.keys())]
+        return merged
+
+    def _add_metrics(self, deployment: str, function: str, kind: str, begin, end, data):
+        if self.ignore_metrics:
+            return
+        metrics_dir = self._metrics_dir(deployment, function)
+        path = os.path.join(
+            metrics_dir,
+            f"{kind}_{Cache._metrics_timestamp(begin)}_{Cache._metrics_timestamp(end)}.json",
+        )
+        with self._lock:
+            os.makedirs(metrics_dir, exist_ok=True)
+            if os.path.exists(path):
+                with open(path, "r") as fp:
+                    data = Cache._merge_metrics(kind, json.load(fp), data)
+            with open(path, "w") as fp:
+                json.dump(data, fp)
+
+    """
+        Access raw provider records, e.g., log entries, of function invocations.
+        Records of all cached windows overlapping with the time range are merged.
+
+        :return: records indexed by request ID
+    """
+
+    def get_metrics_records(
+        self, deployment: str, function: str, begin: float, end: float
+    ) -> Dict[str, Any]:
+        return self._get_metrics_records(deployment, function, "records", begin, end)
+
+    def _get_metrics_records(
+        self, deployment: str, function: str, kind: str, begin: float, end: float
+    ) -> Dict[str, Any]:
+        records: Dict[str, Any] = {}
+        if self.ignore_metrics:
+            return records
+        begin_us, end_us = Cache._metrics_timestamp(begin), Cache._metrics_timestamp(end)
+        with self._lock:
+            for window_begin, window_end, path in self._metrics_windows(
+                deployment, function, kind
+            ):
+                if window_begin <= end_us and window_end >= begin_us:
+                    with open(path, "r") as fp:
+                        records.update(json.load(fp))
+        return records
+
+    def add_metrics_records(
+        self, deployment: str, function: str, begin: float, end: float, records: Dict[str, Any]
+    ):
+        self._add_metrics(deployment, function, "records", begin, end, records)
+
+    """
+        Invocations without provider metrics after polling was exhausted,
+        e.g., failed invocations. They are not queried again when results
+        are reprocessed.
+
+        :return: IDs of settled invocations in the time range
+    """
+
+    def get_settled_requests(
+        self, deployment: str, function: str, begin: float, end: float
+    ) -> Set[str]:
+        return set(self._get_metrics_records(deployment, function, "settled", begin, end).keys())
+
+    def add_settled_requests(
+        self, deployment: str, function: str, begin: float, end: float, request_ids: Set[str]
+    ):
+        settled = {request_id: True for request_id in request_ids}
+        self._add_metrics(deployment, function, "settled", begin, end, settled)
+
+    """
+        Access monitoring time series of a function.
+        A cached window is used only when it contains the entire time range.
+        Points outside of the range are skipped, unless the windows are equal.
+
+        :return: lists of points indexed by metric name, None if not cached
+    """
+
+    def get_time_series(
+        self, deployment: str, function: str, begin: float, end: float
+    ) -> Optional[Dict[str, List[dict]]]:
+        if self.ignore_metrics:
+            return None
+        begin_us, end_us = Cache._metrics_timestamp(begin), Cache._metrics_timestamp(end)
+        with self._lock:
+            for window_begin, window_end, path in self._metrics_windows(
+                deployment, function, "series"
+            ):
+                if window_begin <= begin_us and window_end >= end_us:
+                    with open(path, "r") as fp:
+                        series = json.load(fp)
+                    if window_begin == begin_us and window_end == end_us:
+                        return series
+                    return {
+                        metric: [p for p in points if begin <= p["timestamp"] <= end]
+                        for metric, points in series.items()
+                    }
+        return None
+
+    def add_time_series(
+        self, deployment: str, function: str, begin: float, end: float, series: Dict[str, list]
+    ):
+        self._add_metrics(deployment, function, "series", begin, end, series)
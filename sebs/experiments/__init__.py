@@ -1,4 +1,6 @@
 from .result import Result as ExperimentResult  # noqa
+from .columnar import ColumnarResult  # noqa
+from .comparison import ResultComparison  # noqa
 from .experiment import Experiment  # noqa
 from .perf_cost import PerfCost  # noqa
 from .network_ping_pong import NetworkPingPong  # noqa
@@ -0,0 +1,321 @@
+import array
+import json
+import math
+import os
+import shutil
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from sebs.cache import Cache
+from sebs.faas.config import Config as DeploymentConfig
+from sebs.faas.function import ExecutionResult
+from sebs.experiments.config import Config as ExperimentConfig
+from sebs.experiments.result import Result
+from sebs.experiments.result_log import ResultLog
+from sebs.utils import LoggingHandlers, serialize
+
+"""
+    Columnar storage of experiment results.
+
+    Each attribute of invocations is stored in a separate NumPy array file,
+    and a small JSON sidecar holds experiment and deployment configuration,
+    experiment times, metrics and user-defined statistics.
+    Columns are memory-mapped when loaded, and analysis reads only the pages
+    of selected metrics.
+
+    Outputs returned by functions are not stored; use the JSON export
+    to preserve them.
+
+    Layout of the directory:
+        metadata.json
+        function.npy        - index of function in metadata["functions"]
+        request_id.npy      - fixed-width ASCII strings
+        <column>.npy        - numeric columns; missing values are NaN
+"""
+
+
+def _optional(val) -> float:
+    return math.nan if val is None else float(val)
+
+
+def _timestamp(idx: int) -> Callable[[ExecutionResult], float]:
+    def getter(invoc: ExecutionResult) -> float:
+        times = invoc.times.client_timestamps()
+        return math.nan if times is None else times[idx]
+
+    return getter
+
+
+def _value(obj: str, attr: str) -> Callable[[ExecutionResult], float]:
+    def getter(invoc: ExecutionResult) -> float:
+        return _optional(getattr(getattr(invoc, obj), attr, None))
+
+    return getter
+
+
+class ColumnarResult:
+
+    EXTENSION = ".columns"
+    METADATA = "metadata.json"
+    # Version 2 adds columns of resource usage.
+    VERSION = 2
+
+    """
+        Numeric columns: name, type, accessor of the invocation attribute
+        and the attribute path used when reconstructing results.
+        Times are in microseconds, apart from client timestamps in seconds
+        and HTTP times in seconds as reported by pycurl.
+    """
+    NUMERIC_COLUMNS: List[Tuple[str, str, Callable[[ExecutionResult], float], Tuple[str, str]]] = [
+        ("client_begin", "f8", _timestamp(0), ("times", "client_begin")),
+        ("client_end", "f8", _timestamp(1), ("times", "client_end")),
+        ("client", "f8", _value("times", "client"), ("times", "client")),
+        ("benchmark", "f8", _value("times", "benchmark"), ("times", "benchmark")),
+        ("initialization", "f8", _value("times", "initialization"), ("times", "initialization")),
+        ("http_startup", "f8", _value("times", "http_startup"), ("times", "http_startup")),
+        (
+            "http_first_byte_return",
+            "f8",
+            _value("times", "http_first_byte_return"),
+            ("times", "http_first_byte_return"),
+        ),
+        (
+            "provider_execution",
+            "f8",
+            _value("provider_times", "execution"),
+            ("provider_times", "execution"),
+        ),
+        (
+            "provider_initialization",
+            "f8",
+            _value("provider_times", "initialization"),
+            ("provider_times", "initialization"),
+        ),
+        ("cold_start", "?", lambda invoc: bool(invoc.stats.cold_start), ("stats", "cold_start")),
+        ("failure", "?", lambda invoc: bool(invoc.stats.failure), ("stats", "failure")),
+        ("memory_used", "f8", _value("stats", "memory_used"), ("stats", "memory_used")),
+        ("cpu_time", "f8", _value("stats", "cpu_time"), ("stats", "cpu_time")),
+        ("net_rx", "f8", _value("stats", "net_rx"), ("stats", "net_rx")),
+        ("net_tx", "f8", _value("stats", "net_tx"), ("stats", "net_tx")),
+        ("blkio_read", "f8", _value("stats", "blkio_read"), ("stats", "blkio_read")),
+        ("blkio_write", "f8", _value("stats", "blkio_write"), ("stats", "blkio_write")),
+        ("billing_memory", "f8", _value("billing", "memory"), ("billing", "memory")),
+        ("billed_time", "f8", _value("billing", "billed_time"), ("billing", "billed_time")),
+        ("gb_seconds", "f8", _value("billing", "gb_seconds"), ("billing", "gb_seconds")),
+    ]
+    # Attributes of integer type, restored as integers.
+    INTEGER_ATTRIBUTES = {
+        ("times", "client"),
+        ("times", "benchmark"),
+        ("times", "initialization"),
+        ("provider_times", "execution"),
+        ("provider_times", "initialization"),
+        ("stats", "cpu_time"),
+        ("stats", "net_rx"),
+        ("stats", "net_tx"),
+        ("stats", "blkio_read"),
+        ("stats", "blkio_write"),
+        ("billing", "memory"),
+        ("billing", "billed_time"),
+        ("billing", "gb_seconds"),
+    }
+
+    def __init__(self, path: str):
+        self._path = path
+        with open(os.path.join(path, ColumnarResult.METADATA), "r") as in_f:
+            self._metadata = json.load(in_f)
+        if self._metadata["version"] > ColumnarResult.VERSION:
+            raise RuntimeError(
+                f"Unsupported version {self._metadata['version']} of columnar results in {path}"
+            )
+        self._columns: Dict[str, np.ndarray] = {}
+
+    @property
+    def path(self) -> str:
+        return self._path
+
+    @property
+    def metadata(self) -> dict:
+        return self._metadata
+
+    @property
+    def statistics(self) -> dict:
+        return self._metadata.get("statistics", {})
+
+    def __len__(self) -> int:
+        return self._metadata["invocations"]
+
+    def functions(self) -> List[str]:
+        return self._metadata["functions"]
+
+    def columns(self) -> List[str]:
+        return self._metadata["columns"]
+
+    @staticmethod
+    def is_columnar(path: str) -> bool:
+        return os.path.isdir(path) and os.path.exists(os.path.join(path, ColumnarResult.METADATA))
+
+    """
+        Memory-map a single column. When function name is provided,
+        a copy containing only invocations of this function is returned.
+    """
+
+    def column(self, name: str, func: Optional[str] = None) -> np.ndarray:
+
+        if name not in self._columns:
+            if name not in self.columns():
+                raise KeyError(f"Unknown column {name} in {self._path}")
+            # empty arrays cannot be memory-mapped
+            mmap_mode = "r" if len(self) > 0 else None
+            self._columns[name] = np.load(
+                os.path.join(self._path, f"{name}.npy"), mmap_mode=mmap_mode
+            )
+        data = self._columns[name]
+        if func is None:
+            return data
+        func_idx = self.functions().index(func)
+        return data[self.column("function") == func_idx]
+
+    def request_ids(self, func: Optional[str] = None) -> List[str]:
+        return [val.decode() for val in self.column("request_id", func)]
+
+    """
+        Write invocations to a directory. Columns are accumulated in compact
+        arrays while iterating, and the metadata is written last;
+        directories without metadata are ignored by the loader.
+
+        :param invocations: pairs of function name and invocation result
+        :param metadata: values stored in the sidecar
+    """
+
+    @staticmethod
+    def _write_columns(
+        path: str, invocations: Iterable[Tuple[str, ExecutionResult]], metadata: dict
+    ) -> "ColumnarResult":
+
+        if os.path.exists(path):
+            shutil.rmtree(path)
+        os.makedirs(path)
+
+        functions: Dict[str, int] = {}
+        function_column = array.array("i")
+        request_ids: List[bytes] = []
+        columns = [
+            array.array("d" if dtype == "f8" else "b")
+            for _, dtype, _, _ in ColumnarResult.NUMERIC_COLUMNS
+        ]
+        getters = [getter for _, _, getter, _ in ColumnarResult.NUMERIC_COLUMNS]
+        for func, invoc in invocations:
+            function_column.append(functions.setdefault(func, len(functions)))
+            request_ids.append(invoc.request_id.encode())
+            for column, getter in zip(columns, getters):
+                column.append(getter(invoc))
+
+        np.save(os.path.join(path, "function.npy"), np.frombuffer(function_column, dtype="i4"))
+        width = max((len(request_id) for request_id in request_ids), default=1)
+        np.save(os.path.join(path, "request_id.npy"), np.array(request_ids, dtype=f"S{width}"))
+        for (name, dtype, _, _), column in zip(ColumnarResult.NUMERIC_COLUMNS, columns):
+            data = np.frombuffer(column, dtype=column.typecode).astype(dtype)
+            np.save(os.path.join(path, f"{name}.npy"), data)
+
+        metadata = {
+            "version": ColumnarResult.VERSION,
+            "invocations": len(request_ids),
+            "functions": list(functions.keys()),
+            "columns": ["function", "request_id"]
+            + [name for name, _, _, _ in ColumnarResult.NUMERIC_COLUMNS],
+            **metadata,
+        }
+        with open(os.path.join(path, ColumnarResult.METADATA), "w") as out_f:
+            out_f.write(serialize(metadata))
+        return ColumnarResult(path)
+
+    """
+        Write the experiment result to a directory.
+
+        :param extra: additional, JSON-serializable values stored in the sidecar
+    """
+
+    @staticmethod
+    def write(path: str, result: Result, extra: Optional[dict] = None) -> "ColumnarResult":
+
+        functions = result.functions()
+        return ColumnarResult._write_columns(
+            path,
+            ((func, invoc) for func in functions for invoc in result.invocations(func).values()),
+            {
+                "config": json.loads(serialize(result.config)),
+                "metrics": {func: result.metrics(func) for func in functions},
+                "result_bucket": result.result_bucket,
+                "begin_time": getattr(result, "begin_time", None),
+                "end_time": getattr(result, "end_time", None),
+                **(extra if extra else {}),
+            },
+        )
+
+    """
+        Convert the log of an experiment to the columnar format,
+        without loading all invocations into memory.
+    """
+
+    @staticmethod
+    def write_log(path: str, log_path: str) -> "ColumnarResult":
+        return ColumnarResult._write_columns(
+            path, ResultLog.invocations(log_path), ResultLog.summary(log_path)
+        )
+
+    """
+        Reconstruct the experiment result with all invocations.
+        Client timestamps are restored as datetime objects in the local timezone.
+    """
+
+    def to_result(self, cache: Cache, handlers: LoggingHandlers) -> Result:
+
+        functions = self.functions()
+        func_column = self.column("function").tolist()
+        request_ids = self.request_ids()
+        # results of earlier versions do not have all columns
+        columns = [
+            (self.column(name).tolist(), attr)
+            for name, _, _, attr in ColumnarResult.NUMERIC_COLUMNS
+            if name in self.columns()
+        ]
+
+        invocations: Dict[str, Dict[str, ExecutionResult]] = {func: {} for func in functions}
+        for idx, request_id in enumerate(request_ids):
+            invoc = ExecutionResult()
+            invoc.request_id = request_id
+            for values, (obj, attr) in columns:
+                val = values[idx]
+                if isinstance(val, float) and math.isnan(val):
+                    continue
+                if attr in ("client_begin", "client_end"):
+                    val = datetime.fromtimestamp(val)
+                elif (obj, attr) in ColumnarResult.INTEGER_ATTRIBUTES:
+                    val = int(val)
+                setattr(getattr(invoc, obj), attr, val)
+            invocations[functions[func_column[idx]]][request_id] = invoc
+
+        ret = Result(
+            ExperimentConfig.deserialize(self._metadata["config"]["experiments"]),
+            DeploymentConfig.deserialize(self._metadata["config"]["deployment"], cache, handlers),
+            invocations,
+            self._metadata["metrics"],
+            self._metadata["result_bucket"],
+        )
+        ret.begin_time = self._metadata["begin_time"]
+        ret.end_time = self._metadata["end_time"]
+        return ret
+
+    """
+        Export results in the JSON format of `ExperimentResult`.
+    """
+
+    def export_json(self, path: str, cache: Cache, handlers: LoggingHandlers):
+        result = self.to_result(cache, handlers)
+        with open(path, "w") as out_f:
+            out_f.write(
+                serialize({**json.loads(serialize(result)), "statistics": self.statistics})
+            )
@@ -0,0 +1,288 @@
+import csv
+import glob
+import json
+import math
+import os
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+from sebs.experiments.columnar import ColumnarResult
+from sebs.experiments.result_log import ResultLog
+from sebs.statistics import group_summary, grouped_mann_whitney
+from sebs.utils import LoggingBase, serialize
+
+"""
+    Detection of performance changes between two sets of perf-cost results,
+    e.g., from nightly runs of the benchmark suite.
+
+    Each set is a directory with processed results of one experiment
+    (`<dir>/perf-cost/result.csv`) or a campaign directory with many of them.
+    Samples are grouped by benchmark, memory, experiment type and startup type,
+    and each group is compared with three nonparametric criteria:
+    the two-sided Mann-Whitney U test, the overlap of confidence intervals
+    of the median, and the magnitude of Cliff's delta.
+    A change is significant only when all criteria agree, and groups
+    with too few samples for confidence intervals are unchanged.
+"""
+
+
+# NaN values are not valid JSON and are stored as null.
+def _json_values(obj):
+    if isinstance(obj, float) and math.isnan(obj):
+        return None
+    if isinstance(obj, dict):
+        return {key: _json_values(val) for key, val in obj.items()}
+    if isinstance(obj, list):
+        return [_json_values(val) for val in obj]
+    return obj
+
+
+class ResultComparison(LoggingBase):
+
+    KEYS = ["benchmark", "memory", "type", "is_cold"]
+    METRICS = ["exec_time", "client_time", "provider_time"]
+    # Thresholds of Cliff's delta magnitude from Romano et al.,
+    # "Appropriate statistics for ordinal level data", 2006.
+    EFFECT_SIZES = [(0.147, "negligible"), (0.33, "small"), (0.474, "medium")]
+
+    @staticmethod
+    def typename() -> str:
+        return "Experiment.ResultComparison"
+
+    def __init__(
+        self,
+        alpha: float = 0.95,
+        min_effect: float = EFFECT_SIZES[0][0],
+        metrics: Sequence[str] = METRICS,
+    ):
+        super().__init__()
+        self._alpha = alpha
+        self._min_effect = min_effect
+        self._metrics = list(metrics)
+
+    @staticmethod
+    def effect_size(delta: float) -> str:
+        for threshold, name in ResultComparison.EFFECT_SIZES:
+            if abs(delta) < threshold:
+                return name
+        return "large"
+
+    """
+        Name of the benchmark with its language and version, read from
+        the configuration stored with results. Without stored configuration,
+        the path of the output directory is used.
+    """
+
+    @staticmethod
+    def _benchmark_name(perf_cost_dir: str, root: str) -> str:
+
+        config = None
+        for metadata in glob.glob(
+            os.path.join(perf_cost_dir, f"*{ColumnarResult.EXTENSION}", ColumnarResult.METADATA)
+        ):
+            with open(metadata, "r") as in_f:
+                config = json.load(in_f)["config"]
+            break
+        if config is None:
+            for log in glob.glob(os.path.join(perf_cost_dir, f"*{ResultLog.EXTENSION}")):
+                config = next(ResultLog.read(log), {}).get("config")
+                break
+        if config is not None:
+            experiments = config["experiments"]
+            runtime = experiments["runtime"]
+            benchmark = experiments["experiments"]["perf-cost"]["benchmark"]
+            return f"{benchmark}/{runtime['language']}-{runtime['version']}"
+
+        name = os.path.relpath(os.path.dirname(perf_cost_dir), root)
+        return os.path.basename(os.path.abspath(root)) if name == os.curdir else name
+
+    """
+        Load processed perf-cost results from all experiments in the directory.
+
+        :return: table with columns of `result.csv` and the benchmark name
+    """
+
+    @staticmethod
+    def load(directory: str):
+
+        import pandas as pd
+
+        paths = glob.glob(os.path.join(directory, "**", "perf-cost", "result.csv"), recursive=True)
+        if os.path.exists(os.path.join(directory, "result.csv")):
+            paths.append(os.path.join(directory, "result.csv"))
+        if len(paths) == 0:
+            raise RuntimeError(
+                f"No processed perf-cost results in {directory}, run experiment process first!"
+            )
+
+        frames = []
+        for path in sorted(set(paths)):
+            frame = pd.read_csv(path)
+            frame["benchmark"] = ResultComparison._benchmark_name(os.path.dirname(path), directory)
+            frames.append(frame)
+        return pd.concat(frames, ignore_index=True)
+
+    @staticmethod
+    def _label(group: tuple, labels: List[list]) -> tuple:
+        codes = np.unravel_index(group[0], [len(values) for values in labels])
+        return tuple(values[code] for code, values in zip(codes, labels))
+
+    """
+        Compare two sets of results.
+
+        :return: verdict, list of compared groups, and groups present in only one set
+            of results, for each metric
+    """
+
+    def compare(self, old_dir: str, new_dir: str) -> dict:
+
+        import pandas as pd
+
+        old = ResultComparison.load(old_dir)
+        new = ResultComparison.load(new_dir)
+        self.logging.info(f"Compare {len(old)} samples of {old_dir} with {len(new)} of {new_dir}")
+        data = pd.concat([old.assign(new=False), new.assign(new=True)], ignore_index=True)
+        # groups are identified by a single integer code,
+        # which is sorted much faster than many keys and arrays of strings
+        codes, labels = [], []
+        for key in ResultComparison.KEYS:
+            key_codes, uniques = pd.factorize(data[key])
+            codes.append(key_codes)
+            labels.append(uniques.tolist())
+        groups = np.ravel_multi_index(codes, [len(values) for values in labels])
+        second = data["new"].to_numpy()
+        # summaries of both sets are computed together, with the set as the lowest bit of groups
+        samples = groups * 2 + second
+
+        comparisons: List[dict] = []
+        missing, added = set(), set()
+        for metric in self._metrics:
+            values = data[metric].to_numpy(dtype=np.float64)
+            summary = group_summary(values, [samples], [50], self._alpha)
+            old_stats = {(key // 2,): val for (key,), val in summary.items() if key % 2 == 0}
+            new_stats = {(key // 2,): val for (key,), val in summary.items() if key % 2 == 1}
+            tests = grouped_mann_whitney(values, [groups], second)
+            for key in old_stats.keys() - new_stats.keys():
+                missing.add((*ResultComparison._label(key, labels), metric))
+            for key in new_stats.keys() - old_stats.keys():
+                added.add((*ResultComparison._label(key, labels), metric))
+            for key in old_stats.keys() & new_stats.keys():
+                comparisons.append(
+                    self._compare_group(
+                        ResultComparison._label(key, labels),
+                        metric,
+                        old_stats[key],
+                        new_stats[key],
+                        tests[key],
+                    )
+                )
+
+        comparisons.sort(key=lambda comp: [str(comp[key]) for key in ResultComparison.KEYS])
+        regressions = sum(comp["status"] == "regression" for comp in comparisons)
+        improvements = sum(comp["status"] == "improvement" for comp in comparisons)
+        group_keys = ResultComparison.KEYS + ["metric"]
+        if regressions > 0:
+            verdict = "regression"
+        elif improvements > 0:
+            verdict = "improvement"
+        else:
+            verdict = "unchanged"
+        return {
+            "verdict": verdict,
+            "old": os.path.abspath(old_dir),
+            "new": os.path.abspath(new_dir),
+            "alpha": self._alpha,
+            "min_effect": self._min_effect,
+            "regressions": regressions,
+            "improvements": improvements,
+            "comparisons": comparisons,
+            "missing": [dict(zip(group_keys, key)) for key in sorted(missing, key=str)],
+            "added": [dict(zip(group_keys, key)) for key in sorted(added, key=str)],
+        }
+
+    """
+        Positive change and effect size mean that new values are larger,
+        i.e., a regression of times. The overlap of confidence intervals
+        is not known when a group has too few samples, and such a change
+        is not significant.
+    """
+
+    def _compare_group(self, key: tuple, metric: str, old, new, test) -> dict:
+
+        old_median, new_median = old.percentiles[50], new.percentiles[50]
+        ci_overlap: Optional[bool] = None
+        if not any(math.isnan(val) for val in (*old.ci, *new.ci)):
+            ci_overlap = not (new.ci[0] > old.ci[1] or new.ci[1] < old.ci[0])
+        significant = (
+            not math.isnan(test.p)
+            and test.p < 1 - self._alpha
+            and abs(test.cliffs_delta) >= self._min_effect
+            and ci_overlap is False
+        )
+        if significant:
+            status = "regression" if test.cliffs_delta > 0 else "improvement"
+        else:
+            status = "unchanged"
+        return {
+            **dict(zip(ResultComparison.KEYS, key)),
+            "metric": metric,
+            "old_count": old.count,
+            "new_count": new.count,
+            "old_median": old_median,
+            "new_median": new_median,
+            "change": (new_median - old_median) / old_median * 100 if old_median else math.nan,
+            "old_ci": list(old.ci),
+            "new_ci": list(new.ci),
+            "ci_overlap": ci_overlap,
+            "u": test.u,
+            "p_value": test.p,
+            "cliffs_delta": test.cliffs_delta,
+            "effect_size": ResultComparison.effect_size(test.cliffs_delta),
+            "status": status,
+        }
+
+    """
+        Write the verdict with all comparisons to `comparison.json`
+        and the table of significant changes to `comparison.csv`.
+    """
+
+    def write(self, directory: str, result: dict):
+
+        with open(os.path.join(directory, "comparison.json"), "w") as out_f:
+            out_f.write(serialize(_json_values(result)))
+
+        columns = ResultComparison.KEYS + [
+            "metric",
+            "old_count",
+            "new_count",
+            "old_median",
+            "new_median",
+            "change",
+            "p_value",
+            "cliffs_delta",
+            "effect_size",
+            "status",
+        ]
+        changes = [comp for comp in result["comparisons"] if comp["status"] != "unchanged"]
+        with open(os.path.join(directory, "comparison.csv"), "w") as csvfile:
+            writer = csv.writer(csvfile, delimiter=",")
+            writer.writerow(columns)
+            for comp in changes:
+                writer.writerow([comp[column] for column in columns])
+
+        for comp in changes:
+            self.logging.info(
+                f"{comp['status'].capitalize()}: {comp['benchmark']}, memory {comp['memory']}, "
+                f"{comp['type']}, cold {comp['is_cold']}, {comp['metric']} median "
+                f"{comp['old_median']:.2f} -> {comp['new_median']:.2f} "
+                f"({comp['change']:+.2f}%), p {comp['p_value']:.2g}, "
+                f"{comp['effect_size']} effect {comp['cliffs_delta']:+.3f}"
+            )
+        for name in ("missing", "added"):
+            for group in result[name]:
+                self.logging.info(f"Configuration {name} in new results: {group}")
+        self.logging.info(
+            f"Verdict: {result['verdict']}, {result['regressions']} regressions, "
+            f"{result['improvements']} improvements in {len(result['comparisons'])} comparisons"
+        )
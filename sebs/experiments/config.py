@@ -52,6 +52,7 @@ class Config:
         self._download_results: bool = False
         self._flags: Dict[str, bool] = {}
         self._experiment_configs: Dict[str, dict] = {}
+        self._benchmark_inputs: Dict[str, dict] = {}
         self._runtime = Runtime()
 
     @property
@@ -76,6 +77,14 @@ class Config:
     def experiment_settings(self, name: str) -> dict:
         return self._experiment_configs[name]
 
+    """
+        Values overriding the input generated for a benchmark,
+        e.g., to select a variant of the function.
+    """
+
+    def benchmark_input(self, benchmark: str) -> dict:
+        return self._benchmark_inputs.get(benchmark, {})
+
     def serialize(self) -> dict:
         out = {
             "update_code": self._update_code,
@@ -84,6 +93,7 @@ class Config:
             "runtime": self._runtime.serialize(),
             "flags": self._flags,
             "experiments": self._experiment_configs,
+            "benchmark-input": self._benchmark_inputs,
         }
         return out
 
@@ -97,6 +107,7 @@ class Config:
         cfg._download_results = config["download_results"]
         cfg._runtime = Runtime.deserialize(config["runtime"])
         cfg._flags = config["flags"] if "flags" in config else {}
+        cfg._benchmark_inputs = config.get("benchmark-input", {})
 
         from sebs.experiments import (
             NetworkPingPong,
@@ -2,7 +2,7 @@ import logging
 import os
 import time
 from datetime import datetime
-from typing import List, TYPE_CHECKING
+from typing import Dict, List, TYPE_CHECKING
 import multiprocessing
 from multiprocessing.pool import ThreadPool
 
@@ -10,6 +10,7 @@ from sebs.faas.system import System as FaaSSystem
 from sebs.faas.function import Function, Trigger
 from sebs.experiments import Experiment, ExperimentResult
 from sebs.experiments.config import Config as ExperimentConfig
+from sebs.experiments.result_log import ResultLog
 from sebs.utils import serialize
 
 if TYPE_CHECKING:
@@ -177,6 +178,21 @@ class EvictionModel(Experiment):
                 raise RuntimeError()
         return final_results
 
+    """
+        Group invocations stored in the log by sleep time and repetition.
+    """
+
+    @staticmethod
+    def assemble_results(log_path: str, repetitions: int) -> Dict[int, List[List[dict]]]:
+        results: Dict[int, List[List[dict]]] = {
+            t: [[] for _ in range(repetitions)] for t in EvictionModel.times
+        }
+        for record in ResultLog.read(log_path):
+            if record["type"] == "record":
+                data = record["data"]
+                results[data.pop("time")][data["repetition"]].append(data)
+        return results
+
     def prepare(self, sebs_client: "SeBS", deployment_client: FaaSSystem):
 
         from sebs import Benchmark
@@ -221,7 +237,6 @@ class EvictionModel(Experiment):
         """
         function_names = self.functions_names[invocation_idx :: self.function_copies_per_time]
         functions = self.functions[invocation_idx :: self.function_copies_per_time]
-        results = {}
 
         # Disable logging - otherwise we have RLock that can't get be pickled
         for func in functions:
@@ -231,10 +246,8 @@ class EvictionModel(Experiment):
         # self.disable_logging()
         # del self.logging
 
-        for t in self.times:
-            results[t] = []
-
-        fname = f"results_{invocations}_{repetitions}_{sleep}.json"
+        fname = f"results_{invocations}_{repetitions}_{sleep}"
+        log_path = os.path.join(self._out_dir, f"{fname}{ResultLog.EXTENSION}")
 
         """
             Allocate one process for each invocation => process N invocations in parallel.
@@ -244,7 +257,11 @@ class EvictionModel(Experiment):
             The result: repeated N invocations for M different imes.
         """
         threads = len(self.times)
-        with multiprocessing.Pool(processes=(invocations + threads)) as pool:
+        with multiprocessing.Pool(processes=(invocations + threads)) as pool, ResultLog(
+            log_path
+        ) as log:
+            self._result.begin()
+            log.begin(self._result)
             for i in range(0, repetitions):
                 """
                     Attempt to kill all existing containers.
@@ -252,8 +269,6 @@ class EvictionModel(Experiment):
                 # for func in functions:
                 #    self._deployment_client.enforce_cold_start(func)
                 # time.sleep(5)
-                for _, t in enumerate(self.times):
-                    results[t].append([])
                 local_results = []
                 servers_results = []
 
@@ -291,7 +306,7 @@ class EvictionModel(Experiment):
                 for result in local_results:
                     ret = result.get()
                     for i, val in enumerate(ret):
-                        results[self.times[i]][-1].append(val)
+                        log.add_record({"time": self.times[i], **val})
 
                 """
                     Make sure that parallel invocations are truly parallel,
@@ -299,10 +314,14 @@ class EvictionModel(Experiment):
                 """
                 # verify_results(results)
 
-            with open(os.path.join(self._out_dir, fname), "w") as out_f:
-                # print(results)
-                print(f"Write results to {os.path.join(self._out_dir, fname)}")
-                out_f.write(serialize(results))
+            self._result.end()
+            log.end(self._result)
+
+        results = EvictionModel.assemble_results(log_path, repetitions)
+        with open(os.path.join(self._out_dir, f"{fname}.json"), "w") as out_f:
+            # print(results)
+            print(f"Write results to {os.path.join(self._out_dir, fname)}.json")
+            out_f.write(serialize(results))
         # func = self._deployment_client.get_function(
         #    self._benchmark, self.functions_names[0]
         # )
@@ -6,15 +6,26 @@ import os
 import time
 from enum import Enum
 from multiprocessing.pool import ThreadPool
-from typing import List, TYPE_CHECKING
+from typing import Dict, List, Optional, Tuple, TYPE_CHECKING
 
+from sebs.cache import Cache
 from sebs.faas.system import System as FaaSSystem
 from sebs.faas.function import Trigger
+from sebs.experiments.columnar import ColumnarResult
 from sebs.experiments.experiment import Experiment
+from sebs.experiments.progress import ExperimentProgress, ProgressServer
 from sebs.experiments.result import Result as ExperimentResult
+from sebs.experiments.result_log import ResultLog
 from sebs.experiments.config import Config as ExperimentConfig
-from sebs.utils import serialize
-from sebs.statistics import basic_stats, ci_tstudents, ci_le_boudec
+from sebs.utils import LoggingHandlers, serialize
+from sebs.statistics import (
+    basic_stats,
+    ci_bootstrap,
+    ci_tstudents,
+    ci_le_boudec,
+    group_summary,
+    percentiles,
+)
 
 # import cycle
 if TYPE_CHECKING:
@@ -22,8 +33,20 @@ if TYPE_CHECKING:
 
 
 class PerfCost(Experiment):
+
+    # Fields of invocations written to result.csv after memory and experiment type.
+    CSV_FIELDS = [
+        "stats.cold_start",
+        "times.benchmark",
+        "times.http_startup",
+        "times.client",
+        "provider_times.execution",
+        "stats.memory_used",
+    ]
+
     def __init__(self, config: ExperimentConfig):
         super().__init__(config)
+        self._progress_server: Optional[ProgressServer] = None
 
     @staticmethod
     def name() -> str:
@@ -75,22 +98,32 @@ class PerfCost(Experiment):
 
         settings = self.config.experiment_settings(self.name())
 
-        # Execution on systems where memory configuration is not provided
-        memory_sizes = settings["memory-sizes"]
-        if len(memory_sizes) == 0:
-            self.logging.info("Begin experiment")
-            self.run_configuration(settings, settings["repetitions"])
-        for memory in memory_sizes:
-            self.logging.info(f"Begin experiment on memory size {memory}")
-            self._function.memory = memory
-            self._deployment_client.update_function(self._function, self._benchmark)
-            self._sebs_client.cache_client.update_function(self._function)
-            self.run_configuration(settings, settings["repetitions"], suffix=str(memory))
+        if settings.get("metrics-port") is not None:
+            self._progress_server = ProgressServer(settings["metrics-port"])
+            self._progress_server.start()
+
+        try:
+            # Execution on systems where memory configuration is not provided
+            memory_sizes = settings["memory-sizes"]
+            if len(memory_sizes) == 0:
+                self.logging.info("Begin experiment")
+                self.run_configuration(settings, settings["repetitions"])
+            for memory in memory_sizes:
+                self.logging.info(f"Begin experiment on memory size {memory}")
+                self._function.memory = memory
+                self._deployment_client.update_function(self._function, self._benchmark)
+                self._sebs_client.cache_client.update_function(self._function)
+                self.run_configuration(settings, settings["repetitions"], suffix=str(memory))
+        finally:
+            if self._progress_server is not None:
+                self._progress_server.stop()
 
     def compute_statistics(self, times: List[float]):
 
         mean, median, std, cv = basic_stats(times)
         self.logging.info(f"Mean {mean}, median {median}, std {std}, CV {cv}")
+        p90, p99 = percentiles(times, [90, 99])
+        self.logging.info(f"Percentiles: 90th {p90}, 99th {p99}")
         for alpha in [0.95, 0.99]:
             ci_interval = ci_tstudents(alpha, times)
             interval_width = ci_interval[1] - ci_interval[0]
@@ -108,6 +141,10 @@ class PerfCost(Experiment):
                     f"Non-parametric CI {alpha} from {ci_interval[0]} to "
                     f"{ci_interval[1]}, within {ratio}% of median"
                 )
+                ci_interval = ci_bootstrap(alpha, times)
+                self.logging.info(
+                    f"Bootstrap CI {alpha} of median from {ci_interval[0]} to {ci_interval[1]}"
+                )
 
     def _run_configuration(
         self,
@@ -128,106 +165,113 @@ class PerfCost(Experiment):
         """
             Cold experiment: schedule all invocations in parallel.
         """
-        file_name = (
-            f"{run_type.str()}_results_{suffix}.json"
-            if suffix
-            else f"{run_type.str()}_results.json"
-        )
+        file_name = f"{run_type.str()}_results_{suffix}" if suffix else f"{run_type.str()}_results"
+        path = os.path.join(self._out_dir, file_name)
         self.logging.info(f"Begin {run_type.str()} experiments")
         incorrect_executions = []
         error_executions = []
         error_count = 0
         incorrect_count = 0
         colds_count = 0
-        with open(os.path.join(self._out_dir, file_name), "w") as out_f:
-            samples_gathered = 0
-            client_times = []
-            with ThreadPool(invocations) as pool:
-                result = ExperimentResult(self.config, self._deployment_client.config)
-                result.begin()
-                samples_generated = 0
-
-                # Warm up container
-                # For "warm" runs, we do it automatically by pruning cold results
-                if run_type == PerfCost.RunType.SEQUENTIAL:
-                    self._trigger.sync_invoke(self._benchmark_input)
-
-                first_iteration = True
-                while samples_gathered < repetitions:
-
-                    if run_type == PerfCost.RunType.COLD or run_type == PerfCost.RunType.BURST:
-                        self._deployment_client.enforce_cold_start(
-                            [self._function], self._benchmark
-                        )
-
-                    time.sleep(5)
+        samples_gathered = 0
+        client_times = []
+        progress = ExperimentProgress(
+            self.name(),
+            {"type": run_type.str(), "memory": suffix if suffix else "default"},
+            repetitions,
+            settings.get("progress-interval", 30),
+        )
+        if self._progress_server is not None:
+            self._progress_server.progress = progress
+        # Invocations are written to the log as they complete and are not kept in memory.
+        with ThreadPool(invocations) as pool, ResultLog(f"{path}{ResultLog.EXTENSION}") as log:
+            result = ExperimentResult(self.config, self._deployment_client.config)
+            result.begin()
+            log.begin(result)
+            samples_generated = 0
+
+            # Warm up container
+            # For "warm" runs, we do it automatically by pruning cold results
+            if run_type == PerfCost.RunType.SEQUENTIAL:
+                self._trigger.sync_invoke(self._benchmark_input)
+
+            first_iteration = True
+            while samples_gathered < repetitions:
+
+                if run_type == PerfCost.RunType.COLD or run_type == PerfCost.RunType.BURST:
+                    self._deployment_client.enforce_cold_start([self._function], self._benchmark)
+
+                time.sleep(5)
+
+                results = []
+                for i in range(0, invocations):
+                    results.append(
+                        pool.apply_async(self._trigger.sync_invoke, args=(self._benchmark_input,))
+                    )
 
-                    results = []
-                    for i in range(0, invocations):
-                        results.append(
-                            pool.apply_async(
-                                self._trigger.sync_invoke, args=(self._benchmark_input,)
+                incorrect = []
+                for res in results:
+                    try:
+                        ret = res.get()
+                        if first_iteration:
+                            continue
+                        if (run_type == PerfCost.RunType.COLD and not ret.stats.cold_start) or (
+                            run_type == PerfCost.RunType.WARM and ret.stats.cold_start
+                        ):
+                            self.logging.info(
+                                f"Invocation {ret.request_id} "
+                                f"cold: {ret.stats.cold_start} "
+                                f"on experiment {run_type.str()}!"
                             )
-                        )
-
-                    incorrect = []
-                    for res in results:
-                        try:
-                            ret = res.get()
-                            if first_iteration:
-                                continue
-                            if (run_type == PerfCost.RunType.COLD and not ret.stats.cold_start) or (
-                                run_type == PerfCost.RunType.WARM and ret.stats.cold_start
-                            ):
-                                self.logging.info(
-                                    f"Invocation {ret.request_id} "
-                                    f"cold: {ret.stats.cold_start} "
-                                    f"on experiment {run_type.str()}!"
-                                )
-                                incorrect.append(ret)
-                            else:
-                                result.add_invocation(self._function, ret)
-                                colds_count += ret.stats.cold_start
-                                client_times.append(ret.times.client / 1000.0)
-                                samples_gathered += 1
-                        except Exception as e:
-                            error_count += 1
-                            error_executions.append(str(e))
+                            incorrect.append(ret)
+                            progress.add_incorrect()
+                        else:
+                            log.add_invocation(self._function, ret)
+                            colds_count += ret.stats.cold_start
+                            client_times.append(ret.times.client / 1000.0)
+                            samples_gathered += 1
+                            progress.add_invocation(ret)
+                    except Exception as e:
+                        error_count += 1
+                        error_executions.append(str(e))
+                        progress.add_error()
+                self.logging.info(
+                    f"Processed {samples_gathered} samples out of {repetitions},"
+                    f"{error_count} errors"
+                )
+                samples_generated += invocations
+                if first_iteration:
                     self.logging.info(
-                        f"Processed {samples_gathered} samples out of {repetitions},"
-                        f"{error_count} errors"
+                        f"Processed {samples_gathered} warm-up samples, ignore results."
                     )
-                    samples_generated += invocations
-                    if first_iteration:
-                        self.logging.info(
-                            f"Processed {samples_gathered} warm-up samples, ignore results."
-                        )
 
-                    first_iteration = False
-
-                    if len(incorrect) > 0:
-                        incorrect_executions.extend(incorrect)
-                        incorrect_count += len(incorrect)
-
-                    time.sleep(5)
-
-                result.end()
-                self.compute_statistics(client_times)
-                out_f.write(
-                    serialize(
-                        {
-                            **json.loads(serialize(result)),
-                            "statistics": {
-                                "samples_generated": samples_gathered,
-                                "failures": error_executions,
-                                "failures_count": error_count,
-                                "incorrect": incorrect_executions,
-                                "incorrect_count": incorrect_count,
-                                "cold_count": colds_count,
-                            },
-                        }
-                    )
-                )
+                first_iteration = False
+
+                if len(incorrect) > 0:
+                    incorrect_executions.extend(incorrect)
+                    incorrect_count += len(incorrect)
+
+                time.sleep(5)
+
+            result.end()
+            progress.report(force=True)
+            self.compute_statistics(client_times)
+            log.end(
+                result,
+                {
+                    "statistics": {
+                        "samples_generated": samples_gathered,
+                        "failures": error_executions,
+                        "failures_count": error_count,
+                        "incorrect": incorrect_executions,
+                        "incorrect_count": incorrect_count,
+                        "cold_count": colds_count,
+                    }
+                },
+            )
+        PerfCost._write_log(
+            path, settings.get("export-json", False), settings.get("keep-log", False)
+        )
 
     def run_configuration(self, settings: dict, repetitions: int, suffix: str = ""):
 
@@ -275,7 +319,21 @@ class PerfCost(Experiment):
         import glob
         import csv
 
-        with open(os.path.join(directory, "perf-cost", "result.csv"), "w") as csvfile:
+        settings = self.config.experiment_settings(self.name())
+        export_json = settings.get("export-json", False)
+        out_dir = os.path.join(directory, "perf-cost")
+        handlers = sebs_client.logging_handlers(logging_filename)
+
+        # Each result is processed once, preferring the columnar format over JSON export.
+        # Logs are processed only when the experiment was interrupted before conversion.
+        formats = [ColumnarResult.EXTENSION, ".json", ResultLog.EXTENSION]
+        results: Dict[str, str] = {}
+        for extension in formats:
+            for f in glob.glob(os.path.join(out_dir, f"*{extension}")):
+                name, _ = os.path.splitext(f)
+                results.setdefault(name, extension)
+
+        with open(os.path.join(out_dir, "result.csv"), "w") as csvfile:
             writer = csv.writer(csvfile, delimiter=",")
             writer.writerow(
                 [
@@ -289,17 +347,13 @@ class PerfCost(Experiment):
                     "mem_used",
                 ]
             )
-            for f in glob.glob(os.path.join(directory, "perf-cost", "*.json")):
-                name, extension = os.path.splitext(f)
-                if "processed" in f:
-                    with open(f) as in_f:
-                        config = json.load(in_f)
-                        experiments = ExperimentResult.deserialize(
-                            config,
-                            sebs_client.cache_client,
-                            sebs_client.logging_handlers(logging_filename),
-                        )
-                    fname = os.path.splitext(os.path.basename(f))[0].split("_")
+            # values of all rows, summarized at the end
+            columns: List[list] = [[] for _ in range(8)]
+            for name, extension in sorted(results.items()):
+                f = f"{name}{extension}"
+                fname = os.path.basename(name).split("_")
+                if "processed" in name:
+                    experiments, _ = PerfCost._load_result(f, sebs_client.cache_client, handlers)
                     if len(fname) > 2:
                         memory = int(fname[2].split("-")[0])
                     else:
@@ -307,70 +361,153 @@ class PerfCost(Experiment):
                     exp_type = fname[0]
                 else:
 
-                    if os.path.exists(
-                        os.path.join(directory, "perf-cost", f"{name}-processed{extension}")
-                    ):
+                    if f"{name}-processed" in results:
                         self.logging.info(f"Skipping already processed {f}")
                         continue
                     self.logging.info(f"Processing data in {f}")
-                    fname = os.path.splitext(os.path.basename(f))[0].split("_")
                     if len(fname) > 2:
                         memory = int(fname[2])
                     else:
                         memory = 0
                     exp_type = fname[0]
-                    with open(f, "r") as in_f:
-                        config = json.load(in_f)
-                        statistics = config["statistics"]
-                        experiments = ExperimentResult.deserialize(
-                            config,
-                            sebs_client.cache_client,
-                            sebs_client.logging_handlers(logging_filename),
+                    experiments, statistics = PerfCost._load_result(
+                        f, sebs_client.cache_client, handlers
+                    )
+                    for func in experiments.functions():
+                        if extend_time_interval > 0:
+                            times = [
+                                -extend_time_interval * 60 + experiments.times()[0],
+                                extend_time_interval * 60 + experiments.times()[1],
+                            ]
+                        else:
+                            times = experiments.times()
+                        deployment_client.download_metrics(
+                            func,
+                            *times,
+                            experiments.invocations(func),
+                            experiments.metrics(func),
                         )
-                        for func in experiments.functions():
-                            if extend_time_interval > 0:
-                                times = [
-                                    -extend_time_interval * 60 + experiments.times()[0],
-                                    extend_time_interval * 60 + experiments.times()[1],
-                                ]
-                            else:
-                                times = experiments.times()
-                            deployment_client.download_metrics(
-                                func,
-                                *times,
-                                experiments.invocations(func),
-                                experiments.metrics(func),
-                            )
-                        # compress! remove output since it can be large but it's useless for us
-                        for func in experiments.functions():
-                            for id, invoc in experiments.invocations(func).items():
-                                # FIXME: compatibility with old results
-                                if "output" in invoc.output["result"]:
-                                    del invoc.output["result"]["output"]
-                                elif "result" in invoc.output["result"]:
-                                    del invoc.output["result"]["result"]
-
-                        name, extension = os.path.splitext(f)
-                        with open(
-                            os.path.join(directory, "perf-cost", f"{name}-processed{extension}"),
-                            "w",
-                        ) as out_f:
-                            out_f.write(
-                                serialize(
-                                    {**json.loads(serialize(experiments)), "statistics": statistics}
-                                )
-                            )
+                    # compress! remove output since it can be large but it's useless for us
+                    # outputs are not stored in the columnar format
+                    for func in experiments.functions():
+                        for id, invoc in experiments.invocations(func).items():
+                            if "result" not in invoc.output:
+                                continue
+                            # FIXME: compatibility with old results
+                            if "output" in invoc.output["result"]:
+                                del invoc.output["result"]["output"]
+                            elif "result" in invoc.output["result"]:
+                                del invoc.output["result"]["result"]
+
+                    PerfCost._write_result(
+                        f"{name}-processed",
+                        experiments,
+                        statistics,
+                        export_json or extension == ".json",
+                    )
                 for func in experiments.functions():
-                    for request_id, invoc in experiments.invocations(func).items():
-                        writer.writerow(
-                            [
-                                memory,
-                                exp_type,
-                                invoc.stats.cold_start,
-                                invoc.times.benchmark,
-                                invoc.times.http_startup,
-                                invoc.times.client,
-                                invoc.provider_times.execution,
-                                invoc.stats.memory_used,
-                            ]
+                    fields = experiments.project(func, PerfCost.CSV_FIELDS)
+                    count = len(experiments.invocations(func))
+                    values = [[memory] * count, [exp_type] * count] + [
+                        fields[field] for field in PerfCost.CSV_FIELDS
+                    ]
+                    writer.writerows(zip(*values))
+                    for column, vals in zip(columns, values):
+                        column.extend(vals)
+
+        self._write_summary(os.path.join(out_dir, "result-summary.csv"), columns)
+
+    """
+        Summarize times of each memory configuration, experiment type, and startup type.
+
+        :param columns: columns of result.csv
+    """
+
+    def _write_summary(self, path: str, columns: List[list]):
+
+        import csv
+
+        memory, exp_type, is_cold, exec_time, _, client_time, provider_time, _ = columns
+        q = [50, 90, 95, 99]
+        with open(path, "w") as csvfile:
+            writer = csv.writer(csvfile, delimiter=",")
+            writer.writerow(
+                ["memory", "type", "is_cold", "metric", "count", "mean", "std", "cv", "min"]
+                + [f"p{p}" for p in q]
+                + ["max", "ci_95_low", "ci_95_high"]
+            )
+            for metric, values in [
+                ("exec_time", exec_time),
+                ("client_time", client_time),
+                ("provider_time", provider_time),
+            ]:
+                summary = group_summary(values, [memory, exp_type, is_cold], q, 0.95)
+                for key, stats in summary.items():
+                    writer.writerow(
+                        [*key, metric, stats.count, stats.mean, stats.std, stats.cv, stats.min]
+                        + [stats.percentiles[p] for p in q]
+                        + [stats.max, *stats.ci]
+                    )
+                    if metric == "client_time":
+                        self.logging.info(
+                            f"Memory {key[0]}, {key[1]}, cold {key[2]}: {stats.count} samples, "
+                            f"median {stats.percentiles[50]}, p99 {stats.percentiles[99]}"
                         )
+
+    """
+        Store results in the columnar format and, optionally, export them to JSON.
+
+        :param path: path of results without the extension
+    """
+
+    @staticmethod
+    def _write_result(
+        path: str, result: ExperimentResult, statistics: dict, export_json: bool = False
+    ):
+        ColumnarResult.write(
+            f"{path}{ColumnarResult.EXTENSION}", result, {"statistics": statistics}
+        )
+        if export_json:
+            with open(f"{path}.json", "w") as out_f:
+                out_f.write(serialize({**json.loads(serialize(result)), "statistics": statistics}))
+
+    """
+        Convert the log of invocations to the columnar format and, optionally, export to JSON.
+        The log holds outputs of all invocations and is removed after the conversion,
+        unless it is kept explicitly.
+
+        :param path: path of results without the extension
+    """
+
+    @staticmethod
+    def _write_log(path: str, export_json: bool = False, keep_log: bool = False):
+        log_path = f"{path}{ResultLog.EXTENSION}"
+        ColumnarResult.write_log(f"{path}{ColumnarResult.EXTENSION}", log_path)
+        if export_json:
+            ResultLog.export_json(log_path, f"{path}.json")
+        if not keep_log:
+            os.remove(log_path)
+
+    """
+        Load results stored in the columnar format, in JSON, or in the log.
+
+        :return: experiment result and its statistics
+    """
+
+    @staticmethod
+    def _load_result(
+        path: str, cache: Cache, handlers: LoggingHandlers
+    ) -> Tuple[ExperimentResult, dict]:
+        if ColumnarResult.is_columnar(path):
+            columnar = ColumnarResult(path)
+            return columnar.to_result(cache, handlers), columnar.statistics
+        if path.endswith(ResultLog.EXTENSION):
+            result, extra = ResultLog.assemble(path, cache, handlers)
+            return result, extra.get("statistics", {})
+        with open(path, "r") as in_f:
+            config = json.load(in_f)
+        # outputs are not needed for processing
+        result = ExperimentResult.deserialize(
+            config, cache, handlers, lazy=True, include_output=False
+        )
+        return result, config.get("statistics", {})
@@ -0,0 +1,192 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+
+from sebs.faas.function import ExecutionResult
+from sebs.statistics import OnlineStats, QuantileSketch
+from sebs.utils import LoggingBase
+
+"""
+    Live statistics of a running experiment.
+
+    Each invocation updates counters and streaming estimators of client and
+    benchmark times in constant time and memory. A summary is logged
+    periodically, and the optional HTTP server exposes the values in the
+    Prometheus text format, e.g., to watch long runs in a browser with
+    `curl localhost:<port>/metrics` and abort bad configurations early.
+"""
+
+
+class ExperimentProgress(LoggingBase):
+
+    QUANTILES = [0.5, 0.9, 0.99]
+
+    @staticmethod
+    def typename() -> str:
+        return "Experiment.Progress"
+
+    def __init__(
+        self,
+        experiment: str,
+        labels: Dict[str, str],
+        expected: int,
+        report_interval: float = 30.0,
+    ):
+        super().__init__()
+        self._experiment = experiment
+        self._labels = labels
+        self._expected = expected
+        self._report_interval = report_interval
+        self._lock = threading.Lock()
+        self._begin = time.monotonic()
+        self._last_report = self._begin
+        self.invocations = 0
+        self.errors = 0
+        self.incorrect = 0
+        self.cold_starts = 0
+        # times in milliseconds
+        self._times = {
+            "client": (OnlineStats(), QuantileSketch()),
+            "benchmark": (OnlineStats(), QuantileSketch()),
+        }
+
+    def add_invocation(self, result: ExecutionResult):
+        with self._lock:
+            self.invocations += 1
+            self.cold_starts += result.stats.cold_start
+            for name, val in (
+                ("client", result.times.client),
+                ("benchmark", result.times.benchmark),
+            ):
+                stats, sketch = self._times[name]
+                stats.add(val / 1000.0)
+                sketch.add(val / 1000.0)
+        self.report()
+
+    def add_error(self):
+        with self._lock:
+            self.errors += 1
+        self.report()
+
+    def add_incorrect(self):
+        with self._lock:
+            self.incorrect += 1
+        self.report()
+
+    @property
+    def throughput(self) -> float:
+        elapsed = time.monotonic() - self._begin
+        return self.invocations / elapsed if elapsed > 0 else 0.0
+
+    """
+        Log the summary when the report interval has passed since the last report.
+
+        :param force: log the summary regardless of the interval
+    """
+
+    def report(self, force: bool = False):
+
+        now = time.monotonic()
+        with self._lock:
+            if not force and now - self._last_report < self._report_interval:
+                return
+            self._last_report = now
+            stats, sketch = self._times["client"]
+            labels = ", ".join(f"{key} {val}" for key, val in self._labels.items())
+            quantiles = ", ".join(
+                f"p{int(q * 100)} {sketch.quantile(q):.2f}" for q in ExperimentProgress.QUANTILES
+            )
+            cold_ratio = self.cold_starts / self.invocations if self.invocations else 0.0
+            self.logging.info(
+                f"[{labels}] {self.invocations}/{self._expected} invocations, "
+                f"{self.errors} errors, {self.incorrect} incorrect, "
+                f"cold ratio {cold_ratio:.2f}, {self.throughput:.2f} invocations/s, "
+                f"client time [ms]: mean {stats.mean:.2f}, std {stats.std:.2f}, {quantiles}"
+            )
+
+    """
+        Values in the Prometheus text exposition format.
+    """
+
+    def metrics_text(self) -> str:
+
+        all_labels = {"experiment": self._experiment, **self._labels}
+        labels = ",".join(f'{key}="{val}"' for key, val in all_labels.items())
+        lines: List[str] = []
+
+        def metric(name: str, metric_type: str, help_text: str, values: List[tuple]):
+            lines.append(f"# HELP sebs_{name} {help_text}")
+            lines.append(f"# TYPE sebs_{name} {metric_type}")
+            for suffix, extra_labels, val in values:
+                series_labels = ",".join(filter(None, [labels, extra_labels]))
+                lines.append(f"sebs_{name}{suffix}{{{series_labels}}} {val}")
+
+        with self._lock:
+            for name, metric_type, help_text, val in [
+                ("invocations_total", "counter", "Samples gathered.", self.invocations),
+                ("errors_total", "counter", "Failed invocations.", self.errors),
+                ("incorrect_total", "counter", "Wrong startup type.", self.incorrect),
+                ("cold_starts_total", "counter", "Cold startups among samples.", self.cold_starts),
+                ("expected_invocations", "gauge", "Number of samples to gather.", self._expected),
+                ("throughput", "gauge", "Samples per second.", self.throughput),
+            ]:
+                metric(name, metric_type, help_text, [("", "", val)])
+            for name, (stats, sketch) in self._times.items():
+                values = [
+                    ("", f'quantile="{q}"', sketch.quantile(q))
+                    for q in ExperimentProgress.QUANTILES
+                ]
+                values.append(("_sum", "", stats.mean * stats.count))
+                values.append(("_count", "", stats.count))
+                help_text = f"{name.capitalize()} time in milliseconds."
+                metric(f"{name}_time_ms", "summary", help_text, values)
+        return "\n".join(lines) + "\n"
+
+
+"""
+    HTTP server exposing the progress of the current experiment configuration
+    at `/metrics`. Requests are served from a daemon thread.
+"""
+
+
+class ProgressServer(LoggingBase):
+    @staticmethod
+    def typename() -> str:
+        return "Experiment.ProgressServer"
+
+    def __init__(self, port: int, address: str = "127.0.0.1"):
+        super().__init__()
+        self.progress: Optional[ExperimentProgress] = None
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = (server.progress.metrics_text() if server.progress else "").encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._address = address
+        self._server = ThreadingHTTPServer((address, port), Handler)
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def port(self) -> int:
+        return self._server.server_address[1]
+
+    def start(self):
+        self._thread.start()
+        self.logging.info(f"Serve experiment metrics at http://{self._address}:{self.port}/metrics")
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
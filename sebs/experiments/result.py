@@ -1,5 +1,6 @@
+from collections.abc import Mapping
 from datetime import datetime
-from typing import Dict, List, Optional, Tuple  # noqa
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple  # noqa
 
 from sebs.cache import Cache
 from sebs.faas.config import Config as DeploymentConfig
@@ -8,6 +9,84 @@ from sebs.utils import LoggingHandlers
 from sebs.experiments.config import Config as ExperimentConfig
 
 
+"""
+    Invocations of a single function, deserialized on first access.
+
+    Records are kept as parsed JSON dictionaries until an invocation is
+    requested, and accessed invocations are cached; changes to them, e.g.,
+    provider metrics, are preserved on serialization.
+    Without `include_output`, function outputs are not copied into results.
+"""
+
+
+class LazyInvocations(Mapping):
+    def __init__(self, records: Dict[str, dict], include_output: bool = True):
+        self._records = records
+        self._include_output = include_output
+        self._results: Dict[str, ExecutionResult] = {}
+
+    def __getitem__(self, request_id: str) -> ExecutionResult:
+        result = self._results.get(request_id)
+        if result is None:
+            record = self._records[request_id]
+            if not self._include_output:
+                record = {**record, "output": {}}
+            result = ExecutionResult.deserialize(record)
+            self._results[request_id] = result
+        return result
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._records)
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def __setitem__(self, request_id: str, result: ExecutionResult):
+        self._records[request_id] = {}
+        self._results[request_id] = result
+
+    """
+        Values of selected fields without deserializing invocations.
+        Fields are given as paths, e.g., `times.client` or `billing.memory`.
+
+        :return: list of values for each field, None for missing values
+    """
+
+    def project(self, fields: Sequence[str]) -> Dict[str, list]:
+
+        paths = [field.split(".") for field in fields]
+        values: Dict[str, list] = {field: [] for field in fields}
+        for request_id, record in self._records.items():
+            result = self._results.get(request_id)
+            if result is not None:
+                record = result.serialize()
+            for field, path in zip(fields, paths):
+                values[field].append(LazyInvocations._field(record, path))
+        return values
+
+    @staticmethod
+    def _field(record: dict, path: List[str]):
+        val = record
+        for key in path:
+            if not isinstance(val, dict):
+                return None
+            # attributes behind properties are serialized with an underscore
+            val = val[key] if key in val else val.get(f"_{key}")
+        return val
+
+    def serialize(self) -> dict:
+        ret = {}
+        for request_id, record in self._records.items():
+            result = self._results.get(request_id)
+            if result is not None:
+                ret[request_id] = result.serialize()
+            elif not self._include_output:
+                ret[request_id] = {**record, "output": {}}
+            else:
+                ret[request_id] = record
+        return ret
+
+
 class Result:
     def __init__(
         self,
@@ -57,17 +136,49 @@ class Result:
     def invocations(self, func: str) -> Dict[str, ExecutionResult]:
         return self._invocations[func]
 
+    """
+        Values of selected fields of all invocations of a function,
+        without building invocation objects of lazily loaded results.
+        Fields are given as paths, e.g., `times.client` or `stats.cold_start`.
+    """
+
+    def project(self, func: str, fields: Sequence[str]) -> Dict[str, list]:
+        invocations = self._invocations[func]
+        if isinstance(invocations, LazyInvocations):
+            return invocations.project(fields)
+        return LazyInvocations(
+            {request_id: invoc.serialize() for request_id, invoc in invocations.items()}
+        ).project(fields)
+
     def metrics(self, func: str) -> dict:
         if func not in self._metrics:
             self._metrics[func] = {}
         return self._metrics[func]
 
+    """
+        :param lazy: deserialize invocations on first access
+        :param include_output: keep outputs of functions in invocations
+    """
+
     @staticmethod
-    def deserialize(cached_config: dict, cache: Cache, handlers: LoggingHandlers) -> "Result":
+    def deserialize(
+        cached_config: dict,
+        cache: Cache,
+        handlers: LoggingHandlers,
+        lazy: bool = False,
+        include_output: bool = True,
+    ) -> "Result":
         invocations: Dict[str, dict] = {}
         for func, func_invocations in cached_config["_invocations"].items():
+            if lazy:
+                invocations[func] = LazyInvocations(  # type: ignore
+                    func_invocations, include_output
+                )
+                continue
             invocations[func] = {}
             for invoc_id, invoc in func_invocations.items():
+                if not include_output:
+                    invoc = {**invoc, "output": {}}
                 invocations[func][invoc_id] = ExecutionResult.deserialize(invoc)
         ret = Result(
             ExperimentConfig.deserialize(cached_config["config"]["experiments"]),
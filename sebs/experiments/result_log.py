@@ -0,0 +1,216 @@
+import json
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Iterator, Optional, Tuple
+
+from sebs.cache import Cache
+from sebs.faas.config import Config as DeploymentConfig
+from sebs.faas.function import ExecutionResult, Function
+from sebs.experiments.config import Config as ExperimentConfig
+from sebs.experiments.result import Result
+from sebs.utils import JSONSerializer, LoggingBase, LoggingHandlers, serialize
+
+"""
+    Append-only log of experiment results in the JSON Lines format.
+
+    Each completed invocation is written as a single line immediately,
+    and experiments do not need to keep invocations in memory.
+    Lines are flushed after each record, which preserves data when the
+    client process is interrupted or killed, and synchronized to disk
+    periodically to survive a crash of the machine.
+
+    Records:
+        {"type": "begin", "config": ..., "begin_time": ...}
+        {"type": "invocation", "function": ..., "result": ...}
+        {"type": "record", "data": ...}
+        {"type": "end", "end_time": ..., "result_bucket": ..., ...}
+
+    A line truncated by a crash is ignored when reading the log.
+"""
+
+
+class ResultLog(LoggingBase):
+
+    EXTENSION = ".jsonl"
+    # Synchronize to disk after this number of records or seconds, whichever comes first.
+    FSYNC_RECORDS = 100
+    FSYNC_INTERVAL = 5.0
+
+    @staticmethod
+    def typename() -> str:
+        return "Experiment.ResultLog"
+
+    def __init__(
+        self,
+        path: str,
+        fsync_records: int = FSYNC_RECORDS,
+        fsync_interval: float = FSYNC_INTERVAL,
+    ):
+        super().__init__()
+        self._path = path
+        self._fsync_records = fsync_records
+        self._fsync_interval = fsync_interval
+        self._lock = threading.Lock()
+        self._out_f = open(path, "w")
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    @property
+    def path(self) -> str:
+        return self._path
+
+    def __enter__(self) -> "ResultLog":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _write(self, record: dict):
+        line = json.dumps(record, cls=JSONSerializer, sort_keys=True)
+        with self._lock:
+            self._out_f.write(line + "\n")
+            self._out_f.flush()
+            self._unsynced += 1
+            now = time.monotonic()
+            if (
+                self._unsynced >= self._fsync_records
+                or now - self._last_sync >= self._fsync_interval
+            ):
+                os.fsync(self._out_f.fileno())
+                self._unsynced = 0
+                self._last_sync = now
+
+    def begin(self, result: Result):
+        self._write(
+            {
+                "type": "begin",
+                "config": json.loads(serialize(result.config)),
+                "begin_time": result.begin_time,
+            }
+        )
+
+    def add_invocation(self, func: Function, invocation: ExecutionResult):
+        self._write({"type": "invocation", "function": func.name, "result": invocation})
+
+    def add_record(self, data: dict):
+        self._write({"type": "record", "data": data})
+
+    """
+        Close the log with experiment end time and additional values.
+    """
+
+    def end(self, result: Result, extra: Optional[dict] = None):
+        self._write(
+            {
+                "type": "end",
+                "end_time": result.end_time,
+                "result_bucket": result.result_bucket,
+                **(extra if extra else {}),
+            }
+        )
+
+    def close(self):
+        with self._lock:
+            if self._out_f.closed:
+                return
+            self._out_f.flush()
+            os.fsync(self._out_f.fileno())
+            self._out_f.close()
+
+    """
+        Read records in the order of writing.
+        Lines that cannot be parsed, e.g., truncated by a crash, are skipped.
+    """
+
+    @staticmethod
+    def read(path: str) -> Iterator[dict]:
+        with open(path, "r") as in_f:
+            for line in in_f:
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+
+    """
+        Iterate over invocations stored in the log.
+
+        :return: pairs of function name and invocation result
+    """
+
+    @staticmethod
+    def invocations(path: str) -> Iterator[Tuple[str, ExecutionResult]]:
+        for record in ResultLog.read(path):
+            if record["type"] == "invocation":
+                yield record["function"], ExecutionResult.deserialize(record["result"])
+
+    """
+        Summary of the log without invocations: values of the begin and end records.
+        When the experiment did not finish, the end time is approximated
+        with the last client timestamp.
+    """
+
+    @staticmethod
+    def summary(path: str) -> dict:
+        summary: dict = {"end_time": None, "metrics": {}, "result_bucket": None}
+        last_timestamp = None
+        for record in ResultLog.read(path):
+            if record["type"] == "begin" or record["type"] == "end":
+                summary.update({key: val for key, val in record.items() if key != "type"})
+            elif record["type"] == "invocation":
+                end = record["result"]["times"].get("client_end")
+                if end is not None:
+                    end = datetime.fromisoformat(end).timestamp()
+                    last_timestamp = end if last_timestamp is None else max(last_timestamp, end)
+        if summary["end_time"] is None:
+            summary["end_time"] = last_timestamp or summary.get("begin_time")
+            summary["incomplete"] = True
+        return summary
+
+    """
+        Assemble the experiment result from the log.
+
+        :return: experiment result and values of the end record
+    """
+
+    @staticmethod
+    def assemble(path: str, cache: Cache, handlers: LoggingHandlers) -> Tuple[Result, dict]:
+
+        summary = ResultLog.summary(path)
+        invocations: Dict[str, Dict[str, ExecutionResult]] = {}
+        for func, invocation in ResultLog.invocations(path):
+            invocations.setdefault(func, {})[invocation.request_id] = invocation
+        ret = Result(
+            ExperimentConfig.deserialize(summary["config"]["experiments"]),
+            DeploymentConfig.deserialize(summary["config"]["deployment"], cache, handlers),
+            invocations,
+            summary["metrics"],
+            summary["result_bucket"],
+        )
+        ret.begin_time = summary["begin_time"]
+        ret.end_time = summary["end_time"]
+        extra = {
+            key: val
+            for key, val in summary.items()
+            if key not in ("config", "begin_time", "end_time", "metrics", "result_bucket")
+        }
+        return ret, extra
+
+    """
+        Export the log in the JSON format of `ExperimentResult`, including
+        function outputs. Records are not deserialized.
+    """
+
+    @staticmethod
+    def export_json(log_path: str, path: str):
+
+        summary = ResultLog.summary(log_path)
+        invocations: Dict[str, dict] = {}
+        for record in ResultLog.read(log_path):
+            if record["type"] == "invocation":
+                result = record["result"]
+                invocations.setdefault(record["function"], {})[result["request_id"]] = result
+        summary["_metrics"] = summary.pop("metrics")
+        with open(path, "w") as out_f:
+            out_f.write(serialize({**summary, "_invocations": invocations}))
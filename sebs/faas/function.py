@@ -3,10 +3,36 @@ from abc import ABC
 from abc import abstractmethod
 from datetime import datetime, timedelta
 from enum import Enum
-from typing import Callable, Dict, List, Optional  # noqa
+from typing import Callable, Dict, List, Optional, Tuple  # noqa
 
 from sebs.utils import LoggingBase
 
+"""
+    Results of invocations are stored in slotted classes without a per-instance
+    dictionary, which reduces memory use of experiments with many invocations.
+    The serialized format is identical to the dictionaries of attributes
+    written before: attributes that were never set are omitted,
+    and unknown keys of old results are ignored.
+"""
+
+
+def _serialize_slots(obj, slots: Tuple[str, ...]) -> dict:
+    ret = {}
+    for key in slots:
+        try:
+            ret[key] = getattr(obj, key)
+        except AttributeError:
+            pass
+    return ret
+
+
+def _deserialize_slots(obj, slots: Tuple[str, ...], cached_obj: dict):
+    for key in slots:
+        if key in cached_obj:
+            setattr(obj, key, cached_obj[key])
+    return obj
+
+
 """
     Times are reported in microseconds.
 """
@@ -14,6 +40,16 @@ from sebs.utils import LoggingBase
 
 class ExecutionTimes:
 
+    __slots__ = (
+        "client",
+        "client_begin",
+        "client_end",
+        "benchmark",
+        "initialization",
+        "http_startup",
+        "http_first_byte_return",
+    )
+
     client: int
     client_begin: datetime
     client_end: datetime
@@ -27,15 +63,43 @@ class ExecutionTimes:
         self.initialization = 0
         self.benchmark = 0
 
+    """
+        Begin and end of the invocation measured by the client.
+        Deserialized results store times as strings.
+
+        :return: pair of timestamps in seconds, None if times are not available
+    """
+
+    def client_timestamps(self) -> Optional[Tuple[float, float]]:
+        timestamps = []
+        for val in (getattr(self, "client_begin", None), getattr(self, "client_end", None)):
+            if isinstance(val, str):
+                try:
+                    val = datetime.fromisoformat(val)
+                except ValueError:
+                    return None
+            if not isinstance(val, datetime):
+                return None
+            timestamps.append(val.timestamp())
+        return timestamps[0], timestamps[1]
+
+    # Datetimes are serialized as strings.
+    def serialize(self) -> dict:
+        ret = _serialize_slots(self, ExecutionTimes.__slots__)
+        for key in ("client_begin", "client_end"):
+            if isinstance(ret.get(key), datetime):
+                ret[key] = str(ret[key])
+        return ret
+
     @staticmethod
     def deserialize(cached_obj: dict) -> "ExecutionTimes":
-        ret = ExecutionTimes()
-        ret.__dict__.update(cached_obj)
-        return ret
+        return _deserialize_slots(ExecutionTimes(), ExecutionTimes.__slots__, cached_obj)
 
 
 class ProviderTimes:
 
+    __slots__ = ("initialization", "execution")
+
     initialization: int
     execution: int
 
@@ -43,33 +107,65 @@ class ProviderTimes:
         self.execution = 0
         self.initialization = 0
 
+    def serialize(self) -> dict:
+        return _serialize_slots(self, ProviderTimes.__slots__)
+
     @staticmethod
     def deserialize(cached_obj: dict) -> "ProviderTimes":
-        ret = ProviderTimes()
-        ret.__dict__.update(cached_obj)
-        return ret
+        return _deserialize_slots(ProviderTimes(), ProviderTimes.__slots__, cached_obj)
+
+
+"""
+    Resource usage of the function instance during the invocation, when
+    measured by the platform: CPU time in microseconds, network and block I/O
+    in bytes, and the memory used in MB.
+"""
 
 
 class ExecutionStats:
 
+    __slots__ = (
+        "memory_used",
+        "cold_start",
+        "failure",
+        "cpu_time",
+        "net_rx",
+        "net_tx",
+        "blkio_read",
+        "blkio_write",
+    )
+
     memory_used: Optional[float]
     cold_start: bool
     failure: bool
+    cpu_time: Optional[int]
+    net_rx: Optional[int]
+    net_tx: Optional[int]
+    blkio_read: Optional[int]
+    blkio_write: Optional[int]
 
     def __init__(self):
         self.memory_used = None
         self.cold_start = False
         self.failure = False
+        self.cpu_time = None
+        self.net_rx = None
+        self.net_tx = None
+        self.blkio_read = None
+        self.blkio_write = None
+
+    def serialize(self) -> dict:
+        return _serialize_slots(self, ExecutionStats.__slots__)
 
     @staticmethod
     def deserialize(cached_obj: dict) -> "ExecutionStats":
-        ret = ExecutionStats()
-        ret.__dict__.update(cached_obj)
-        return ret
+        return _deserialize_slots(ExecutionStats(), ExecutionStats.__slots__, cached_obj)
 
 
 class ExecutionBilling:
 
+    __slots__ = ("_memory", "_billed_time", "_gb_seconds")
+
     _memory: Optional[int]
     _billed_time: Optional[int]
     _gb_seconds: int
@@ -103,15 +199,18 @@ class ExecutionBilling:
     def gb_seconds(self, val: int):
         self._gb_seconds = val
 
+    def serialize(self) -> dict:
+        return _serialize_slots(self, ExecutionBilling.__slots__)
+
     @staticmethod
     def deserialize(cached_obj: dict) -> "ExecutionBilling":
-        ret = ExecutionBilling()
-        ret.__dict__.update(cached_obj)
-        return ret
+        return _deserialize_slots(ExecutionBilling(), ExecutionBilling.__slots__, cached_obj)
 
 
 class ExecutionResult:
 
+    __slots__ = ("output", "request_id", "times", "provider_times", "stats", "billing")
+
     output: dict
     request_id: str
     times: ExecutionTimes
@@ -146,9 +245,20 @@ class ExecutionResult:
             / timedelta(microseconds=1)
         )
 
+    def serialize(self) -> dict:
+        return {
+            "billing": self.billing.serialize(),
+            "output": self.output,
+            "provider_times": self.provider_times.serialize(),
+            "request_id": self.request_id,
+            "stats": self.stats.serialize(),
+            "times": self.times.serialize(),
+        }
+
+    # Sub-objects are created once, without default instances of the constructor.
     @staticmethod
     def deserialize(cached_config: dict) -> "ExecutionResult":
-        ret = ExecutionResult()
+        ret = ExecutionResult.__new__(ExecutionResult)
         ret.times = ExecutionTimes.deserialize(cached_config["times"])
         ret.billing = ExecutionBilling.deserialize(cached_config["billing"])
         ret.provider_times = ProviderTimes.deserialize(cached_config["provider_times"])
@@ -1,12 +1,62 @@
+import base64
+import hashlib
 import os
 
 from abc import ABC
 from abc import abstractmethod
-from typing import List, Tuple
+from typing import Dict, List, Optional, Tuple
 
 from sebs.cache import Cache
 from sebs.utils import LoggingBase
 
+"""
+    Compute MD5 digest of a local file without loading it entirely into memory.
+
+    :param filepath: local file
+    :return: raw MD5 digest
+"""
+
+
+def md5_digest(filepath: str, chunk_size: int = 1024 * 1024) -> bytes:
+    md5 = hashlib.md5()
+    with open(filepath, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            md5.update(chunk)
+    return md5.digest()
+
+
+"""
+    Base64-encoded MD5 digest, the format used by Google Cloud Storage
+    and Azure Blob Storage.
+"""
+
+
+def md5_base64(filepath: str) -> str:
+    return base64.b64encode(md5_digest(filepath)).decode("utf-8")
+
+
+"""
+    Compute the ETag that an S3-compatible service assigns to a file.
+    Single-part uploads receive MD5 of the content. Multipart uploads
+    receive MD5 of concatenated part digests with the number of parts appended.
+
+    :param filepath: local file
+    :param part_size: size of a part in multipart upload
+    :param multipart: true if the file is uploaded with multipart API
+    :return: ETag without quotation marks
+"""
+
+
+def s3_etag(filepath: str, part_size: int, multipart: bool) -> str:
+    if not multipart:
+        return md5_digest(filepath).hex()
+    parts = []
+    with open(filepath, "rb") as f:
+        for chunk in iter(lambda: f.read(part_size), b""):
+            parts.append(hashlib.md5(chunk).digest())
+    return "{}-{}".format(hashlib.md5(b"".join(parts)).hexdigest(), len(parts))
+
+
 """
     Abstract class
 """
@@ -37,6 +87,7 @@ class PersistentStorage(ABC, LoggingBase):
         self.input_buckets: List[str] = []
         self.output_buckets: List[str] = []
         self.input_buckets_files: List[List[str]] = []
+        self._input_buckets_checksums: Dict[str, Dict[str, Optional[str]]] = {}
         self._replace_existing = replace_existing
 
     @property
@@ -131,6 +182,31 @@ class PersistentStorage(ABC, LoggingBase):
     def list_buckets(self, bucket_name: str) -> List[str]:
         pass
 
+    """
+        Retrieves content checksums of all files in a bucket, as reported
+        by the storage service (ETag, MD5 or similar).
+
+        :param bucket_name:
+        :return: dictionary mapping file names to checksums; None when
+            the service does not provide a checksum for a file
+    """
+
+    @abstractmethod
+    def list_bucket_checksums(self, bucket_name: str) -> Dict[str, Optional[str]]:
+        pass
+
+    """
+        Computes checksum of a local file in the format returned by
+        `list_bucket_checksums`.
+
+        :param filepath: local file
+        :return: checksum
+    """
+
+    @abstractmethod
+    def file_checksum(self, filepath: str) -> str:
+        pass
+
     @abstractmethod
     def clean_bucket(self, bucket_name: str):
         pass
@@ -174,17 +250,48 @@ class PersistentStorage(ABC, LoggingBase):
 
     """
         Implements a handy routine for uploading input data by benchmarks.
-        It should skip uploading existing files unless storage client has been
-        initialized to override existing data.
+        It skips uploading existing files unless storage client has been
+        initialized to override existing data. When replacing data,
+        only files with content different than the stored version are uploaded.
 
         :param bucket_idx: index of input bucket
-        :param file: name of file to upload
-        :param filepath: filepath in the storage
+        :param key: name of file in the storage
+        :param filepath: local source filepath
     """
 
-    @abstractmethod
-    def uploader_func(self, bucket_idx: int, file: str, filepath: str) -> None:
-        pass
+    def uploader_func(self, bucket_idx: int, key: str, filepath: str) -> None:
+        # Skip upload when using cached buckets and not updating storage.
+        if self.cached and not self.replace_existing:
+            return
+        bucket_name = self.input_buckets[bucket_idx]
+        if not self.replace_existing:
+            if key in self.input_buckets_files[bucket_idx]:
+                self.logging.info("Skipping upload of {} to {}".format(filepath, bucket_name))
+                return
+        elif self.is_unchanged(bucket_name, key, filepath):
+            self.logging.info(
+                "Skipping upload of {} to {}, content has not changed".format(filepath, bucket_name)
+            )
+            return
+        self.upload(bucket_name, filepath, key)
+
+    """
+        Compare the local file with its stored version.
+        Remote checksums are retrieved once per bucket.
+
+        :param bucket_name:
+        :param key: name of file in the storage
+        :param filepath: local filepath
+        :return: true if the bucket contains a file with identical content
+    """
+
+    def is_unchanged(self, bucket_name: str, key: str, filepath: str) -> bool:
+        if bucket_name not in self._input_buckets_checksums:
+            self._input_buckets_checksums[bucket_name] = self.list_bucket_checksums(bucket_name)
+        remote_checksum = self._input_buckets_checksums[bucket_name].get(key)
+        if remote_checksum is None:
+            return False
+        return remote_checksum == self.file_checksum(filepath)
 
     """
         Save benchmark input/output buckets to cache.
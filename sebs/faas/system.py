@@ -1,6 +1,7 @@
+import time
 from abc import ABC
 from abc import abstractmethod
-from typing import Dict, List, Optional, Tuple, Type
+from typing import Any, Dict, List, Optional, Set, Tuple, Type
 
 import docker
 
@@ -22,6 +23,14 @@ from .config import Config
 
 
 class System(ABC, LoggingBase):
+
+    # Polling of provider metrics: maximal waiting time, initial and maximal delay in seconds.
+    METRICS_TIMEOUT = 600
+    METRICS_INITIAL_DELAY = 5
+    METRICS_MAX_DELAY = 60
+    # Padding of the time range of missing invocations, in seconds.
+    METRICS_TIME_MARGIN = 5
+
     def __init__(
         self, system_config: SeBSConfig, cache_client: Cache, docker_client: docker.client,
     ):
@@ -29,6 +38,7 @@ class System(ABC, LoggingBase):
         self._system_config = system_config
         self._docker_client = docker_client
         self._cache_client = cache_client
+        self._metrics_timeout: float = System.METRICS_TIMEOUT
 
     @property
     def system_config(self) -> SeBSConfig:
@@ -42,6 +52,18 @@ class System(ABC, LoggingBase):
     def cache_client(self) -> Cache:
         return self._cache_client
 
+    """
+        Maximal time in seconds of waiting for provider metrics of invocations.
+    """
+
+    @property
+    def metrics_timeout(self) -> float:
+        return self._metrics_timeout
+
+    @metrics_timeout.setter
+    def metrics_timeout(self, val: float):
+        self._metrics_timeout = val
+
     @property
     @abstractmethod
     def config(self) -> Config:
@@ -208,6 +230,152 @@ class System(ABC, LoggingBase):
     ):
         pass
 
+    """
+        Single attempt to retrieve raw provider records, such as log entries,
+        of invocations in the time range. Records must be JSON-serializable,
+        since they are stored in the cache and applied again when results
+        are reprocessed.
+
+        :param requests: invocations without metrics, indexed by request ID
+        :return: records indexed by request ID
+    """
+
+    def fetch_metrics(
+        self,
+        function_name: str,
+        start_time: float,
+        end_time: float,
+        requests: Dict[str, ExecutionResult],
+    ) -> Dict[str, Any]:
+        raise NotImplementedError()
+
+    """
+        Update invocations with provider metrics from raw records.
+        Records of invocations not in requests are ignored.
+
+        :return: request IDs of updated invocations
+    """
+
+    def apply_metrics(
+        self, records: Dict[str, Any], requests: Dict[str, ExecutionResult]
+    ) -> Set[str]:
+        raise NotImplementedError()
+
+    """
+        Time range covering client times of invocations, limited to the given range.
+        Returns the entire range when client times are not available.
+    """
+
+    def _metrics_time_range(
+        self, start_time: float, end_time: float, requests: Dict[str, ExecutionResult]
+    ) -> Tuple[float, float]:
+        begin, end = None, None
+        for req in requests.values():
+            req_times = req.times.client_timestamps()
+            if req_times is None:
+                return start_time, end_time
+            begin = req_times[0] if begin is None else min(begin, req_times[0])
+            end = req_times[1] if end is None else max(end, req_times[1])
+        if begin is None or end is None:
+            return start_time, end_time
+        return (
+            max(start_time, begin - System.METRICS_TIME_MARGIN),
+            min(end_time, end + System.METRICS_TIME_MARGIN),
+        )
+
+    """
+        Provider metrics arrive with a delay.
+        Fetch metrics repeatedly until all invocations are matched or the timeout passes.
+        Delay between attempts grows exponentially, and each attempt covers only
+        invocations still missing metrics and their time range.
+        Records cached for overlapping time windows are applied first, and
+        the provider is queried only for the time range of invocations still missing.
+        The timeout defaults to the `metrics_timeout` of the deployment.
+        Records of each attempt are cached under the time window it queried.
+        Invocations still missing long after they ended are settled in the cache,
+        and processing the results again does not query the provider for them.
+
+        :return: request IDs of invocations updated with provider metrics
+    """
+
+    def poll_metrics(
+        self,
+        function_name: str,
+        start_time: float,
+        end_time: float,
+        requests: Dict[str, ExecutionResult],
+        timeout: Optional[float] = None,
+    ) -> Set[str]:
+
+        missing = dict(requests)
+        cached_records = self.cache_client.get_metrics_records(
+            self.name(), function_name, start_time, end_time
+        )
+        if cached_records:
+            for request_id in self.apply_metrics(cached_records, missing):
+                missing.pop(request_id, None)
+            self.logging.info(
+                f"Found cached provider metrics for {len(requests) - len(missing)} "
+                f"out of {len(requests)} invocations of {function_name}."
+            )
+        settled = self.cache_client.get_settled_requests(
+            self.name(), function_name, start_time, end_time
+        ) & missing.keys()
+        if settled:
+            self.logging.info(
+                f"Skip {len(settled)} invocations of {function_name} without provider metrics."
+            )
+            for request_id in settled:
+                missing.pop(request_id)
+
+        timeout = self._metrics_timeout if timeout is None else timeout
+        deadline = time.time() + timeout
+        delay = System.METRICS_INITIAL_DELAY
+        begin, end = self._metrics_time_range(start_time, end_time, missing)
+        while missing:
+            records = self.fetch_metrics(function_name, begin, end, missing)
+            self.cache_client.add_metrics_records(self.name(), function_name, begin, end, records)
+            for request_id in self.apply_metrics(records, missing):
+                missing.pop(request_id, None)
+            self.logging.info(
+                f"Found provider metrics for {len(requests) - len(missing)} "
+                f"out of {len(requests)} invocations of {function_name}."
+            )
+            if not missing or time.time() + delay > deadline:
+                break
+            self.logging.info(f"Missing {len(missing)} invocations, repeat after {delay}s...")
+            time.sleep(delay)
+            delay = min(delay * 2, System.METRICS_MAX_DELAY)
+            begin, end = self._metrics_time_range(start_time, end_time, missing)
+
+        if missing:
+            self.logging.warning(f"Missing provider metrics for requests: {list(missing.keys())}")
+            self._settle_requests(function_name, start_time, end_time, missing)
+        return set(requests.keys()) - set(missing.keys()) - settled
+
+    """
+        Metrics of invocations that ended longer than the default timeout ago
+        are not delivered anymore.
+    """
+
+    def _settle_requests(
+        self,
+        function_name: str,
+        start_time: float,
+        end_time: float,
+        requests: Dict[str, ExecutionResult],
+    ):
+        settle_before = time.time() - System.METRICS_TIMEOUT
+        settled = set()
+        for request_id, req in requests.items():
+            req_times = req.times.client_timestamps()
+            if (req_times[1] if req_times else end_time) < settle_before:
+                settled.add(request_id)
+        if settled:
+            self.cache_client.add_settled_requests(
+                self.name(), function_name, start_time, end_time, settled
+            )
+
     @abstractmethod
     def create_trigger(self, function: Function, trigger_type: Trigger.TriggerType) -> Trigger:
         pass
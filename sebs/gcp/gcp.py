@@ -1,12 +1,10 @@
 import docker
 import os
 import logging
-import re
 import shutil
 import time
 import math
-from datetime import datetime, timezone
-from typing import cast, Dict, Optional, Tuple, List, Type
+from typing import cast, Dict, Optional, Set, Tuple, List, Type
 
 from googleapiclient.discovery import build
 from google.cloud import monitoring_v3
@@ -21,6 +19,7 @@ from ..faas.system import System
 from sebs.gcp.config import GCPConfig
 from sebs.gcp.storage import GCPStorage
 from sebs.gcp.function import GCPFunction
+from sebs.gcp.logs import LogsReader
 from sebs.utils import LoggingHandlers
 
 """
@@ -33,6 +32,10 @@ from sebs.utils import LoggingHandlers
 
 
 class GCP(System):
+
+    # Cloud Monitoring makes points of function metrics available with a delay, in seconds.
+    MONITORING_DELAY = 300
+
     def __init__(
         self,
         system_config: SeBSConfig,
@@ -367,81 +370,46 @@ class GCP(System):
     def shutdown(self) -> None:
         super().shutdown()
 
-    def download_metrics(
-        self, function_name: str, start_time: int, end_time: int, requests: dict, metrics: dict
-    ):
+    """
+        Use GCP's logging system to find execution time of each function invocation.
+    """
+
+    def fetch_metrics(
+        self, function_name: str, start_time: float, end_time: float, requests: dict
+    ) -> Dict[str, int]:
 
-        from google.api_core import exceptions
-        from time import sleep
-
-        def wrapper(gen):
-            while True:
-                try:
-                    yield next(gen)
-                except StopIteration:
-                    break
-                except exceptions.ResourceExhausted as e:
-                    print("Exhausted")
-                    sleep(30)
-
-        """
-            Use GCP's logging system to find execution time of each function invocation.
-
-            There shouldn't be problem of waiting for complete results,
-            since logs appear very quickly here.
-        """
         from google.cloud import logging as gcp_logging
 
         logging_client = gcp_logging.Client()
         logger = logging_client.logger("cloudfunctions.googleapis.com%2Fcloud-functions")
+        reader = LogsReader(logger)
+        reader.logging_handlers = self.logging_handlers
+        entries, times = reader.execution_times(function_name, start_time, end_time)
+        self.logging.info(f"GCP: Received {entries} entries with {len(times)} execution times.")
+        return times
+
+    def apply_metrics(self, records: Dict[str, int], requests: dict) -> Set[str]:
+        invocations_processed: Set[str] = set()
+        for execution_id, exec_time in records.items():
+            # might happen that we get invocation from another experiment
+            if execution_id not in requests:
+                continue
+            # convert into microseconds
+            requests[execution_id].provider_times.execution = exec_time * 1000
+            invocations_processed.add(execution_id)
+        return invocations_processed
 
-        """
-            GCP accepts only single date format: 'YYYY-MM-DDTHH:MM:SSZ'.
-            Thus, we first convert timestamp to UTC timezone.
-            Then, we generate correct format.
-
-            Add 1 second to end time to ensure that removing
-            milliseconds doesn't affect query.
-        """
-        timestamps = []
-        for timestamp in [start_time, end_time + 1]:
-            utc_date = datetime.fromtimestamp(timestamp, tz=timezone.utc)
-            timestamps.append(utc_date.strftime("%Y-%m-%dT%H:%M:%SZ"))
-
-        invocations = logger.list_entries(
-            filter_=(
-                f'resource.labels.function_name = "{function_name}" '
-                f'timestamp >= "{timestamps[0]}" '
-                f'timestamp <= "{timestamps[1]}"'
-            ),
-            page_size=1000,
-        )
-        invocations_processed = 0
-        pages = list(wrapper(invocations.pages))
-        entries = 0
-        for page in pages:  # invocations.pages:
-            for invoc in page:
-                entries += 1
-                if "execution took" in invoc.payload:
-                    execution_id = invoc.labels["execution_id"]
-                    # might happen that we get invocation from another experiment
-                    if execution_id not in requests:
-                        continue
-                    # find number of miliseconds
-                    exec_time = re.search(r"\d+ ms", invoc.payload).group().split()[0]
-                    # convert into microseconds
-                    requests[execution_id].provider_times.execution = int(exec_time) * 1000
-                    invocations_processed += 1
-        self.logging.info(
-            f"GCP: Received {entries} entries, found time metrics for {invocations_processed} "
-            f"out of {len(requests.keys())} invocations."
-        )
+    """
+        Use metrics to find estimated values for maximum memory used, active instances
+        and network traffic.
+        https://cloud.google.com/monitoring/api/metrics_gcp#gcp-cloudfunctions
+
+        :return: points of each metric, with the end of their interval as timestamp
+    """
 
-        """
-            Use metrics to find estimated values for maximum memory used, active instances
-            and network traffic.
-            https://cloud.google.com/monitoring/api/metrics_gcp#gcp-cloudfunctions
-        """
+    def _download_time_series(
+        self, function_name: str, start_time: int, end_time: int
+    ) -> Dict[str, List[dict]]:
 
         # Set expected metrics here
         available_metrics = ["execution_times", "user_memory_bytes", "network_egress"]
@@ -449,19 +417,17 @@ class GCP(System):
         client = monitoring_v3.MetricServiceClient()
         project_name = client.common_project_path(self.config.project_name)
 
-        end_time_nanos, end_time_seconds = math.modf(end_time)
-        start_time_nanos, start_time_seconds = math.modf(start_time)
-
         interval = monitoring_v3.TimeInterval(
             {
-                "end_time": {"seconds": int(end_time_seconds) + 60},
-                "start_time": {"seconds": int(start_time_seconds)},
+                "end_time": {"seconds": end_time},
+                "start_time": {"seconds": start_time},
             }
         )
 
+        series: Dict[str, List[dict]] = {}
         for metric in available_metrics:
 
-            metrics[metric] = []
+            series[metric] = []
 
             list_request = monitoring_v3.ListTimeSeriesRequest(
                 name=project_name,
@@ -473,12 +439,67 @@ class GCP(System):
             for result in results:
                 if result.resource.labels.get("function_name") == function_name:
                     for point in result.points:
-                        metrics[metric] += [
+                        series[metric] += [
                             {
                                 "mean_value": point.value.distribution_value.mean,
                                 "executions_count": point.value.distribution_value.count,
+                                "timestamp": point.interval.end_time.timestamp(),
                             }
                         ]
+        return series
+
+    """
+        Time series are complete when the window ended longer than the delay
+        of Cloud Monitoring ago, or when each metric has points after the end
+        of all invocations.
+    """
+
+    @staticmethod
+    def _time_series_complete(
+        series: Dict[str, List[dict]], series_end: float, requests: dict
+    ) -> bool:
+        if time.time() - series_end > GCP.MONITORING_DELAY:
+            return True
+        requests_end = 0.0
+        for req in requests.values():
+            req_times = req.times.client_timestamps()
+            if req_times is None:
+                return False
+            requests_end = max(requests_end, req_times[1])
+        return all(
+            points and max(p["timestamp"] for p in points) >= requests_end
+            for points in series.values()
+        )
+
+    """
+        Time series are cached and reused when a cached window contains
+        the requested time range. Incomplete series are not cached,
+        since Cloud Monitoring can still add points.
+    """
+
+    def download_metrics(
+        self, function_name: str, start_time: int, end_time: int, requests: dict, metrics: dict
+    ):
+
+        self.poll_metrics(function_name, start_time, end_time, requests)
+
+        series_start = int(math.modf(start_time)[1])
+        series_end = int(math.modf(end_time)[1]) + 60
+        series = self.cache_client.get_time_series(
+            self.name(), function_name, series_start, series_end
+        )
+        if series is None:
+            series = self._download_time_series(function_name, series_start, series_end)
+            if GCP._time_series_complete(series, series_end, requests):
+                self.cache_client.add_time_series(
+                    self.name(), function_name, series_start, series_end, series
+                )
+            else:
+                self.logging.info("Time series might be incomplete, skip caching.")
+        for metric, points in series.items():
+            metrics[metric] = [
+                {key: val for key, val in point.items() if key != "timestamp"} for point in points
+            ]
 
     def _enforce_cold_start(self, function: Function):
 
@@ -0,0 +1,140 @@
+import re
+import time
+from datetime import datetime, timezone
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from google.api_core import exceptions
+
+from sebs.utils import LoggingBase
+
+"""
+    Retrieval of execution times from Cloud Logging.
+
+    Pages of log entries are processed as they arrive and discarded afterwards,
+    and only the execution time of each invocation is kept.
+    When the API quota is exhausted, the reader waits with an exponentially
+    growing delay and resumes from the token of the first unprocessed page.
+    The delay decreases again after each successful page.
+
+    The logger is passed explicitly, which allows to replace it with a stub.
+"""
+
+
+class LogsReader(LoggingBase):
+
+    PAGE_SIZE = 1000
+    # Transient errors that are retried after a delay.
+    RETRIED_EXCEPTIONS = (
+        exceptions.ResourceExhausted,
+        exceptions.ServiceUnavailable,
+        exceptions.DeadlineExceeded,
+    )
+
+    # Each line of a batch consists of execution ID and the payload.
+    EXECUTION_TIME_PATTERN = re.compile(r"^(\S+)\t.*?execution took (\d+) ms", re.MULTILINE)
+
+    @staticmethod
+    def typename() -> str:
+        return "GCP.LogsReader"
+
+    def __init__(
+        self,
+        logger,
+        initial_delay: float = 1.0,
+        max_delay: float = 60.0,
+        max_retries: int = 10,
+    ):
+        super().__init__()
+        self._logger = logger
+        self._initial_delay = initial_delay
+        self._max_delay = max_delay
+        self._max_retries = max_retries
+        self._delay = 0.0
+
+    """
+        GCP accepts only single date format: 'YYYY-MM-DDTHH:MM:SSZ'.
+        Thus, we first convert timestamp to UTC timezone.
+        Then, we generate correct format.
+    """
+
+    @staticmethod
+    def _format_timestamp(timestamp: float) -> str:
+        utc_date = datetime.fromtimestamp(timestamp, tz=timezone.utc)
+        return utc_date.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+    """
+        Yield pages of entries matching the filter.
+        After a transient failure, listing restarts from the page that failed.
+    """
+
+    def pages(self, filter_: str) -> Iterator[List]:
+
+        page_token: Optional[str] = None
+        retries = 0
+        while True:
+            iterator = self._logger.list_entries(
+                filter_=filter_, page_size=LogsReader.PAGE_SIZE, page_token=page_token
+            )
+            try:
+                for page in iterator.pages:
+                    entries = list(page)
+                    # token of the next page, used to resume after a failure
+                    page_token = iterator.next_page_token
+                    retries = 0
+                    self._delay /= 2
+                    yield entries
+                return
+            except LogsReader.RETRIED_EXCEPTIONS as e:
+                retries += 1
+                if retries > self._max_retries:
+                    raise
+                self._delay = min(self._max_delay, max(self._initial_delay, self._delay * 2))
+                self.logging.info(
+                    f"Listing logs failed with {type(e).__name__}, resume after {self._delay}s..."
+                )
+                time.sleep(self._delay)
+
+    """
+        Extract execution times from a batch of entries with a single pass
+        of the regular expression.
+
+        :return: list of pairs (execution ID, time in milliseconds)
+    """
+
+    @staticmethod
+    def parse_execution_times(entries: List) -> List[Tuple[str, int]]:
+        lines = []
+        for entry in entries:
+            payload = entry.payload
+            if isinstance(payload, str) and "execution took" in payload:
+                lines.append(f"{entry.labels['execution_id']}\t{payload}")
+        return [
+            (execution_id, int(exec_time))
+            for execution_id, exec_time in LogsReader.EXECUTION_TIME_PATTERN.findall(
+                "\n".join(lines)
+            )
+        ]
+
+    """
+        Use GCP's logging system to find execution time of each function invocation.
+        Add 1 second to end time to ensure that removing milliseconds doesn't affect query.
+
+        :return: number of entries received and execution times in milliseconds
+            indexed by execution ID
+    """
+
+    def execution_times(
+        self, function_name: str, start_time: float, end_time: float
+    ) -> Tuple[int, Dict[str, int]]:
+
+        filter_ = (
+            f'resource.labels.function_name = "{function_name}" '
+            f'timestamp >= "{LogsReader._format_timestamp(start_time)}" '
+            f'timestamp <= "{LogsReader._format_timestamp(end_time + 1)}"'
+        )
+        entries = 0
+        times: Dict[str, int] = {}
+        for page in self.pages(filter_):
+            entries += len(page)
+            times.update(LogsReader.parse_execution_times(page))
+        return entries, times
@@ -1,11 +1,11 @@
 import logging
 import uuid
-from typing import List
+from typing import Dict, List, Optional
 
 from google.cloud import storage as gcp_storage
 
 from sebs.cache import Cache
-from ..faas.storage import PersistentStorage
+from ..faas.storage import PersistentStorage, md5_base64
 
 
 class GCPStorage(PersistentStorage):
@@ -70,6 +70,17 @@ class GCPStorage(PersistentStorage):
         blobs = [blob.name for blob in all_blobs]
         return blobs
 
+    """
+        GCP reports base64-encoded MD5 hash for all objects except
+        composite ones, which have only a CRC32C checksum.
+    """
+
+    def list_bucket_checksums(self, bucket_name: str) -> Dict[str, Optional[str]]:
+        return {blob.name: blob.md5_hash for blob in self.client.list_blobs(bucket_name)}
+
+    def file_checksum(self, filepath: str) -> str:
+        return md5_base64(filepath)
+
     def list_buckets(self, bucket_name: str) -> List[str]:
         all_buckets = list(self.client.list_buckets())
         buckets = [bucket.name for bucket in all_buckets]
@@ -87,15 +98,3 @@ class GCPStorage(PersistentStorage):
     #    name = "{}-{}".format(bucket_name, suffix)
     #    bucket_name = self.create_bucket(name)
     #    return bucket_name
-
-    def uploader_func(self, bucket_idx: int, key: str, filepath: str) -> None:
-        if self.cached and not self.replace_existing:
-            return
-        bucket_name = self.input_buckets[bucket_idx]
-        if not self.replace_existing:
-            for blob in self.input_buckets_files[bucket_idx]:
-                if file == blob.name:
-                    logging.info("Skipping upload of {} to {}".format(filepath, bucket_name))
-                    return
-        bucket_name = self.input_buckets[bucket_idx]
-        self.upload(bucket_name, filepath, key)
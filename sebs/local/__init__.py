@@ -1,3 +1,4 @@
 from .local import Local  # noqa
-from .function import LocalFunction  # noqa
+from .function import EmulatedFunction, LocalFunction  # noqa
+from .control_plane import ControlPlane  # noqa
 from .deployment import Deployment  # noqa
@@ -1,3 +1,6 @@
+import math
+from typing import cast, Optional
+
 from sebs.cache import Cache
 from sebs.faas.config import Config, Credentials, Resources
 from sebs.utils import LoggingHandlers
@@ -12,20 +15,139 @@ class LocalCredentials(Credentials):
         return LocalCredentials()
 
 
+"""
+    Configuration of the local storage.
+    Persistent storage uses a named Docker volume and a long-living
+    Minio container that are reused across sessions.
+    Credentials of persistent storage are stored in the cache.
+"""
+
+
 class LocalResources(Resources):
+    def __init__(self, storage_config: Optional[dict] = None):
+        super().__init__()
+        self._storage_config = storage_config if storage_config else {}
+
+    @property
+    def storage_config(self) -> dict:
+        return self._storage_config
+
     def serialize(self) -> dict:
-        return {}
+        return {"storage": self._storage_config}
+
+    def update_cache(self, cache: Cache):
+        cache.update_config(val=self._storage_config, keys=["local", "resources", "storage"])
+
+    # FIXME: python3.7+ future annotatons
+    @staticmethod
+    def initialize(dct: dict) -> Resources:
+        return LocalResources(dct["storage"] if "storage" in dct else {})
+
+    """
+        Cached storage configuration provides credentials of persistent storage.
+        User configuration can override storage mode and volume name.
+    """
 
     @staticmethod
     def deserialize(config: dict, cache: Cache, handlers: LoggingHandlers) -> Resources:
-        return LocalResources()
+        cached_config = cache.get_config("local")
+        ret: LocalResources
+        if cached_config and "resources" in cached_config:
+            ret = cast(LocalResources, LocalResources.initialize(cached_config["resources"]))
+            ret.logging_handlers = handlers
+            ret.logging.info("Using cached resources for local deployment")
+        else:
+            ret = LocalResources()
+            ret.logging_handlers = handlers
+        if "storage" in config:
+            ret._storage_config.update(config["storage"])
+        return ret
+
+
+"""
+    Configuration of the server running functions in containers.
+
+    type: "threads" serves requests with a pool of threads,
+        "processes" with pre-forked worker processes.
+    workers: number of requests served concurrently by each container.
+        By default, one worker is started per "memory-per-worker" MB
+        of the function memory.
+
+    Cold starts are enforced by restarting containers ("restart"), or by
+    replacing them with containers from a pool started in advance ("pool").
+    With "freeze", containers of the pool have the code loaded and are paused,
+    and they are thawed when used.
+
+    The emulator serves each function from an entry point of the local
+    control plane, which starts containers on demand, up to "max-instances"
+    serving invocations concurrently, and stops containers idle for longer
+    than "keep-alive" seconds.
+
+    Resource limits emulate memory configurations of cloud functions:
+    containers are limited to the function memory, and the CPU share
+    is proportional to it, with one CPU per "memory-per-cpu" MB.
+"""
 
 
 class LocalConfig(Config):
-    def __init__(self):
+
+    DEFAULT_SERVER = {"type": "threads", "workers": None, "memory-per-worker": 128}
+    DEFAULT_COLD_START = {"method": "restart", "pool-size": 1}
+    DEFAULT_LIMITS = {"enabled": False, "memory-per-cpu": 1769}
+    DEFAULT_EMULATOR = {
+        "enabled": False,
+        "max-instances": 10,
+        "keep-alive": 600,
+        "address": "127.0.0.1",
+    }
+
+    def __init__(
+        self,
+        resources: Optional[LocalResources] = None,
+        server_config: Optional[dict] = None,
+        cold_start_config: Optional[dict] = None,
+        emulator_config: Optional[dict] = None,
+        limits_config: Optional[dict] = None,
+    ):
         super().__init__()
         self._credentials = LocalCredentials()
-        self._resources = LocalResources()
+        self._resources = resources if resources else LocalResources()
+        self._server_config = {**LocalConfig.DEFAULT_SERVER, **(server_config or {})}
+        if self._server_config["type"] not in ("threads", "processes"):
+            raise RuntimeError(f"Unknown type of local server {self._server_config['type']}!")
+        self._cold_start_config = {**LocalConfig.DEFAULT_COLD_START, **(cold_start_config or {})}
+        if self._cold_start_config["method"] not in ("restart", "pool", "freeze"):
+            raise RuntimeError(
+                f"Unknown method of local cold starts {self._cold_start_config['method']}!"
+            )
+        self._emulator_config = {**LocalConfig.DEFAULT_EMULATOR, **(emulator_config or {})}
+        if self._emulator_config["max-instances"] < 1:
+            raise RuntimeError("The local emulator requires at least one instance per function!")
+        self._limits_config = {**LocalConfig.DEFAULT_LIMITS, **(limits_config or {})}
+
+    @property
+    def cold_start_config(self) -> dict:
+        return self._cold_start_config
+
+    @property
+    def limits_config(self) -> dict:
+        return self._limits_config
+
+    def cpus(self, memory: int) -> float:
+        return memory / self._limits_config["memory-per-cpu"]
+
+    @property
+    def emulator_config(self) -> dict:
+        return self._emulator_config
+
+    @property
+    def server_config(self) -> dict:
+        return self._server_config
+
+    def server_workers(self, memory: int) -> int:
+        if self._server_config["workers"] is not None:
+            return self._server_config["workers"]
+        return max(1, math.ceil(memory / self._server_config["memory-per-worker"]))
 
     @staticmethod
     def typename() -> str:
@@ -46,9 +168,29 @@ class LocalConfig(Config):
     @staticmethod
     def deserialize(config: dict, cache: Cache, handlers: LoggingHandlers) -> Config:
 
-        config_obj = LocalConfig()
+        resources = cast(LocalResources, LocalResources.deserialize(config, cache, handlers))
+        config_obj = LocalConfig(
+            resources,
+            config.get("server"),
+            config.get("cold-start"),
+            config.get("emulator"),
+            config.get("limits"),
+        )
         config_obj.logging_handlers = handlers
         return config_obj
 
+    """
+        Update the contents of the user cache.
+        Update values: storage configuration.
+    """
+
+    def update_cache(self, cache: Cache):
+        self.resources.update_cache(cache)
+
     def serialize(self) -> dict:
-        return {}
+        return {
+            "server": self._server_config,
+            "cold-start": self._cold_start_config,
+            "emulator": self._emulator_config,
+            "limits": self._limits_config,
+        }
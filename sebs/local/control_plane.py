@@ -0,0 +1,336 @@
+import http.client
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional
+
+from sebs.benchmark import Benchmark
+from sebs.utils import LoggingBase
+
+"""
+    Emulator of a FaaS control plane for local functions.
+
+    Each function has an HTTP entry point that routes invocations to container
+    instances. Like on cloud platforms, an instance processes one invocation
+    at a time: requests are sent to the most recently used idle instance,
+    new instances are started on demand up to the concurrency limit,
+    and further requests wait for an instance to become idle.
+    Instances idle for longer than the keep-alive time are evicted.
+
+    Lifecycle events of instances are logged, stored, and served as JSON
+    at `/events` of each entry point:
+        spawn - a new container was requested
+        thaw  - a frozen container was resumed, with the thaw time
+        ready - the container accepts requests, with the startup time
+        evict - the container was stopped after the keep-alive time
+        stop  - the container was stopped on shutdown or to enforce cold starts
+"""
+
+
+class Instance:
+    def __init__(self, container, address: str, port: int, thaw: Optional[int] = None):
+        self.container = container
+        self.address = address
+        self.port = port
+        self.last_used = time.monotonic()
+        # thaw time of a frozen container in microseconds, reported to the first invocation
+        self.thaw = thaw
+
+    @property
+    def id(self) -> str:
+        return self.container.id[0:12]
+
+
+class FunctionRouter(LoggingBase):
+    @staticmethod
+    def typename() -> str:
+        return "Local.FunctionRouter"
+
+    def __init__(
+        self,
+        control_plane: "ControlPlane",
+        function_name: str,
+        code_package: Benchmark,
+        memory: Optional[int],
+        address: str,
+        max_instances: int,
+    ):
+        super().__init__()
+        self._control_plane = control_plane
+        self._function_name = function_name
+        self._code_package = code_package
+        self.memory = memory
+        self._max_instances = max_instances
+        self._instances: List[Instance] = []
+        self._idle: List[Instance] = []
+        self._starting = 0
+        self._cond = threading.Condition()
+        router = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                try:
+                    status, response = router.invoke(body)
+                except Exception as e:
+                    router.logging.error(f"Invocation of {router._function_name} failed: {e}")
+                    status, response = 500, str(e).encode()
+                self._reply(status, response, "application/json")
+
+            def do_GET(self):
+                if self.path.split("?")[0] != "/events":
+                    self.send_error(404)
+                    return
+                events = router._control_plane.events(router._function_name)
+                self._reply(200, json.dumps(events).encode(), "application/json")
+
+            def _reply(self, status: int, body: bytes, content_type: str):
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((address, 0), Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+
+    @property
+    def url(self) -> str:
+        address, port = self._server.server_address[0:2]
+        return f"{address}:{port}"
+
+    @property
+    def code_package(self) -> Benchmark:
+        return self._code_package
+
+    @code_package.setter
+    def code_package(self, val: Benchmark):
+        self._code_package = val
+
+    """
+        Forward the request to an instance and return the status and body of its response.
+        The first invocation of a thawed instance reports the thaw time in its output.
+    """
+
+    def invoke(self, body: bytes):
+        instance = self._acquire()
+        # only the request that started the instance receives it before it becomes idle
+        thaw, instance.thaw = instance.thaw, None
+        try:
+            connection = http.client.HTTPConnection(instance.address, instance.port)
+            try:
+                connection.request("POST", "/", body, {"Content-Type": "application/json"})
+                response = connection.getresponse()
+                status, output = response.status, response.read()
+            finally:
+                connection.close()
+        finally:
+            self._release(instance)
+        if thaw is not None and status == 200:
+            output = json.dumps({**json.loads(output), "thaw": thaw}).encode()
+        return status, output
+
+    def _acquire(self) -> Instance:
+        with self._cond:
+            while True:
+                if self._idle:
+                    return self._idle.pop()
+                if len(self._instances) + self._starting < self._max_instances:
+                    self._starting += 1
+                    break
+                self._cond.wait()
+        try:
+            instance = self._control_plane.start_instance(
+                self._function_name, self._code_package, self.memory
+            )
+        finally:
+            with self._cond:
+                self._starting -= 1
+                self._cond.notify()
+        with self._cond:
+            self._instances.append(instance)
+        return instance
+
+    def _release(self, instance: Instance):
+        with self._cond:
+            instance.last_used = time.monotonic()
+            if instance in self._instances:
+                self._idle.append(instance)
+                self._cond.notify()
+
+    """
+        Remove instances idle for at least `keep_alive` seconds.
+        Busy instances are never evicted.
+
+        :return: evicted instances
+    """
+
+    def evict(self, keep_alive: float) -> List[Instance]:
+        now = time.monotonic()
+        with self._cond:
+            evicted = [inst for inst in self._idle if now - inst.last_used >= keep_alive]
+            for inst in evicted:
+                self._idle.remove(inst)
+                self._instances.remove(inst)
+            if evicted:
+                self._cond.notify_all()
+        return evicted
+
+    """
+        Remove all instances, including busy ones. Instances are never reused
+        afterward, and the caller stops their containers.
+
+        :return: removed instances
+    """
+
+    def remove_all(self) -> List[Instance]:
+        with self._cond:
+            removed = self._instances
+            self._instances = []
+            self._idle = []
+            self._cond.notify_all()
+        return removed
+
+    def shutdown(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+class ControlPlane(LoggingBase):
+    @staticmethod
+    def typename() -> str:
+        return "Local.ControlPlane"
+
+    """
+        :param start_container: starts a container of the function with the code
+            package and memory size that accepts connections, and returns it
+            with its address and the thaw time in microseconds, None if the
+            container was not frozen
+        :param stop_container: stops the container
+    """
+
+    def __init__(
+        self,
+        start_container: Callable[[str, Benchmark, Optional[int]], tuple],
+        stop_container: Callable[[object], None],
+        port: int,
+        address: str = "127.0.0.1",
+        max_instances: int = 10,
+        keep_alive: float = 600.0,
+    ):
+        super().__init__()
+        self._start_container = start_container
+        self._stop_container = stop_container
+        self._port = port
+        self._address = address
+        self._max_instances = max_instances
+        self._keep_alive = keep_alive
+        self._routers: Dict[str, FunctionRouter] = {}
+        self._events: List[dict] = []
+        self._events_lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._evictor = threading.Thread(target=self._evict_loop, daemon=True)
+        self._evictor.start()
+
+    """
+        Register the function and start its entry point.
+        Registering the function again updates its code package and memory size
+        used by new instances.
+
+        :return: address of the entry point
+    """
+
+    def register(
+        self, function_name: str, code_package: Benchmark, memory: Optional[int] = None
+    ) -> str:
+        if function_name in self._routers:
+            self._routers[function_name].code_package = code_package
+            self._routers[function_name].memory = memory
+        else:
+            router = FunctionRouter(
+                self, function_name, code_package, memory, self._address, self._max_instances
+            )
+            router.logging_handlers = self.logging_handlers
+            self._routers[function_name] = router
+            self.logging.info(f"Serve function {function_name} at {router.url}")
+        return self._routers[function_name].url
+
+    def is_registered(self, function_name: str) -> bool:
+        return function_name in self._routers
+
+    def _record(
+        self,
+        event: str,
+        function_name: str,
+        instance_id: str,
+        timestamp: Optional[float] = None,
+        **values,
+    ):
+        record = {
+            "timestamp": timestamp if timestamp is not None else time.time(),
+            "event": event,
+            "function": function_name,
+            "instance": instance_id,
+            **values,
+        }
+        with self._events_lock:
+            self._events.append(record)
+        self.logging.info(
+            f"Instance {instance_id} of {function_name}: {event} "
+            + " ".join(f"{key} {val}" for key, val in values.items())
+        )
+
+    def events(self, function_name: Optional[str] = None) -> List[dict]:
+        with self._events_lock:
+            return [
+                event
+                for event in self._events
+                if function_name is None or event["function"] == function_name
+            ]
+
+    def start_instance(
+        self, function_name: str, code_package: Benchmark, memory: Optional[int]
+    ) -> Instance:
+        spawned, begin = time.time(), time.monotonic()
+        container, address, thaw = self._start_container(function_name, code_package, memory)
+        startup = round(time.monotonic() - begin, 6)
+        instance = Instance(container, address, self._port, thaw)
+        # the container id is known only after the start, and the spawn is recorded afterward
+        self._record("spawn", function_name, instance.id, spawned)
+        if thaw is not None:
+            self._record("thaw", function_name, instance.id, thaw=thaw)
+        self._record("ready", function_name, instance.id, startup=startup)
+        return instance
+
+    def _stop(self, function_name: str, instances: List[Instance], event: str):
+        for instance in instances:
+            self._stop_container(instance.container)
+            self._record(event, function_name, instance.id)
+
+    def _evict_loop(self):
+        interval = min(1.0, self._keep_alive / 4)
+        while not self._stopped.wait(interval):
+            for name, router in list(self._routers.items()):
+                self._stop(name, router.evict(self._keep_alive), "evict")
+
+    """
+        Stop all instances of the function, e.g., to enforce cold starts.
+    """
+
+    def stop_instances(self, function_name: str):
+        if function_name in self._routers:
+            self._stop(function_name, self._routers[function_name].remove_all(), "stop")
+
+    def shutdown(self):
+        self._stopped.set()
+        for name, router in self._routers.items():
+            router.shutdown()
+            self._stop(name, router.remove_all(), "stop")
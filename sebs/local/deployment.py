@@ -1,25 +1,36 @@
 import json
-from typing import List, Optional
+import logging
+from typing import cast, List, Optional, Union
 
 from sebs.cache import Cache
 from sebs.local.function import LocalFunction
+from sebs.local.filesystem import FilesystemStorage
 from sebs.local.storage import Minio
 from sebs.utils import serialize
 
 
+"""
+    Function and storage containers that outlive the process starting them.
+    Emulated functions are not supported, since the local control plane
+    serving them is a part of the process.
+"""
+
+
 class Deployment:
     def __init__(self):
         self._functions: List[LocalFunction] = []
-        self._storage: Optional[Minio]
+        self._storage: Optional[Union[Minio, FilesystemStorage]]
         self._inputs: List[dict] = []
 
     def add_function(self, func: LocalFunction):
+        if not isinstance(func, LocalFunction):
+            raise RuntimeError(f"Function {func.name} does not run in a container!")
         self._functions.append(func)
 
     def add_input(self, func_input: dict):
         self._inputs.append(func_input)
 
-    def set_storage(self, storage: Minio):
+    def set_storage(self, storage: Union[Minio, FilesystemStorage]):
         self._storage = storage
 
     def serialize(self, path: str):
@@ -38,8 +49,16 @@ class Deployment:
             for input_cfg in input_data["inputs"]:
                 deployment._inputs.append(input_cfg)
             for func in input_data["functions"]:
-                deployment._functions.append(LocalFunction.deserialize(func))
-            deployment._storage = Minio.deserialize(input_data["storage"], cache_client)
+                # the control plane of emulated functions stopped with its process
+                if func.get("emulated"):
+                    logging.warning(f"Skip function {func['name']} served by the local emulator")
+                    continue
+                deployment._functions.append(cast(LocalFunction, LocalFunction.deserialize(func)))
+            storage = input_data["storage"]
+            if storage.get("type") == FilesystemStorage.typename():
+                deployment._storage = FilesystemStorage.deserialize(storage, cache_client)
+            else:
+                deployment._storage = Minio.deserialize(storage, cache_client)
             return deployment
 
     def shutdown(self):
@@ -0,0 +1,160 @@
+import os
+import shutil
+from typing import Dict, List, Optional
+
+from sebs.cache import Cache
+from ..faas.storage import PersistentStorage, md5_base64
+
+"""
+    Storage backed by a host directory, without any storage service.
+    Each bucket is a subdirectory, and the root directory is bind-mounted
+    into function containers. The storage wrapper accesses files directly,
+    which provides a baseline without network and serialization overheads.
+"""
+
+
+class FilesystemStorage(PersistentStorage):
+
+    # Location of the storage directory in function containers.
+    CONTAINER_PATH = "/sebs-storage"
+
+    @staticmethod
+    def typename() -> str:
+        return "Local.FilesystemStorage"
+
+    @staticmethod
+    def deployment_name():
+        return "local"
+
+    def __init__(self, path: str, cache_client: Cache, replace_existing: bool):
+        super().__init__(cache_client, replace_existing)
+        self._path = os.path.abspath(path)
+
+    @property
+    def path(self) -> str:
+        return self._path
+
+    def start(self):
+        os.makedirs(self._path, exist_ok=True)
+        self.logging.info("Using filesystem storage at {}".format(self._path))
+
+    def stop(self):
+        pass
+
+    def container_environment(self) -> Dict[str, str]:
+        return {"STORAGE_FILESYSTEM_PATH": FilesystemStorage.CONTAINER_PATH}
+
+    def container_volumes(self) -> Dict[str, dict]:
+        return {self._path: {"bind": FilesystemStorage.CONTAINER_PATH, "mode": "rw"}}
+
+    def _bucket_path(self, bucket_name: str) -> str:
+        return os.path.join(self._path, bucket_name)
+
+    def correct_name(self, name: str) -> str:
+        return name
+
+    """
+        Bucket names are deterministic, which allows to reuse
+        directories and their data across sessions.
+    """
+
+    def _create_bucket(self, name: str, buckets: List[str] = []):
+        for bucket_name in buckets:
+            if name in bucket_name:
+                self.logging.info(
+                    "Bucket {} for {} already exists, skipping.".format(bucket_name, name)
+                )
+                return bucket_name
+        os.makedirs(self._bucket_path(name), exist_ok=True)
+        self.logging.info("Created bucket {}".format(name))
+        return name
+
+    def download(self, bucket_name: str, key: str, filepath: str):
+        self.logging.info("Download {}:{} to {}".format(bucket_name, key, filepath))
+        shutil.copyfile(os.path.join(self._bucket_path(bucket_name), key), filepath)
+
+    # The modification time of the file is preserved, see `is_unchanged`.
+    def upload(self, bucket_name: str, filepath: str, key: str):
+        self.logging.info("Upload {} to {}".format(filepath, bucket_name))
+        destination = os.path.join(self._bucket_path(bucket_name), key)
+        os.makedirs(os.path.dirname(destination), exist_ok=True)
+        shutil.copy2(filepath, destination)
+
+    def list_bucket(self, bucket_name: str) -> List[str]:
+        bucket_path = self._bucket_path(bucket_name)
+        files = []
+        for root, dirs, filenames in os.walk(bucket_path):
+            for f in filenames:
+                files.append(os.path.relpath(os.path.join(root, f), bucket_path))
+        return files
+
+    def list_buckets(self, bucket_name: str) -> List[str]:
+        if not os.path.exists(self._path):
+            return []
+        return [
+            bucket
+            for bucket in os.listdir(self._path)
+            if bucket_name in bucket and os.path.isdir(self._bucket_path(bucket))
+        ]
+
+    def list_bucket_checksums(self, bucket_name: str) -> Dict[str, Optional[str]]:
+        bucket_path = self._bucket_path(bucket_name)
+        return {
+            f: md5_base64(os.path.join(bucket_path, f)) for f in self.list_bucket(bucket_name)
+        }
+
+    def file_checksum(self, filepath: str) -> str:
+        return md5_base64(filepath)
+
+    """
+        Stored files are compared directly instead of listing checksums
+        of the entire bucket. Files of different size are modified, and files
+        with the same size and modification time as the input are unchanged.
+        Only the remaining files are compared by content.
+    """
+
+    def is_unchanged(self, bucket_name: str, key: str, filepath: str) -> bool:
+        stored = os.path.join(self._bucket_path(bucket_name), key)
+        try:
+            stored_stat = os.stat(stored)
+        except FileNotFoundError:
+            return False
+        local_stat = os.stat(filepath)
+        if stored_stat.st_size != local_stat.st_size:
+            return False
+        if stored_stat.st_mtime_ns == local_stat.st_mtime_ns:
+            return True
+        return md5_base64(stored) == md5_base64(filepath)
+
+    def clean_bucket(self, bucket: str):
+        bucket_path = self._bucket_path(bucket)
+        for f in self.list_bucket(bucket):
+            os.remove(os.path.join(bucket_path, f))
+
+    def clean(self):
+        for bucket in self.output_buckets:
+            self.clean_bucket(bucket)
+
+    def download_results(self, result_dir: str):
+        result_dir = os.path.join(result_dir, "storage_output")
+        for bucket in self.output_buckets:
+            bucket_path = self._bucket_path(bucket)
+            for f in self.list_bucket(bucket):
+                destination = os.path.join(result_dir, f)
+                os.makedirs(os.path.dirname(destination), exist_ok=True)
+                shutil.copyfile(os.path.join(bucket_path, f), destination)
+
+    def serialize(self) -> dict:
+        return {
+            "type": FilesystemStorage.typename(),
+            "path": self._path,
+            "input": self.input_buckets,
+            "output": self.output_buckets,
+        }
+
+    @staticmethod
+    def deserialize(cached_config: dict, cache_client: Cache) -> "FilesystemStorage":
+        obj = FilesystemStorage(cached_config["path"], cache_client, False)
+        obj.input_buckets = cached_config["input"]
+        obj.output_buckets = cached_config["output"]
+        return obj
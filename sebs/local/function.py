@@ -1,13 +1,42 @@
 import docker
 import json
+import math
+import socket
+import threading
+import time
+from typing import cast, Optional
 
 from sebs.faas.function import ExecutionResult, Function, Trigger
 
 
+"""
+    Wait until the server in a container accepts connections.
+"""
+
+
+def wait_for_server(address: str, port: int, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            with socket.create_connection((address, port), timeout=1):
+                return
+        except OSError:
+            if time.monotonic() > deadline:
+                raise RuntimeError(f"Server at {address}:{port} not ready after {timeout} s")
+            time.sleep(0.01)
+
+
 class HTTPTrigger(Trigger):
+
+    # guards thaw times of all triggers; a class attribute keeps triggers picklable
+    _thaw_lock = threading.Lock()
+
     def __init__(self, url: str):
         super().__init__()
         self.url = url
+        # thaw time of the function container in microseconds,
+        # reported to the next cold invocation
+        self.thaw: Optional[int] = None
 
     @staticmethod
     def typename() -> str:
@@ -19,7 +48,51 @@ class HTTPTrigger(Trigger):
 
     def sync_invoke(self, payload: dict) -> ExecutionResult:
         self.logging.debug(f"Invoke function {self.url}")
-        return self._http_invoke(payload, self.url)
+        result = self._http_invoke(payload, self.url)
+        HTTPTrigger.fill_resource_usage(result)
+        # The time of preparing a frozen instance is measured outside of the function,
+        # and it is reported separately from the initialization of the handler.
+        # Only the cold invocation of the thawed container reports it,
+        # also when concurrent invocations share the trigger.
+        if "thaw" in result.output:
+            result.times.initialization = int(result.output["thaw"])
+        elif result.stats.cold_start:
+            with HTTPTrigger._thaw_lock:
+                thaw, self.thaw = self.thaw, None
+            if thaw is not None:
+                result.times.initialization = thaw
+        return result
+
+    """
+        Fill provider times, resource usage statistics and billing of the invocation
+        with values measured by the server in the container, since there is no provider log.
+        Execution time includes the import of function code, and the initialization
+        of cold invocations is the time of the import.
+        Billing follows AWS Lambda: the execution time rounded up to milliseconds,
+        multiplied by the memory size.
+
+        :return: false if the output has no resource usage
+    """
+
+    @staticmethod
+    def fill_resource_usage(result: ExecutionResult) -> bool:
+        resources = result.output.get("resources")
+        if resources is None:
+            return False
+        result.provider_times.execution = int(resources["execution"])
+        if result.stats.cold_start:
+            result.provider_times.initialization = int(resources["initialization"])
+        stats = result.stats
+        if resources.get("memory_peak") is not None:
+            stats.memory_used = resources["memory_peak"] / 1024.0 / 1024.0
+        for key in ("cpu_time", "net_rx", "net_tx", "blkio_read", "blkio_write"):
+            setattr(stats, key, resources.get(key))
+        if resources.get("memory_size") is not None:
+            billing = result.billing
+            billing.billed_time = math.ceil(resources["execution"] / 1000.0)
+            billing.memory = resources["memory_size"]
+            billing.gb_seconds = billing.billed_time * billing.memory
+        return True
 
     def async_invoke(self, payload: dict) -> ExecutionResult:
         import concurrent.futures
@@ -36,20 +109,49 @@ class HTTPTrigger(Trigger):
         return HTTPTrigger(obj["url"])
 
 
+"""
+    Function running in a single container. The memory size of the function
+    defines resource limits of its container, when limits are enabled.
+"""
+
+
 class LocalFunction(Function):
     def __init__(
-        self, docker_container, port: int, name: str, benchmark: str, code_package_hash: str
+        self,
+        docker_container,
+        port: int,
+        name: str,
+        benchmark: str,
+        code_package_hash: str,
+        memory: Optional[int] = None,
     ):
         super().__init__(benchmark, name, code_package_hash)
+        self._port = port
+        self.memory = memory
+        self._set_instance(docker_container)
+
+    @staticmethod
+    def typename() -> str:
+        return "Local.LocalFunction"
+
+    @property
+    def instance(self):
+        return self._instance
+
+    @property
+    def url(self) -> str:
+        return self._url
+
+    @staticmethod
+    def container_address(docker_container) -> str:
+        docker_container.reload()
+        return docker_container.attrs["NetworkSettings"]["Networks"]["bridge"]["IPAddress"]
+
+    def _set_instance(self, docker_container):
         self._instance = docker_container
         self._instance_id = docker_container.id
-        self._instance.reload()
-        networks = self._instance.attrs["NetworkSettings"]["Networks"]
-        self._port = port
-        self._url = "{IPAddress}:{Port}".format(
-            IPAddress=networks["bridge"]["IPAddress"], Port=port
-        )
-        if not self._url:
+        ip_address = LocalFunction.container_address(docker_container)
+        if not ip_address:
             self.logging.error(
                 f"Couldn't read the IP address of container from attributes "
                 f"{json.dumps(self._instance.attrs, indent=2)}"
@@ -57,10 +159,30 @@ class LocalFunction(Function):
             raise RuntimeError(
                 f"Incorrect detection of IP address for container with id {self._instance_id}"
             )
+        self._url = "{IPAddress}:{Port}".format(IPAddress=ip_address, Port=self._port)
 
-    @staticmethod
-    def typename() -> str:
-        return "Local.LocalFunction"
+    """
+        Serve the function from another container, e.g., after a restart
+        or replacement to enforce a cold start. HTTP triggers are redirected
+        to the new address.
+
+        :param thaw: thaw time of a frozen container in microseconds,
+            reported by the next cold invocation
+        :return: the previous container
+    """
+
+    def replace_instance(self, docker_container, thaw: Optional[int] = None):
+        previous = self._instance
+        self._set_instance(docker_container)
+        for trigger in self.triggers(Trigger.TriggerType.HTTP):
+            cast(HTTPTrigger, trigger).url = self._url
+            with HTTPTrigger._thaw_lock:
+                cast(HTTPTrigger, trigger).thaw = thaw
+        return previous
+
+    def wait_until_ready(self, timeout: float = 30.0):
+        address, port = self._url.split(":")
+        wait_for_server(address, int(port), timeout)
 
     def serialize(self) -> dict:
         return {
@@ -68,10 +190,13 @@ class LocalFunction(Function):
             "instance_id": self._instance_id,
             "url": self._url,
             "port": self._port,
+            "memory": self.memory,
         }
 
     @staticmethod
-    def deserialize(cached_config: dict) -> "LocalFunction":
+    def deserialize(cached_config: dict) -> Function:
+        if cached_config.get("emulated"):
+            return EmulatedFunction.deserialize(cached_config)
         try:
             instance_id = cached_config["instance_id"]
             instance = docker.from_env().containers.get(instance_id)
@@ -81,6 +206,7 @@ class LocalFunction(Function):
                 cached_config["name"],
                 cached_config["benchmark"],
                 cached_config["hash"],
+                cached_config.get("memory"),
             )
         except docker.errors.NotFound:
             raise RuntimeError(f"Cached container {instance_id} not available anymore!")
@@ -89,3 +215,54 @@ class LocalFunction(Function):
         self.logging.info(f"Stopping function container {self._instance_id}")
         self._instance.stop(timeout=0)
         self.logging.info(f"Function container {self._instance_id} stopped succesfully")
+
+
+"""
+    Function served by the local control plane, which routes invocations
+    to containers started on demand. The function is not bound to a container,
+    and the address of its entry point changes between sessions.
+"""
+
+
+class EmulatedFunction(Function):
+    def __init__(
+        self,
+        url: str,
+        name: str,
+        benchmark: str,
+        code_package_hash: str,
+        memory: Optional[int] = None,
+    ):
+        super().__init__(benchmark, name, code_package_hash)
+        self._url = url
+        self.memory = memory
+
+    @staticmethod
+    def typename() -> str:
+        return "Local.EmulatedFunction"
+
+    @property
+    def url(self) -> str:
+        return self._url
+
+    @url.setter
+    def url(self, url: str):
+        self._url = url
+        for trigger in self.triggers(Trigger.TriggerType.HTTP):
+            cast(HTTPTrigger, trigger).url = url
+
+    def serialize(self) -> dict:
+        return {**super().serialize(), "emulated": True, "url": self._url, "memory": self.memory}
+
+    @staticmethod
+    def deserialize(cached_config: dict) -> "EmulatedFunction":
+        ret = EmulatedFunction(
+            cached_config["url"],
+            cached_config["name"],
+            cached_config["benchmark"],
+            cached_config["hash"],
+            cached_config.get("memory"),
+        )
+        for trigger in cached_config["triggers"]:
+            ret.add_trigger(HTTPTrigger.deserialize(trigger))
+        return ret
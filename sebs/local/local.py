@@ -1,6 +1,11 @@
+import collections
+import concurrent.futures
+import http.client
 import os
 import shutil
-from typing import cast, Dict, List, Optional, Type, Tuple  # noqa
+import threading
+import time
+from typing import cast, Deque, Dict, List, Optional, Type, Tuple, Union  # noqa
 
 import docker
 
@@ -10,7 +15,9 @@ from sebs.config import SeBSConfig
 from sebs.utils import LoggingHandlers
 from sebs.local.config import LocalConfig
 from sebs.local.storage import Minio
-from sebs.local.function import LocalFunction
+from sebs.local.filesystem import FilesystemStorage
+from sebs.local.control_plane import ControlPlane
+from sebs.local.function import EmulatedFunction, LocalFunction, wait_for_server
 from sebs.faas.function import Function, ExecutionResult, Trigger
 from sebs.faas.storage import PersistentStorage
 from sebs.faas.system import System
@@ -20,6 +27,10 @@ from sebs.benchmark import Benchmark
 class Local(System):
 
     DEFAULT_PORT = 9000
+    # CFS period in microseconds, the CPU quota of containers is a fraction of it
+    CPU_PERIOD = 100000
+    # cumulative counters of resource usage measured in containers
+    RESOURCE_COUNTERS = ["cpu_time", "net_rx", "net_tx", "blkio_read", "blkio_write"]
 
     @staticmethod
     def name():
@@ -64,13 +75,22 @@ class Local(System):
         super().__init__(sebs_config, cache_client, docker_client)
         self.logging_handlers = logger_handlers
         self._config = config
-        self._storage_instance: Optional[Minio] = None
+        self._storage_instance: Optional[Union[Minio, FilesystemStorage]] = None
         self._remove_containers = True
         self._shutdown_storage = True
+        # containers started in advance to replace function instances
+        self._pools: Dict[str, Deque[concurrent.futures.Future]] = {}
+        self._pool_executor = concurrent.futures.ThreadPoolExecutor(max_workers=4)
+        self._pools_lock = threading.Lock()
+        self._control_plane_instance: Optional[ControlPlane] = None
 
     """
         Create wrapper object for minio storage and fill buckets.
         Starts minio as a Docker instance, using always fresh buckets.
+        In the persistent mode, the storage container and its data volume
+        are reused across sessions.
+        The filesystem storage uses a host directory instead of minio,
+        and the directory is mounted into function containers.
 
         :param benchmark:
         :param buckets: number of input and output buckets
@@ -80,9 +100,19 @@ class Local(System):
 
     def get_storage(self, replace_existing: bool = False) -> PersistentStorage:
         if not self._storage_instance:
-            self._storage_instance = Minio(
-                self._docker_client, self._cache_client, replace_existing
-            )
+            storage_config = self.config.resources.storage_config
+            if storage_config.get("type", "minio") == "filesystem":
+                self._storage_instance = FilesystemStorage(
+                    storage_config.get(
+                        "path", os.path.join(self._cache_client.cache_dir, "storage")
+                    ),
+                    self._cache_client,
+                    replace_existing,
+                )
+            else:
+                self._storage_instance = Minio(
+                    self._docker_client, self._cache_client, replace_existing, storage_config
+                )
             self._storage_instance.logging_handlers = self.logging_handlers
             self._storage_instance.start()
         else:
@@ -90,12 +120,37 @@ class Local(System):
         return self._storage_instance
 
     """
-        Shut down minio storage instance.
+        Control plane of the emulator, started when it is used for the first time.
+    """
+
+    @property
+    def control_plane(self) -> ControlPlane:
+        if not self._control_plane_instance:
+            config = self.config.emulator_config
+            self._control_plane_instance = ControlPlane(
+                self._start_emulated_instance,
+                Local._stop_container,
+                self.DEFAULT_PORT,
+                config["address"],
+                config["max-instances"],
+                config["keep-alive"],
+            )
+            self._control_plane_instance.logging_handlers = self.logging_handlers
+        return self._control_plane_instance
+
+    """
+        Shut down minio storage instance, the emulator, and containers of pools.
     """
 
     def shutdown(self):
+        if self._control_plane_instance:
+            self._control_plane_instance.shutdown()
+        for name in list(self._pools.keys()):
+            self._drain_pool(name)
+        self._pool_executor.shutdown(wait=True)
         if self._storage_instance and self.shutdown_storage:
             self._storage_instance.stop()
+        super().shutdown()
 
     """
         It would be sufficient to just pack the code and ship it as zip to AWS.
@@ -136,7 +191,15 @@ class Local(System):
 
         return directory, bytes_size
 
-    def create_function(self, code_package: Benchmark, func_name: str) -> "LocalFunction":
+    """
+        Start a container serving the function code. With resource limits enabled,
+        the container memory is limited to the function memory, and the CPU quota
+        is proportional to it. Swap is disabled, like in cloud functions.
+
+        :param memory: function memory in MB, the benchmark default when not provided
+    """
+
+    def _start_container(self, code_package: Benchmark, memory: Optional[int] = None):
 
         home_dir = os.path.join(
             "/home", self._system_config.username(self.name(), code_package.language_name)
@@ -147,21 +210,31 @@ class Local(System):
             code_package.language_version,
         )
         environment: Dict[str, str] = {}
+        volumes = {
+            code_package.code_location: {"bind": os.path.join(home_dir, "code"), "mode": "ro"}
+        }
         if self._storage_instance:
-            environment = {
-                "MINIO_ADDRESS": self._storage_instance._url,
-                "MINIO_ACCESS_KEY": self._storage_instance._access_key,
-                "MINIO_SECRET_KEY": self._storage_instance._secret_key,
+            environment = self._storage_instance.container_environment()
+            volumes.update(self._storage_instance.container_volumes())
+        if memory is None:
+            memory = code_package.benchmark_config.memory
+        environment["SERVER_TYPE"] = self.config.server_config["type"]
+        environment["SERVER_WORKERS"] = str(self.config.server_workers(memory))
+        environment["FUNCTION_MEMORY"] = str(memory)
+        limits: dict = {}
+        if self.config.limits_config["enabled"]:
+            limits = {
+                "mem_limit": f"{memory}m",
+                "memswap_limit": f"{memory}m",
+                "cpu_period": self.CPU_PERIOD,
+                "cpu_quota": max(1000, int(self.CPU_PERIOD * self.config.cpus(memory))),
             }
-        container = self._docker_client.containers.run(
+        return self._docker_client.containers.run(
             image=container_name,
             command=f"python3 server.py {self.DEFAULT_PORT}",
-            volumes={
-                code_package.code_location: {"bind": os.path.join(home_dir, "code"), "mode": "ro"}
-            },
+            volumes=volumes,
             environment=environment,
-            # FIXME: make CPUs configurable
-            # cpuset_cpus=cpuset,
+            **limits,
             # required to access perf counters
             # alternative: use custom seccomp profile
             privileged=True,
@@ -175,20 +248,77 @@ class Local(System):
             detach=True,
             # tty=True,
         )
+
+    def create_function(self, code_package: Benchmark, func_name: str) -> Function:
+
+        memory = code_package.benchmark_config.memory
+        if self.config.emulator_config["enabled"]:
+            url = self.control_plane.register(func_name, code_package, memory)
+            return EmulatedFunction(
+                url, func_name, code_package.benchmark, code_package.hash, memory
+            )
+
+        container = self._start_container(code_package, memory)
         func = LocalFunction(
-            container, self.DEFAULT_PORT, func_name, code_package.benchmark, code_package.hash
+            container,
+            self.DEFAULT_PORT,
+            func_name,
+            code_package.benchmark,
+            code_package.hash,
+            memory,
         )
         self.logging.info(
-            f"Started {func_name} function at container {container.id} , running on {func._url}"
+            f"Started {func_name} function at container {container.id} , running on {func.url}"
         )
         return func
 
     """
-        FIXME: restart Docker?
+        Apply the current code and memory size of the function, e.g., in memory sweeps
+        of experiments. The container is replaced with a new one, since the number
+        of server workers depends on the memory. Containers started in advance
+        with previous settings are discarded.
+        Emulated functions stop all instances, and new ones use the current settings.
     """
 
     def update_function(self, function: Function, code_package: Benchmark):
-        pass
+        if isinstance(function, EmulatedFunction):
+            self.control_plane.stop_instances(function.name)
+            function.url = self.control_plane.register(
+                function.name, code_package, function.memory
+            )
+            return
+
+        local_function = cast(LocalFunction, function)
+        self._drain_pool(local_function.name)
+        container = self._start_ready_container(code_package, local_function.memory)
+        previous = local_function.replace_instance(container)
+        self._pool_executor.submit(Local._stop_container, previous)
+        limits = ""
+        if self.config.limits_config["enabled"] and local_function.memory is not None:
+            limits = (
+                f" with {local_function.memory} MB and "
+                f"{self.config.cpus(local_function.memory):.2f} CPUs"
+            )
+        self.logging.info(f"Updated {local_function.name}{limits}, running on {local_function.url}")
+
+    """
+        Entry points of emulated functions are started again in each session.
+    """
+
+    def get_function(self, code_package: Benchmark, func_name: Optional[str] = None) -> Function:
+        function = super().get_function(code_package, func_name)
+        if isinstance(function, EmulatedFunction):
+            if not self.control_plane.is_registered(function.name):
+                function.url = self.control_plane.register(
+                    function.name, code_package, function.memory
+                )
+                self.cache_client.update_function(function)
+        elif self.config.emulator_config["enabled"]:
+            self.logging.warning(
+                f"Cached function {function.name} is not served by the emulator, "
+                "use another function name to create an emulated one."
+            )
+        return function
 
     """
         For local functions, we don't need to do anything for a cached function.
@@ -198,9 +328,9 @@ class Local(System):
     def create_trigger(self, func: Function, trigger_type: Trigger.TriggerType) -> Trigger:
         from sebs.local.function import HTTPTrigger
 
-        function = cast(LocalFunction, func)
+        function = cast(Union[LocalFunction, EmulatedFunction], func)
         if trigger_type == Trigger.TriggerType.HTTP:
-            trigger = HTTPTrigger(function._url)
+            trigger = HTTPTrigger(function.url)
             trigger.logging_handlers = self.logging_handlers
         else:
             raise RuntimeError("Not supported!")
@@ -212,6 +342,15 @@ class Local(System):
     def cached_function(self, function: Function):
         pass
 
+    """
+        Resource usage of containers is sampled by the server around each invocation,
+        returned with the output, and stored in statistics of results by the HTTP trigger.
+        Results that still have the output, e.g., from earlier versions, are filled here.
+        Totals of CPU time [us], network and block I/O [bytes], and the maximal
+        memory used [MB] of measured invocations are stored in metrics.
+        Counters include all invocations served concurrently by a container.
+    """
+
     def download_metrics(
         self,
         function_name: str,
@@ -220,10 +359,160 @@ class Local(System):
         requests: Dict[str, ExecutionResult],
         metrics: dict,
     ):
-        pass
+        from sebs.local.function import HTTPTrigger
+
+        totals = {key: 0 for key in Local.RESOURCE_COUNTERS}
+        memory_used = 0.0
+        measured = 0
+        for result in requests.values():
+            HTTPTrigger.fill_resource_usage(result)
+            stats = result.stats
+            if stats.cpu_time is None and stats.memory_used is None:
+                continue
+            measured += 1
+            for key in Local.RESOURCE_COUNTERS:
+                totals[key] += getattr(stats, key) or 0
+            memory_used = max(memory_used, stats.memory_used or 0.0)
+        self.logging.info(
+            f"Local: Received resource usage of {measured} out of {len(requests)} invocations."
+        )
+        if measured > 0:
+            metrics.update({**totals, "memory_used": memory_used, "measured": measured})
+
+    """
+        Recycle function containers, so that the next invocation of each
+        function is a cold start. The "restart" method restarts containers in place.
+        The "pool" method replaces each container with one started in advance
+        and starts a replacement in the background; it requires the code package.
+        The "freeze" method replaces each container with a thawed one from the pool,
+        and the thaw time is reported by the next invocation.
+        Emulated functions stop all instances, and new ones are started on demand.
+    """
+
+    def enforce_cold_start(
+        self, functions: List[Function], code_package: Optional[Benchmark] = None
+    ):
+        method = self.config.cold_start_config["method"]
+        for func in functions:
+            if isinstance(func, EmulatedFunction):
+                self.control_plane.stop_instances(func.name)
+                continue
+            function = cast(LocalFunction, func)
+            if method in ("pool", "freeze"):
+                if code_package is None:
+                    raise RuntimeError(
+                        "Replacing local containers from a pool requires the code package!"
+                    )
+                container = self._pooled_container(function.name, code_package, function.memory)
+                thaw = self._thaw(container) if method == "freeze" else None
+                previous = function.replace_instance(container, thaw)
+                self._pool_executor.submit(Local._stop_container, previous)
+            else:
+                function.instance.restart(timeout=0)
+                function.replace_instance(function.instance)
+            function.wait_until_ready()
+            self.cache_client.update_function(function)
+            self.logging.info(f"Recycled {function.name}, running on {function.url}")
+
+    """
+        Take a container from the pool of the function and start a new one
+        in the background. The pool is filled when it is used for the first time.
+        With the "freeze" method, containers of the pool are paused.
+    """
+
+    def _pooled_container(
+        self, function_name: str, code_package: Benchmark, memory: Optional[int]
+    ):
+        with self._pools_lock:
+            pool = self._pools.setdefault(function_name, collections.deque())
+            while len(pool) < self.config.cold_start_config["pool-size"] + 1:
+                pool.append(
+                    self._pool_executor.submit(self._start_pooled_container, code_package, memory)
+                )
+            container = pool.popleft()
+        return container.result()
+
+    def _start_pooled_container(self, code_package: Benchmark, memory: Optional[int]):
+        container = self._start_ready_container(code_package, memory)
+        if self.config.cold_start_config["method"] == "freeze":
+            try:
+                self._load_code(container)
+                container.pause()
+            except Exception:
+                container.stop(timeout=0)
+                raise
+        return container
 
-    def enforce_cold_start(self, functions: List[Function]):
-        raise NotImplementedError()
+    """
+        Import the function code in the container without invoking it.
+    """
+
+    def _load_code(self, container):
+        connection = http.client.HTTPConnection(
+            LocalFunction.container_address(container), self.DEFAULT_PORT
+        )
+        try:
+            connection.request("POST", "/load", "{}", {"Content-Type": "application/json"})
+            response = connection.getresponse()
+            output = response.read()
+            if response.status != 200:
+                raise RuntimeError(f"Loading code in container {container.id} failed: {output}")
+        finally:
+            connection.close()
+
+    """
+        Resume a paused container.
+
+        :return: thaw time in microseconds
+    """
+
+    def _thaw(self, container) -> int:
+        begin = time.perf_counter()
+        container.unpause()
+        return int((time.perf_counter() - begin) * 1000 * 1000)
+
+    # Paused containers are resumed before stopping.
+    @staticmethod
+    def _stop_container(container):
+        container.reload()
+        if container.status == "paused":
+            container.unpause()
+        container.stop(timeout=0)
+
+    def _drain_pool(self, function_name: str):
+        with self._pools_lock:
+            pool = self._pools.pop(function_name, [])
+        for container in pool:
+            self._pool_executor.submit(
+                lambda fut: Local._stop_container(fut.result()), container
+            )
+
+    def _start_ready_container(self, code_package: Benchmark, memory: Optional[int] = None):
+        container = self._start_container(code_package, memory)
+        try:
+            wait_for_server(LocalFunction.container_address(container), self.DEFAULT_PORT)
+        except RuntimeError:
+            container.stop(timeout=0)
+            raise
+        return container
+
+    """
+        Start an instance of the emulator. With the "pool" and "freeze" methods of
+        cold starts, instances are taken from the pool of the function.
+    """
+
+    def _start_emulated_instance(
+        self, function_name: str, code_package: Benchmark, memory: Optional[int]
+    ):
+        method = self.config.cold_start_config["method"]
+        thaw = None
+        if method in ("pool", "freeze"):
+            container = self._pooled_container(function_name, code_package, memory)
+            if method == "freeze":
+                thaw = self._thaw(container)
+        else:
+            container = self._start_ready_container(code_package, memory)
+        return container, LocalFunction.container_address(container), thaw
 
     @staticmethod
     def default_function_name(code_package: Benchmark) -> str:
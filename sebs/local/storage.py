@@ -1,17 +1,23 @@
+import concurrent.futures
 import json
 import os
 import secrets
 import uuid
-from typing import List, Optional
+from typing import Dict, List, Optional
 
 import docker
 import minio
 
 from sebs.cache import Cache
-from ..faas.storage import PersistentStorage
+from ..faas.storage import PersistentStorage, s3_etag
 
 
 class Minio(PersistentStorage):
+
+    # Multipart upload is used for files larger than a single part.
+    # Equal to the default of minio client.
+    MULTIPART_PART_SIZE = 5 * 1024 * 1024
+
     @staticmethod
     def typename() -> str:
         return "Local.Minio"
@@ -20,14 +26,41 @@ class Minio(PersistentStorage):
     def deployment_name():
         return "local"
 
-    def __init__(self, docker_client: docker.client, cache_client: Cache, replace_existing: bool):
+    def __init__(
+        self,
+        docker_client: docker.client,
+        cache_client: Cache,
+        replace_existing: bool,
+        storage_config: Optional[dict] = None,
+    ):
         super().__init__(cache_client, replace_existing)
         self._docker_client = docker_client
         self._port = 9000
         self._location = "us-east-1"
         self._storage_container: Optional[docker.container] = None
+        self._config = storage_config if storage_config is not None else {}
+
+    """
+        Persistent storage keeps data in a named Docker volume,
+        and the Minio container is not stopped at the end of a session.
+    """
+
+    @property
+    def persistent(self) -> bool:
+        return self._config.get("persistent", False)
+
+    @property
+    def volume(self) -> str:
+        return self._config.get("volume", "sebs-minio-data")
+
+    @property
+    def container_name(self) -> str:
+        return "sebs-minio-{}".format(self.volume)
 
     def start(self):
+        if self.persistent:
+            self._start_persistent()
+            return
         self._access_key = secrets.token_urlsafe(32)
         self._secret_key = secrets.token_hex(32)
         self.logging.info("Minio storage ACCESS_KEY={}".format(self._access_key))
@@ -55,6 +88,55 @@ class Minio(PersistentStorage):
             self.logging.error("Starting Minio storage failed! Unknown error: {}".format(e))
             raise RuntimeError(f"Starting Minio storage unsuccesful")
 
+    """
+        Attach to the running storage container or start a new one with the data volume.
+        Credentials are kept in storage config, which is stored in the cache.
+    """
+
+    def _start_persistent(self):
+        try:
+            self._storage_container = self._docker_client.containers.get(self.container_name)
+            # Container environment is authoritative since data has been created with it.
+            env = dict(
+                var.split("=", 1) for var in self._storage_container.attrs["Config"]["Env"]
+            )
+            self._config["access_key"] = env["MINIO_ACCESS_KEY"]
+            self._config["secret_key"] = env["MINIO_SECRET_KEY"]
+            if self._storage_container.status != "running":
+                self.logging.info(f"Restarting persistent minio container {self.container_name}")
+                self._storage_container.start()
+            else:
+                self.logging.info(f"Reusing persistent minio container {self.container_name}")
+        except docker.errors.NotFound:
+            if "access_key" not in self._config:
+                self._config["access_key"] = secrets.token_urlsafe(32)
+                self._config["secret_key"] = secrets.token_hex(32)
+            self.logging.info(
+                f"Starting persistent minio container {self.container_name} "
+                f"with volume {self.volume}"
+            )
+            try:
+                self._storage_container = self._docker_client.containers.run(
+                    "minio/minio",
+                    command="server /data",
+                    name=self.container_name,
+                    network_mode="bridge",
+                    volumes={self.volume: {"bind": "/data", "mode": "rw"}},
+                    environment={
+                        "MINIO_ACCESS_KEY": self._config["access_key"],
+                        "MINIO_SECRET_KEY": self._config["secret_key"],
+                    },
+                    stdout=True,
+                    stderr=True,
+                    detach=True,
+                )
+            except docker.errors.APIError as e:
+                self.logging.error("Starting Minio storage failed! Reason: {}".format(e))
+                raise RuntimeError("Starting Minio storage unsuccesful")
+        self._access_key = self._config["access_key"]
+        self._secret_key = self._config["secret_key"]
+        self.configure_connection()
+
     def configure_connection(self):
         # who knows why? otherwise attributes are not loaded
         self._storage_container.reload()
@@ -74,6 +156,9 @@ class Minio(PersistentStorage):
         self.connection = self.get_connection()
 
     def stop(self):
+        if self.persistent:
+            self.logging.info(f"Keeping persistent minio container {self.container_name}")
+            return
         if self._storage_container is not None:
             self.logging.info("Stopping minio container at {url}".format(url=self._url))
             self._storage_container.stop()
@@ -84,6 +169,16 @@ class Minio(PersistentStorage):
             self._url, access_key=self._access_key, secret_key=self._secret_key, secure=False
         )
 
+    def container_environment(self) -> Dict[str, str]:
+        return {
+            "MINIO_ADDRESS": self._url,
+            "MINIO_ACCESS_KEY": self._access_key,
+            "MINIO_SECRET_KEY": self._secret_key,
+        }
+
+    def container_volumes(self) -> Dict[str, dict]:
+        return {}
+
     def _create_bucket(self, name: str, buckets: List[str] = []):
         for bucket_name in buckets:
             if name in bucket_name:
@@ -106,13 +201,6 @@ class Minio(PersistentStorage):
             # rethrow
             raise err
 
-    def uploader_func(self, bucket_idx, file, filepath):
-        try:
-            self.connection.fput_object(self.input_buckets[bucket_idx], file, filepath)
-        except minio.error.ResponseError as err:
-            self.logging.error("Upload failed!")
-            raise (err)
-
     def clean(self):
         for bucket in self.output_buckets:
             objects = self.connection.list_objects_v2(bucket)
@@ -120,13 +208,21 @@ class Minio(PersistentStorage):
             for err in self.connection.remove_objects(bucket, objects):
                 self.logging.error("Deletion Error: {}".format(err))
 
-    def download_results(self, result_dir):
+    def download_results(self, result_dir: str, workers: int = 16):
         result_dir = os.path.join(result_dir, "storage_output")
-        for bucket in self.output_buckets:
-            objects = self.connection.list_objects_v2(bucket)
-            objects = [obj.object_name for obj in objects]
-            for obj in objects:
-                self.connection.fget_object(bucket, obj, os.path.join(result_dir, obj))
+        with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as pool:
+            downloads = [
+                pool.submit(
+                    self.download,
+                    bucket,
+                    obj.object_name,
+                    os.path.join(result_dir, obj.object_name),
+                )
+                for bucket in self.output_buckets
+                for obj in self.connection.list_objects_v2(bucket, recursive=True)
+            ]
+            for download in concurrent.futures.as_completed(downloads):
+                download.result()
 
     def clean_bucket(self, bucket: str):
         delete_object_list = map(
@@ -141,29 +237,47 @@ class Minio(PersistentStorage):
         return name
 
     def download(self, bucket_name: str, key: str, filepath: str):
-        raise NotImplementedError()
+        self.logging.info("Download {}:{} to {}".format(bucket_name, key, filepath))
+        self.connection.fget_object(bucket_name, key, filepath)
 
     def list_bucket(self, bucket_name: str):
         objects_list = self.connection.list_objects(bucket_name)
         objects: List[str]
         return [obj.object_name for obj in objects_list]
 
+    def list_bucket_checksums(self, bucket_name: str) -> Dict[str, Optional[str]]:
+        objects = self.connection.list_objects_v2(bucket_name, recursive=True)
+        return {obj.object_name: obj.etag.strip('"') for obj in objects}
+
+    def file_checksum(self, filepath: str) -> str:
+        multipart = os.path.getsize(filepath) > Minio.MULTIPART_PART_SIZE
+        return s3_etag(filepath, Minio.MULTIPART_PART_SIZE, multipart)
+
     def list_buckets(self, bucket_name: str) -> List[str]:
         buckets = self.connection.list_buckets()
         return [bucket.name for bucket in buckets if bucket_name in bucket.name]
 
     def upload(self, bucket_name: str, filepath: str, key: str):
-        raise NotImplementedError()
+        self.logging.info("Upload {} to {}".format(filepath, bucket_name))
+        try:
+            self.connection.fput_object(
+                bucket_name, key, filepath, part_size=Minio.MULTIPART_PART_SIZE
+            )
+        except minio.error.ResponseError as err:
+            self.logging.error("Upload failed!")
+            raise (err)
 
     def serialize(self) -> dict:
         if self._storage_container is not None:
             return {
+                "type": Minio.typename(),
                 "instance_id": self._storage_container.id,
                 "address": self._url,
                 "secret_key": self._secret_key,
                 "access_key": self._access_key,
                 "input": self.input_buckets,
                 "output": self.output_buckets,
+                "config": self._config,
             }
         else:
             return {}
@@ -173,13 +287,13 @@ class Minio(PersistentStorage):
         try:
             instance_id = cached_config["instance_id"]
             docker_client = docker.from_env()
-            obj = Minio(docker_client, cache_client, False)
+            obj = Minio(docker_client, cache_client, False, cached_config.get("config"))
             obj._storage_container = docker_client.containers.get(instance_id)
             obj._url = cached_config["address"]
             obj._access_key = cached_config["access_key"]
             obj._secret_key = cached_config["secret_key"]
-            obj._input_buckets = cached_config["input"]
-            obj._output_buckets = cached_config["output"]
+            obj.input_buckets = cached_config["input"]
+            obj.output_buckets = cached_config["output"]
             return obj
         except docker.errors.NotFound:
             raise RuntimeError(f"Cached container {instance_id} not available anymore!")
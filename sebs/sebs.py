@@ -71,6 +71,7 @@ class SeBS(LoggingBase):
         """
         self._cache_client.ignore_storage = True
         self._cache_client.ignore_functions = True
+        self._cache_client.ignore_metrics = True
 
     def get_deployment(
         self,
@@ -1,11 +1,16 @@
 import math
-from typing import List, Tuple
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
 from collections import namedtuple
 
 import numpy as np
 import scipy.stats as st
 
 BasicStats = namedtuple("BasicStats", "mean median std cv")
+GroupStats = namedtuple("GroupStats", "count mean std cv min max percentiles ci")
+MannWhitney = namedtuple("MannWhitney", "count_x count_y u p cliffs_delta")
+
+# Upper bound on the number of samples drawn in a single batch of bootstrap resamples.
+BOOTSTRAP_BATCH_SIZE = 2 ** 22
 
 
 def basic_stats(times: List[float]) -> BasicStats:
@@ -21,15 +26,335 @@ def ci_tstudents(alpha: float, times: List[float]) -> Tuple[float, float]:
     return st.t.interval(alpha, len(times) - 1, loc=mean, scale=st.sem(times))
 
 
-def ci_le_boudec(alpha: float, times: List[float]) -> Tuple[float, float]:
+"""
+    Positions of order statistics bounding the confidence interval of the median,
+    following Le Boudec, "Performance Evaluation of Computer and Communication Systems".
+    Positions are 1-based; the interval does not exist when the lower position
+    is smaller than one.
+"""
+
+
+def _le_boudec_positions(alpha: float, n: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    z_value = st.norm.ppf(1 - (1 - alpha) / 2)
+    low_pos = np.floor((n - z_value * np.sqrt(n)) / 2).astype(np.int64)
+    high_pos = np.ceil(1 + (n + z_value * np.sqrt(n)) / 2).astype(np.int64)
+    return low_pos, high_pos
+
+
+"""
+    Non-parametric confidence interval of the median for any confidence level.
+
+    :return: bounds of the interval, NaN if there are not enough samples
+"""
+
+
+def ci_le_boudec(alpha: float, times: Sequence[float]) -> Tuple[float, float]:
+
+    values = np.asarray(times, dtype=np.float64)
+    n = len(values)
+    low_pos, high_pos = _le_boudec_positions(alpha, np.array(n))
+    if low_pos < 1 or high_pos > n:
+        return (math.nan, math.nan)
+    low, high = np.partition(values, (low_pos - 1, high_pos - 1))[[low_pos - 1, high_pos - 1]]
+    return (float(low), float(high))
+
+
+"""
+    Bootstrap confidence interval of a statistic with the percentile method.
+    Resamples are drawn in batches as a single array, and the statistic
+    must accept the `axis` argument, like `np.median` and `np.mean`.
+"""
+
+
+def ci_bootstrap(
+    alpha: float,
+    times: Sequence[float],
+    statistic: Callable[..., np.ndarray] = np.median,
+    resamples: int = 10000,
+    seed: Optional[int] = None,
+) -> Tuple[float, float]:
+
+    values = np.asarray(times, dtype=np.float64)
+    n = len(values)
+    rng = np.random.default_rng(seed)
+    batch = max(1, BOOTSTRAP_BATCH_SIZE // max(n, 1))
+    estimates = np.empty(resamples)
+    for begin in range(0, resamples, batch):
+        size = min(batch, resamples - begin)
+        end = begin + size
+        estimates[begin:end] = statistic(
+            values[rng.integers(0, n, size=(size, n))], axis=1
+        )
+    low, high = np.percentile(estimates, [50 * (1 - alpha), 100 - 50 * (1 - alpha)])
+    return (float(low), float(high))
+
+
+def percentiles(times: Sequence[float], q: Sequence[float]) -> np.ndarray:
+    return np.percentile(np.asarray(times, dtype=np.float64), q)
+
+
+"""
+    Order of values sorted by group and value: one sort by value,
+    followed by a stable sort by each group key.
+    NaN values, e.g., missing provider metrics, are dropped.
+
+    :return: indices of sorted values, start and size of each group, and group keys
+"""
+
+
+def _group_order(
+    values: np.ndarray, keys: Sequence[Sequence]
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, List[tuple]]:
+
+    key_arrays = [np.asarray(key) for key in keys]
+    valid = np.flatnonzero(~np.isnan(values))
+    data = values[valid]
+    key_arrays = [key[valid] for key in key_arrays]
+
+    # sort by value and then stable sort by each key, from the least significant one;
+    # the result is equal to lexsort but numeric keys are sorted about two times faster
+    order = np.argsort(data)
+    for key in reversed(key_arrays):
+        order = order[np.argsort(key[order], kind="stable")]
+    key_arrays = [key[order] for key in key_arrays]
+
+    boundaries = np.zeros(len(order), dtype=bool)
+    if len(order) > 0:
+        boundaries[0] = True
+    for key in key_arrays:
+        boundaries[1:] |= key[1:] != key[:-1]
+    starts = np.flatnonzero(boundaries)
+    counts = np.diff(np.append(starts, len(order)))
+    group_keys = list(zip(*[key[starts].tolist() for key in key_arrays]))
+    return valid[order], starts, counts, group_keys
+
+
+"""
+    Sort values by group and value, see `_group_order`.
+
+    :return: sorted values, start and size of each group, and group keys
+"""
+
+
+def _sort_groups(
+    values: Sequence[float], keys: Sequence[Sequence]
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, List[tuple]]:
+
+    data = np.asarray(values, dtype=np.float64)
+    order, starts, counts, group_keys = _group_order(data, keys)
+    return data[order], starts, counts, group_keys
+
+
+"""
+    Percentiles of each group with linear interpolation, the default of `np.percentile`.
+
+    :return: dictionary of percentiles indexed by group keys
+"""
+
+
+def grouped_percentiles(
+    values: Sequence[float], keys: Sequence[Sequence], q: Sequence[float]
+) -> Dict[tuple, np.ndarray]:
+
+    data, starts, counts, group_keys = _sort_groups(values, keys)
+    result = _percentiles_sorted(data, starts, counts, q)
+    return dict(zip(group_keys, result))
+
+
+def _percentiles_sorted(
+    data: np.ndarray, starts: np.ndarray, counts: np.ndarray, q: Sequence[float]
+) -> np.ndarray:
+    pos = (counts[:, None] - 1) * (np.asarray(q, dtype=np.float64)[None, :] / 100.0)
+    low = np.floor(pos).astype(np.int64)
+    high = np.ceil(pos).astype(np.int64)
+    low_vals = data[starts[:, None] + low]
+    high_vals = data[starts[:, None] + high]
+    return low_vals + (high_vals - low_vals) * (pos - low)
+
+
+"""
+    Summary of each group computed from one ordering of the data:
+    count, mean, standard deviation, coefficient of variation, extremes,
+    percentiles, and the non-parametric confidence interval of the median.
+    Groups are defined by the combination of values in `keys`, e.g.,
+    memory size, experiment type, and cold start flag.
+
+    :return: dictionary of statistics indexed by group keys
+"""
+
+
+def group_summary(
+    values: Sequence[float],
+    keys: Sequence[Sequence],
+    q: Sequence[float] = (50, 90, 95, 99),
+    alpha: float = 0.95,
+) -> Dict[tuple, GroupStats]:
+
+    data, starts, counts, group_keys = _sort_groups(values, keys)
+    if len(data) == 0:
+        return {}
+
+    means = np.add.reduceat(data, starts) / counts
+    deviations = data - np.repeat(means, counts)
+    stds = np.sqrt(np.add.reduceat(deviations * deviations, starts) / counts)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cvs = stds / means * 100
+    mins = data[starts]
+    maxs = data[starts + counts - 1]
+    group_percentiles = _percentiles_sorted(data, starts, counts, q)
+
+    low_pos, high_pos = _le_boudec_positions(alpha, counts)
+    valid = (low_pos >= 1) & (high_pos <= counts)
+    ci_low = np.where(valid, data[starts + np.clip(low_pos - 1, 0, counts - 1)], np.nan)
+    ci_high = np.where(valid, data[starts + np.clip(high_pos - 1, 0, counts - 1)], np.nan)
+
+    return {
+        key: GroupStats(
+            int(counts[idx]),
+            float(means[idx]),
+            float(stds[idx]),
+            float(cvs[idx]),
+            float(mins[idx]),
+            float(maxs[idx]),
+            dict(zip(q, group_percentiles[idx].tolist())),
+            (float(ci_low[idx]), float(ci_high[idx])),
+        )
+        for idx, key in enumerate(group_keys)
+    }
+
+
+"""
+    Two-sided Mann-Whitney U test between two samples in each group,
+    computed for all groups from one ordering of the data.
+    The p-value uses the normal approximation with tie and continuity
+    corrections, like `scipy.stats.mannwhitneyu` with the asymptotic method.
+
+    U is the statistic of the second sample, and Cliff's delta is the
+    effect size P(Y > X) - P(Y < X), positive when values of the second
+    sample tend to be larger. Values are NaN when one of samples is empty.
+
+    :param second: flags of values belonging to the second sample
+    :return: dictionary of test results indexed by group keys
+"""
+
+
+def grouped_mann_whitney(
+    values: Sequence[float], keys: Sequence[Sequence], second: Sequence[bool]
+) -> Dict[tuple, MannWhitney]:
+
+    data = np.asarray(values, dtype=np.float64)
+    order, starts, counts, group_keys = _group_order(data, keys)
+    data = data[order]
+    in_second = np.asarray(second, dtype=np.float64)[order]
+    groups = len(starts)
+    if groups == 0:
+        return {}
+    group_idx = np.repeat(np.arange(groups), counts)
+
+    # tied values share the average of their ranks within the group
+    size = len(data)
+    tie_boundaries = np.ones(size, dtype=bool)
+    tie_boundaries[1:] = (data[1:] != data[:-1]) | (group_idx[1:] != group_idx[:-1])
+    tie_starts = np.flatnonzero(tie_boundaries)
+    tie_counts = np.diff(np.append(tie_starts, size))
+    first_rank = tie_starts - starts[group_idx[tie_starts]] + 1
+    ranks = np.repeat(first_rank + (tie_counts - 1) / 2.0, tie_counts)
+    ties = np.bincount(
+        group_idx[tie_starts], weights=tie_counts ** 3 - tie_counts, minlength=groups
+    )
+
+    count_y = np.bincount(group_idx, weights=in_second, minlength=groups)
+    count_x = counts - count_y
+    rank_sum = np.bincount(group_idx, weights=ranks * in_second, minlength=groups)
+    u = rank_sum - count_y * (count_y + 1) / 2
+    pairs = count_x * count_y
+    with np.errstate(divide="ignore", invalid="ignore"):
+        sigma = np.sqrt(pairs / 12 * ((counts + 1) - ties / (counts * (counts - 1))))
+        z = (np.abs(u - pairs / 2) - 0.5) / sigma
+        # without variance all values are tied, and the test is never significant
+        p = np.clip(2 * st.norm.sf(z), 0, 1)
+        p[pairs == 0] = np.nan
+        cliffs_delta = np.where(pairs > 0, 2 * u / pairs - 1, np.nan)
+
+    return {
+        key: MannWhitney(
+            int(count_x[idx]),
+            int(count_y[idx]),
+            float(u[idx]),
+            float(p[idx]),
+            float(cliffs_delta[idx]),
+        )
+        for idx, key in enumerate(group_keys)
+    }
+
+
+"""
+    Streaming mean and variance with Welford's algorithm.
+"""
+
+
+class OnlineStats:
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        self._m2 = 0.0
+
+    def add(self, val: float):
+        self.count += 1
+        delta = val - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (val - self.mean)
+        self.min = min(self.min, val)
+        self.max = max(self.max, val)
+
+    # Population variance, like np.var and basic_stats.
+    @property
+    def variance(self) -> float:
+        return self._m2 / self.count if self.count > 0 else math.nan
+
+    @property
+    def std(self) -> float:
+        return math.sqrt(self.variance)
+
+
+"""
+    Streaming quantile estimator with bounded relative error.
+
+    Positive values are counted in logarithmically spaced buckets, and each
+    returned quantile is within `relative_accuracy` of a sample value of the
+    same rank. Memory depends on the range of values, not on their number:
+    with 1% accuracy, values from 1 us to 1 hour use about 1100 buckets.
+    Values that are not positive are counted in a separate bucket.
+"""
 
-    sorted_times = sorted(times)
-    n = len(times)
 
-    # z(alfa/2)
-    z_value = {0.95: 1.96, 0.99: 2.576}.get(alpha)
+class QuantileSketch:
+    def __init__(self, relative_accuracy: float = 0.01):
+        self._gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self._gamma)
+        self._buckets: Dict[int, int] = {}
+        self._non_positive = 0
+        self.count = 0
 
-    low_pos = math.floor((n - z_value * math.sqrt(n)) / 2)
-    high_pos = math.ceil(1 + (n + z_value * math.sqrt(n)) / 2)
+    def add(self, val: float):
+        self.count += 1
+        if val <= 0:
+            self._non_positive += 1
+            return
+        idx = math.ceil(math.log(val) / self._log_gamma)
+        self._buckets[idx] = self._buckets.get(idx, 0) + 1
 
-    return (sorted_times[low_pos], sorted_times[high_pos])
+    def quantile(self, q: float) -> float:
+        if self.count == 0:
+            return math.nan
+        rank = q * (self.count - 1)
+        seen = self._non_positive
+        if rank < seen:
+            return 0.0
+        for idx in sorted(self._buckets):
+            seen += self._buckets[idx]
+            if rank < seen:
+                return 2 * self._gamma ** idx / (self._gamma + 1)
+        return 2 * self._gamma ** max(self._buckets) / (self._gamma + 1)
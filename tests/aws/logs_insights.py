@@ -0,0 +1,203 @@
+import tempfile
+import threading
+import time
+import unittest
+from datetime import datetime
+from typing import Dict, List, Tuple
+from unittest import mock
+
+from sebs.aws import AWS
+from sebs.aws.logs import LogsInsightsQuery
+from sebs.cache import Cache
+from sebs.faas import System
+from sebs.faas.function import ExecutionResult
+from sebs.utils import LoggingHandlers
+
+"""
+    Stub of the CloudWatch Logs client serving REPORT lines of invocations.
+    Results of a query are truncated at its limit, like in Logs Insights,
+    and each query is running for the given number of polls before it completes.
+"""
+
+
+class LogsClientStub:
+    def __init__(self, reports: List[Tuple[int, str]], delay: float = 0.01, polls: int = 1):
+        self.reports = reports
+        self.delay = delay
+        self.polls = polls
+        self.queries: List[Tuple[int, int]] = []
+        self.failed_windows: List[Tuple[int, int]] = []
+        self.running = 0
+        self.max_running = 0
+        self._queries: Dict[str, dict] = {}
+        self._lock = threading.Lock()
+
+    def start_query(self, logGroupName, queryString, startTime, endTime, limit):
+        with self._lock:
+            query_id = str(len(self.queries))
+            self.queries.append((startTime, endTime))
+            self._queries[query_id] = {"window": (startTime, endTime), "limit": limit, "polls": 0}
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+        return {"queryId": query_id}
+
+    def get_query_results(self, queryId):
+        time.sleep(self.delay)
+        with self._lock:
+            query = self._queries[queryId]
+            query["polls"] += 1
+            if query["polls"] <= self.polls:
+                return {"status": "Running", "results": []}
+            self.running -= 1
+            begin, end = query["window"]
+            if query["window"] in self.failed_windows:
+                return {"status": "Failed", "results": []}
+            rows = [
+                [
+                    {"field": "@timestamp", "value": str(timestamp)},
+                    {"field": "@message", "value": message},
+                ]
+                for timestamp, message in self.reports
+                if begin <= timestamp <= end
+            ]
+            return {"status": "Complete", "results": rows[: query["limit"]]}
+
+
+def report(request_id: str) -> str:
+    return (
+        f"REPORT RequestId: {request_id}\tDuration: 12.50 ms\tBilled Duration: 13 ms\t"
+        "Memory Size: 128 MB\tMax Memory Used: 64 MB\t"
+    )
+
+
+def invocations(begin: int, count: int, step: float = 1.0) -> Dict[str, ExecutionResult]:
+    requests = {}
+    for idx in range(count):
+        timestamp = begin + idx * step
+        requests[f"request-{idx}"] = ExecutionResult.from_times(
+            datetime.fromtimestamp(timestamp), datetime.fromtimestamp(timestamp + 0.5)
+        )
+    return requests
+
+
+def logs(requests: Dict[str, ExecutionResult]) -> List[Tuple[int, str]]:
+    return [
+        (int(req.times.client_timestamps()[0]), report(request_id))
+        for request_id, req in requests.items()
+    ]
+
+
+@mock.patch.object(LogsInsightsQuery, "QUERY_LIMIT", 10)
+class AWSLogsInsightsQuery(unittest.TestCase):
+
+    BEGIN = 1600000000
+
+    def query(self, client: LogsClientStub, **kwargs) -> LogsInsightsQuery:
+        return LogsInsightsQuery(client, "/aws/lambda/test", poll_interval=0.001, **kwargs)
+
+    def test_windows(self):
+        requests = invocations(self.BEGIN, 10, step=10)
+        query = self.query(LogsClientStub([]), window_invocations=4)
+        windows = query.windows(self.BEGIN, self.BEGIN + 100, requests)
+        margin = LogsInsightsQuery.WINDOW_MARGIN
+        self.assertEqual(
+            windows,
+            [
+                (self.BEGIN, self.BEGIN + 31 + margin),
+                (self.BEGIN + 40 - margin, self.BEGIN + 71 + margin),
+                (self.BEGIN + 80 - margin, self.BEGIN + 91 + margin),
+            ],
+        )
+
+        # invocations without client times require the entire range
+        requests["untimed"] = ExecutionResult()
+        windows = query.windows(self.BEGIN, self.BEGIN + 100, requests)
+        self.assertEqual(windows, [(self.BEGIN, self.BEGIN + 101)])
+
+    def test_complete_window(self):
+        requests = invocations(self.BEGIN, 8)
+        client = LogsClientStub(logs(requests))
+        reports = self.query(client).reports(self.BEGIN, self.BEGIN + 10, requests)
+        self.assertEqual(set(reports.keys()), set(requests.keys()))
+        self.assertEqual(len(client.queries), 1)
+
+    def test_truncated_window(self):
+        requests = invocations(self.BEGIN, 45, step=0.5)
+        client = LogsClientStub(logs(requests))
+        reports = self.query(client).reports(self.BEGIN, self.BEGIN + 25, requests)
+        self.assertEqual(set(reports.keys()), set(requests.keys()))
+
+        # windows are split in halves until results are below the limit
+        self.assertGreater(len(client.queries), 1)
+        window = client.queries[0]
+        self.assertEqual(client.queries[1], (window[0], (window[0] + window[1]) // 2))
+        for begin, end in client.queries:
+            self.assertGreaterEqual(begin, window[0])
+            self.assertLessEqual(end, window[1])
+
+    def test_truncated_second(self):
+        requests = invocations(self.BEGIN, 15, step=0.01)
+        client = LogsClientStub(logs(requests))
+        with self.assertLogs(level="WARNING"):
+            reports = self.query(client)._query_window(self.BEGIN, self.BEGIN + 1)
+        self.assertEqual(len(reports), LogsInsightsQuery.QUERY_LIMIT)
+        self.assertEqual(client.queries, [(self.BEGIN, self.BEGIN + 1)])
+
+    def test_failed_window(self):
+        requests = invocations(self.BEGIN, 10, step=10)
+        client = LogsClientStub(logs(requests))
+        query = self.query(client, window_invocations=5)
+        windows = query.windows(self.BEGIN, self.BEGIN + 100, requests)
+        client.failed_windows = [windows[0]]
+        reports = query.reports(self.BEGIN, self.BEGIN + 100, requests)
+        self.assertEqual(set(reports.keys()), {f"request-{idx}" for idx in range(5, 10)})
+
+    def test_concurrency_cap(self):
+        requests = invocations(self.BEGIN, 24, step=20)
+        client = LogsClientStub(logs(requests), delay=0.02)
+        query = self.query(client, max_concurrent=3, window_invocations=1)
+        reports = query.reports(self.BEGIN, self.BEGIN + 500, requests)
+        self.assertEqual(set(reports.keys()), set(requests.keys()))
+        self.assertEqual(len(client.queries), 24)
+        self.assertLessEqual(client.max_running, 3)
+        self.assertEqual(client.running, 0)
+
+    def test_deployment_client(self):
+        requests = invocations(self.BEGIN, 30, step=0.5)
+        # the deployment waits a second between polls
+        client = LogsClientStub(logs(requests), polls=0)
+        with tempfile.TemporaryDirectory() as cache_dir:
+            deployment = AWS(None, None, Cache(cache_dir), None, LoggingHandlers())
+            deployment.logs_client = client
+            self.assertIs(deployment.get_logs_client(), client)
+            found = deployment.poll_metrics("test", self.BEGIN, self.BEGIN + 20, requests)
+        self.assertEqual(found, set(requests.keys()))
+        self.assertGreater(len(client.queries), 1)
+        for req in requests.values():
+            self.assertEqual(req.provider_times.execution, 12500)
+            self.assertEqual(req.billing.gb_seconds, 13 * 128)
+
+    def test_deployment_cached_records(self):
+        requests = invocations(self.BEGIN, 20, step=10)
+        client = LogsClientStub(logs(requests)[:15], polls=0)
+        with tempfile.TemporaryDirectory() as cache_dir:
+            cache = Cache(cache_dir)
+            cached = {request_id: report(request_id) for request_id in list(requests)[:10]}
+            cache.add_metrics_records("aws", "test", self.BEGIN, self.BEGIN + 200, cached)
+            deployment = AWS(None, None, cache, None, LoggingHandlers())
+            deployment.logs_client = client
+            # invocations without logs do not block processing
+            deployment.metrics_timeout = 0
+            found = deployment.poll_metrics("test", self.BEGIN, self.BEGIN + 200, requests)
+            self.assertEqual(found, {f"request-{idx}" for idx in range(15)})
+            # only the time range of invocations missing in the cache is queried
+            self.assertEqual(len(client.queries), 1)
+            begin = self.BEGIN + 100 - LogsInsightsQuery.WINDOW_MARGIN
+            self.assertEqual(client.queries[0][0], begin)
+
+            # old invocations without logs are settled, and processing is offline
+            deployment.logs_client = LogsClientStub([], polls=0)
+            deployment.metrics_timeout = System.METRICS_TIMEOUT
+            found = deployment.poll_metrics("test", self.BEGIN, self.BEGIN + 200, requests)
+            self.assertEqual(found, {f"request-{idx}" for idx in range(15)})
+            self.assertEqual(deployment.logs_client.queries, [])
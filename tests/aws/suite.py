@@ -9,12 +9,14 @@ import sebs
 from .create_function import AWSCreateFunction
 from .invoke_function_sdk import AWSInvokeFunctionSDK
 from .invoke_function_http import AWSInvokeFunctionHTTP
+from .logs_insights import AWSLogsInsightsQuery
 
 def suite():
     suite = unittest.TestSuite()
     suite.addTest(unittest.defaultTestLoader.loadTestsFromTestCase(AWSCreateFunction))
     suite.addTest(unittest.defaultTestLoader.loadTestsFromTestCase(AWSInvokeFunctionSDK))
     suite.addTest(unittest.defaultTestLoader.loadTestsFromTestCase(AWSInvokeFunctionHTTP))
+    suite.addTest(unittest.defaultTestLoader.loadTestsFromTestCase(AWSLogsInsightsQuery))
     return suite
 
 def run():
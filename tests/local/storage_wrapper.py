@@ -0,0 +1,73 @@
+import importlib.util
+import io
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+PROJECT_DIR = os.path.join(os.path.dirname(os.path.realpath(__file__)), os.pardir, os.pardir)
+WRAPPER = os.path.join(PROJECT_DIR, "benchmarks", "wrappers", "local", "python", "storage.py")
+
+"""
+    The storage wrapper is loaded from its source file,
+    since it is copied into the code package of each function.
+"""
+
+
+def load_wrapper():
+    spec = importlib.util.spec_from_file_location("local_storage_wrapper", WRAPPER)
+    mod = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(mod)
+    return mod
+
+
+class LocalStorageWrapper(unittest.TestCase):
+    def setUp(self):
+        self.wrapper = load_wrapper()
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.source = os.path.join(self.tmp_dir.name, "source")
+        with open(self.source, "wb") as f:
+            f.write(b"archive")
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def assertUniqueName(self, key: str, name: str, extension: str):
+        prefix, random, suffix = key.split(".", 2)
+        self.assertEqual(prefix, name)
+        self.assertEqual(len(random), 8)
+        self.assertEqual(suffix, extension)
+
+    def test_unique_name(self):
+        unique_name = self.wrapper.storage.unique_name
+        self.assertUniqueName(unique_name("data.zip"), "data", "zip")
+        self.assertUniqueName(unique_name("data.tar.gz"), "data", "tar.gz")
+        directory, file_name = os.path.split(unique_name("dir.v1/data.tar.xz"))
+        self.assertEqual(directory, "dir.v1")
+        self.assertUniqueName(file_name, "data", "tar.xz")
+        self.assertTrue(unique_name("data").startswith("data."))
+
+    def test_filesystem_upload(self):
+        root = os.path.join(self.tmp_dir.name, "storage")
+        with mock.patch.dict(os.environ, {"STORAGE_FILESYSTEM_PATH": root}):
+            client = self.wrapper.filesystem_storage()
+        key = client.upload("bucket", "data.tar.gz", self.source)
+        self.assertUniqueName(key, "data", "tar.gz")
+        self.assertEqual(client.download_stream("bucket", key)[:], b"archive")
+
+        key = client.upload_stream("bucket", "data.tar.bz2", io.BytesIO(b"archive"))
+        self.assertUniqueName(key, "data", "tar.bz2")
+        key = client.upload_stream("bucket", "data.tar.xz", io.BufferedReader(io.BytesIO(b"a")))
+        self.assertUniqueName(key, "data", "tar.xz")
+        self.assertEqual(len(list(client.list_directory("bucket", "data"))), 3)
+
+    def test_minio_upload(self):
+        client = self.wrapper.storage()
+        client.client = mock.Mock()
+        key = client.upload("bucket", "data.tar.gz", self.source)
+        self.assertUniqueName(key, "data", "tar.gz")
+        client.client.fput_object.assert_called_once_with("bucket", key, self.source)
+
+        key = client.upload_stream("bucket", "data.tar.gz", io.BufferedReader(io.BytesIO(b"a")))
+        self.assertUniqueName(key, "data", "tar.gz")
+        self.assertEqual(client.client.put_object.call_args[0][:2], ("bucket", key))
@@ -0,0 +1,9 @@
+import unittest
+
+from .storage_wrapper import LocalStorageWrapper
+
+
+def suite():
+    suite = unittest.TestSuite()
+    suite.addTest(unittest.defaultTestLoader.loadTestsFromTestCase(LocalStorageWrapper))
+    return suite
@@ -0,0 +1,97 @@
+import math
+import unittest
+
+import numpy as np
+import scipy.stats as st
+
+from sebs.experiments.comparison import ResultComparison
+from sebs.statistics import GroupStats, MannWhitney, grouped_mann_whitney
+
+
+class GroupedMannWhitney(unittest.TestCase):
+
+    """
+        Groups of integer values to have many ties, a group with all values tied,
+        and groups where one of the samples is empty.
+    """
+
+    def setUp(self):
+        rng = np.random.default_rng(1234)
+        self.samples = {
+            "small": (rng.integers(0, 5, 7), rng.integers(0, 5, 4)),
+            "ties": (rng.integers(0, 10, 200), rng.integers(2, 12, 150)),
+            "shifted": (rng.normal(100, 10, 300), rng.normal(105, 10, 250)),
+            "all-tied": (np.full(5, 3.0), np.full(6, 3.0)),
+            "single": (np.array([1.0]), np.array([2.0])),
+            "no-second": (rng.integers(0, 5, 10), np.array([])),
+            "no-first": (np.array([]), rng.integers(0, 5, 10)),
+        }
+        values, keys, second = [], [], []
+        for key, (x, y) in self.samples.items():
+            for sample, flag in ((x, False), (y, True)):
+                values.extend(sample.tolist())
+                keys.extend([key] * len(sample))
+                second.extend([flag] * len(sample))
+        # grouping must not depend on the order of values
+        order = rng.permutation(len(values))
+        self.result = grouped_mann_whitney(
+            np.array(values)[order], [np.array(keys)[order]], np.array(second)[order]
+        )
+
+    def test_groups(self):
+        self.assertEqual(set(self.result.keys()), {(key,) for key in self.samples.keys()})
+        for key, (x, y) in self.samples.items():
+            with self.subTest(group=key):
+                self.assertEqual(self.result[(key,)].count_x, len(x))
+                self.assertEqual(self.result[(key,)].count_y, len(y))
+
+    def test_scipy(self):
+        for key, (x, y) in self.samples.items():
+            if len(x) == 0 or len(y) == 0:
+                continue
+            with self.subTest(group=key):
+                result = self.result[(key,)]
+                expected = st.mannwhitneyu(y, x, alternative="two-sided", method="asymptotic")
+                self.assertAlmostEqual(result.u, expected.statistic)
+                if math.isnan(expected.pvalue):
+                    self.assertTrue(math.isnan(result.p))
+                else:
+                    self.assertAlmostEqual(result.p, expected.pvalue, places=10)
+                pairs = np.sign(np.subtract.outer(y, x))
+                self.assertAlmostEqual(result.cliffs_delta, pairs.mean())
+
+    def test_empty_sample(self):
+        for key in ("no-first", "no-second"):
+            with self.subTest(group=key):
+                self.assertTrue(math.isnan(self.result[(key,)].p))
+                self.assertTrue(math.isnan(self.result[(key,)].cliffs_delta))
+
+    def test_no_values(self):
+        self.assertEqual(grouped_mann_whitney([], [[]], []), {})
+
+
+class ResultComparisonGroup(unittest.TestCase):
+    @staticmethod
+    def stats(median: float, ci) -> GroupStats:
+        return GroupStats(100, median, 0.0, 0.0, median, median, {50: median}, ci)
+
+    def compare(self, old_ci, new_ci) -> dict:
+        test = MannWhitney(100, 100, 9000.0, 0.001, 0.8)
+        return ResultComparison()._compare_group(
+            ("bench", 128, "warm", False),
+            "exec_time",
+            self.stats(1.0, old_ci),
+            self.stats(2.0, new_ci),
+            test,
+        )
+
+    def test_disjoint_ci(self):
+        self.assertEqual(self.compare((0.9, 1.1), (1.9, 2.1))["status"], "regression")
+
+    def test_overlapping_ci(self):
+        self.assertEqual(self.compare((0.9, 2.0), (1.9, 2.1))["status"], "unchanged")
+
+    def test_unknown_ci(self):
+        result = self.compare((math.nan, math.nan), (1.9, 2.1))
+        self.assertIsNone(result["ci_overlap"])
+        self.assertEqual(result["status"], "unchanged")
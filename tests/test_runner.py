@@ -42,6 +42,10 @@ if "aws" in args.deployment:
     from aws import suite
     for case in suite.suite():
         cases.append(case)
+if "local" in args.deployment:
+    from local import suite
+    for case in suite.suite():
+        cases.append(case)
 tests = []
 for case in cases:
     for c in case: